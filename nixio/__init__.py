@@ -19,7 +19,8 @@ from .section import Section, S
 from .property import Property, OdmlType
 from .feature import Feature
 from .data_frame import DataFrame
-from .dimensions import SampledDimension, RangeDimension, SetDimension
+from .dimensions import (SampledDimension, RangeDimension, SetDimension,
+                         Axis)
 
 # enums
 from .file import FileMode
@@ -29,13 +30,18 @@ from .dimension_type import DimensionType
 from .link_type import LinkType
 from .compression import Compression
 
+# storage
+from .storage import StoragePolicy
+from .access import AccessOptions
+
 # version
 from .info import VERSION as __version__
 
 __all__ = ("File", "Block", "Group", "DataArray", "DataFrame", "Tag",
            "MultiTag", "Source", "Section", "S", "Feature", "Property",
            "OdmlType", "SampledDimension", "RangeDimension", "SetDimension",
+           "Axis",
            "FileMode", "DataSliceMode", "DataType", "DimensionType",
-           "LinkType", "Compression")
+           "LinkType", "Compression", "StoragePolicy", "AccessOptions")
 __author__ = ('Christian Kellner, Adrian Stoewer, Andrey Sobolev, Jan Grewe, '
               'Balint Morvai, Achilleas Koutsou')
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+# Copyright © 2020, German Neuroinformatics Node (G-Node)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the Project.
+from numbers import Integral
+
+import h5py
+
+
+MB = 1024 * 1024
+
+_drivers = ("sec2", "stdio", "core")
+
+_libvers = ("earliest", "v18", "v110", "v112", "v114", "latest")
+
+_strategies = {
+    "fsm_aggr": "FSPACE_STRATEGY_FSM_AGGR",
+    "page": "FSPACE_STRATEGY_PAGE",
+    "aggr": "FSPACE_STRATEGY_AGGR",
+    "none": "FSPACE_STRATEGY_NONE",
+}
+
+
+def _libver(name):
+    constant = "LIBVER_" + name.upper()
+    if not hasattr(h5py.h5f, constant):
+        raise ValueError("The HDF5 library does not support the file "
+                         "format version {}".format(name))
+    return getattr(h5py.h5f, constant)
+
+
+def _check_size(value, name):
+    if value is not None and (not isinstance(value, Integral) or value < 0):
+        raise ValueError("{} must be a non-negative integer".format(name))
+
+
+class AccessOptions(object):
+    """
+    Describes how the HDF5 library accesses a file: the caches it keeps, the
+    file format versions it may use, how space in new files is managed and
+    which low level driver reads and writes the file. Options that are left
+    at None keep the defaults of the HDF5 library. The options can be passed
+    to File.open, either as an AccessOptions object or as the name of one of
+    the presets (see AccessOptions.preset).
+
+    The file-space options (``file_space``, ``file_space_persist``,
+    ``file_space_threshold`` and ``page_size``) are stored in the file when
+    it is created and have no effect when an existing file is opened.
+
+    :param chunk_cache_size: Size of the raw data chunk cache of each
+                             dataset in bytes. Reads of chunks that do not
+                             fit into the cache have to decompress the
+                             chunks again for each read.
+    :param chunk_cache_slots: Number of hash table slots of the chunk cache,
+                              ideally a prime about 100 times the number of
+                              chunks that fit into the cache.
+    :param chunk_cache_w0: Preemption policy of the chunk cache between 0 and
+                           1. With 1, fully read or written chunks are
+                           evicted first.
+    :param metadata_cache_size: Initial size of the metadata cache in bytes.
+    :param metadata_cache_max: Maximum size of the metadata cache in bytes.
+    :param libver: Tuple of the lowest and highest file format versions
+                   ("earliest", "v18", "v110", "v112", "v114" or "latest")
+                   the library may use for new objects. Files written with
+                   a lower bound above "earliest" may not be readable by
+                   older versions of HDF5.
+    :param file_space: File space management strategy of new files:
+                       "fsm_aggr", "page" (paged aggregation), "aggr" or
+                       "none".
+    :param file_space_persist: Keep track of free space in the file across
+                               sessions so that it can be reused.
+    :param file_space_threshold: Smallest free space section in bytes that
+                                 is tracked.
+    :param page_size: File space page size in bytes for paged aggregation.
+    :param page_buffer_size: Size of the page buffer in bytes. The page
+                             buffer is only used for files created with
+                             paged aggregation.
+    :param driver: The low level file driver: "sec2" (the default of the
+                   library), "stdio" (buffered C stdio) or "core" (keeps the
+                   whole file in memory and writes it back when it is
+                   closed).
+    :param core_increment: Size in bytes by which the memory of the core
+                           driver grows.
+    :param core_backing_store: Write the file kept in memory by the core
+                               driver back to disk.
+    :param file_locking: False to open the file without HDF5 file locks,
+                         e.g., for reading a file that another process has
+                         open for writing. Requires HDF5 1.10.7 or 1.12.1
+                         and is ignored by older versions, which only read
+                         the HDF5_USE_FILE_LOCKING environment variable.
+    """
+
+    def __init__(self, chunk_cache_size=None, chunk_cache_slots=None,
+                 chunk_cache_w0=None, metadata_cache_size=None,
+                 metadata_cache_max=None, libver=None, file_space=None,
+                 file_space_persist=False, file_space_threshold=1,
+                 page_size=None, page_buffer_size=None, driver=None,
+                 core_increment=64 * MB, core_backing_store=True,
+                 file_locking=None):
+        for value, name in ((chunk_cache_size, "chunk_cache_size"),
+                            (chunk_cache_slots, "chunk_cache_slots"),
+                            (metadata_cache_size, "metadata_cache_size"),
+                            (metadata_cache_max, "metadata_cache_max"),
+                            (file_space_threshold, "file_space_threshold"),
+                            (page_size, "page_size"),
+                            (page_buffer_size, "page_buffer_size"),
+                            (core_increment, "core_increment")):
+            _check_size(value, name)
+        if chunk_cache_w0 is not None and not 0 <= chunk_cache_w0 <= 1:
+            raise ValueError("chunk_cache_w0 must be between 0 and 1")
+        if (metadata_cache_size is not None and
+                metadata_cache_max is not None and
+                metadata_cache_size > metadata_cache_max):
+            raise ValueError("metadata_cache_size cannot be larger than "
+                             "metadata_cache_max")
+        if libver is not None:
+            libver = tuple(libver)
+            if len(libver) != 2 or any(v not in _libvers for v in libver):
+                raise ValueError("libver must be a tuple of two of "
+                                 "{}".format(", ".join(_libvers)))
+        if file_space is not None and file_space not in _strategies:
+            raise ValueError("Invalid file space strategy {}, must be one "
+                             "of {}".format(file_space,
+                                            ", ".join(sorted(_strategies))))
+        if page_size is not None and file_space != "page":
+            raise ValueError("page_size requires the 'page' file space "
+                             "strategy")
+        if (page_size is not None and page_buffer_size and
+                page_buffer_size < page_size):
+            raise ValueError("page_buffer_size cannot be smaller than "
+                             "page_size")
+        if driver is not None and driver not in _drivers:
+            raise ValueError("Invalid driver {}, must be one of "
+                             "{}".format(driver, ", ".join(_drivers)))
+        self.chunk_cache_size = chunk_cache_size
+        self.chunk_cache_slots = chunk_cache_slots
+        self.chunk_cache_w0 = chunk_cache_w0
+        self.metadata_cache_size = metadata_cache_size
+        self.metadata_cache_max = metadata_cache_max
+        self.libver = libver
+        self.file_space = file_space
+        self.file_space_persist = file_space_persist
+        self.file_space_threshold = file_space_threshold
+        self.page_size = page_size
+        self.page_buffer_size = page_buffer_size
+        self.driver = driver
+        self.core_increment = core_increment
+        self.core_backing_store = core_backing_store
+        self.file_locking = file_locking
+
+    @classmethod
+    def streaming_write(cls, **kwargs):
+        """
+        Options for recording data that is appended continuously. The chunk
+        cache is large enough to hold the chunks that are being filled and
+        evicts chunks that were written completely first. New objects use the
+        HDF5 1.10 file format, whose chunk indexes are faster to append to;
+        such files cannot be read with HDF5 1.8.
+        """
+        options = dict(chunk_cache_size=64 * MB, chunk_cache_slots=12421,
+                       chunk_cache_w0=1., metadata_cache_size=8 * MB,
+                       metadata_cache_max=32 * MB, libver=("v110", "v110"))
+        options.update(kwargs)
+        return cls(**options)
+
+    @classmethod
+    def random_read(cls, **kwargs):
+        """
+        Options for reading small parts of large files in arbitrary order,
+        e.g., single channels or short time windows. Large chunk and metadata
+        caches keep the chunks and the chunk indexes that were read in
+        memory.
+        """
+        options = dict(chunk_cache_size=128 * MB, chunk_cache_slots=100003,
+                       metadata_cache_size=32 * MB,
+                       metadata_cache_max=128 * MB)
+        options.update(kwargs)
+        return cls(**options)
+
+    @classmethod
+    def archive(cls, **kwargs):
+        """
+        Options for files that are written once and kept. New files use
+        paged aggregation, which places metadata and raw data in separate
+        pages, and persistent free space tracking, so that the space of
+        deleted objects is reused; both require HDF5 1.10.1 or later to read
+        the file. The page buffer holds the pages that were read when the
+        file is opened again with these options.
+        """
+        options = dict(file_space="page", file_space_persist=True,
+                       page_size=MB, page_buffer_size=16 * MB)
+        options.update(kwargs)
+        return cls(**options)
+
+    @classmethod
+    def preset(cls, name):
+        """
+        Returns the options of a preset: "streaming-write", "random-read" or
+        "archive".
+        """
+        presets = {"streaming-write": cls.streaming_write,
+                   "random-read": cls.random_read,
+                   "archive": cls.archive}
+        if name not in presets:
+            raise ValueError("Unknown access preset {}, must be one of "
+                             "{}".format(name, ", ".join(sorted(presets))))
+        return presets[name]()
+
+    def make_fapl(self):
+        """
+        Returns a file access property list with these options.
+        """
+        fapl = h5py.h5p.create(h5py.h5p.FILE_ACCESS)
+        if self.driver == "sec2":
+            fapl.set_fapl_sec2()
+        elif self.driver == "stdio":
+            fapl.set_fapl_stdio()
+        elif self.driver == "core":
+            fapl.set_fapl_core(self.core_increment, self.core_backing_store)
+
+        if (self.chunk_cache_size is not None or
+                self.chunk_cache_slots is not None or
+                self.chunk_cache_w0 is not None):
+            mdc, slots, nbytes, w0 = fapl.get_cache()
+            if self.chunk_cache_slots is not None:
+                slots = self.chunk_cache_slots
+            if self.chunk_cache_size is not None:
+                nbytes = self.chunk_cache_size
+            if self.chunk_cache_w0 is not None:
+                w0 = self.chunk_cache_w0
+            fapl.set_cache(mdc, slots, nbytes, w0)
+
+        if (self.metadata_cache_size is not None or
+                self.metadata_cache_max is not None):
+            config = fapl.get_mdc_config()
+            if self.metadata_cache_max is not None:
+                config.max_size = self.metadata_cache_max
+                config.min_size = min(config.min_size, config.max_size)
+            if self.metadata_cache_size is not None:
+                config.set_initial_size = True
+                config.initial_size = self.metadata_cache_size
+                config.max_size = max(config.max_size,
+                                      self.metadata_cache_size)
+                config.min_size = min(config.min_size,
+                                      self.metadata_cache_size)
+            else:
+                config.initial_size = min(config.initial_size,
+                                          config.max_size)
+            fapl.set_mdc_config(config)
+
+        if self.libver is not None:
+            fapl.set_libver_bounds(*(_libver(v) for v in self.libver))
+
+        if self.page_buffer_size is not None:
+            fapl.set_page_buffer_size(self.page_buffer_size, 0, 0)
+
+        if (self.file_locking is not None and
+                hasattr(fapl, "set_file_locking")):
+            fapl.set_file_locking(bool(self.file_locking), True)
+        return fapl
+
+    def apply_fcpl(self, fcpl):
+        """
+        Sets the file space options on a file creation property list.
+        """
+        if self.file_space is not None:
+            strategy = getattr(h5py.h5f, _strategies[self.file_space])
+            fcpl.set_file_space_strategy(strategy, self.file_space_persist,
+                                         self.file_space_threshold)
+        if self.page_size is not None:
+            fcpl.set_file_space_page_size(self.page_size)
+        return fcpl
@@ -13,6 +13,7 @@ except ImportError:
     from sys import maxsize as maxint
 import numpy as np
 from inspect import isclass
+from numbers import Integral
 from six import string_types
 try:
     from collections.abc import OrderedDict
@@ -27,18 +28,38 @@ from .entity import Entity
 from .exceptions import exceptions
 from .group import Group
 from .data_array import DataArray
-from .data_frame import DataFrame
+from .data_frame import (DataFrame, _create_from_columns, _pandas_chunks,
+                         _arrow_chunks)
 from .multi_tag import MultiTag
 from .tag import Tag
 from .source import Source
 from . import util
 from .container import Container, SourceContainer
 from .section import Section
+from .dimensions import _dimension_layout
+from .util.intervals import IntervalIndex
+from .hdf5 import h5cache
+
+
+def _per_array(value, count, name, single=string_types):
+    """
+    Returns the value of a column oriented argument for each of ``count``
+    entities. Sequences must have one value per entity, other values (and
+    instances of the ``single`` types) are used for all entities.
+    """
+    if isinstance(value, single) or not isinstance(value, (list, tuple,
+                                                           np.ndarray)):
+        return [value] * count
+    if len(value) != count:
+        raise ValueError("{} must be given once or for each of the {} "
+                         "DataArrays".format(name, count))
+    return list(value)
 
 
 class Block(Entity):
 
-    def __init__(self, nixparent, h5group, compression=Compression.Auto):
+    def __init__(self, nixparent, h5group, compression=Compression.Auto,
+                 storage=None):
         super(Block, self).__init__(nixparent, h5group)
         self._groups = None
         self._data_arrays = None
@@ -46,15 +67,28 @@ class Block(Entity):
         self._multi_tags = None
         self._sources = None
         self._compr = compression
+        self._storage = storage
         self._data_frames = None
 
     @classmethod
-    def _create_new(cls, nixparent, h5parent, name, type_, compression):
+    def _create_new(cls, nixparent, h5parent, name, type_, compression,
+                    storage=None):
         newentity = super(Block, cls)._create_new(nixparent, h5parent,
                                                   name, type_)
         newentity._compr = compression
+        newentity._storage = storage
         return newentity
 
+    @property
+    def _storage_policy(self):
+        """
+        The default storage policy of the DataArrays of the block: its own
+        policy or, if it has none, the policy of the File.
+        """
+        if self._storage is not None:
+            return self._storage
+        return self._parent._storage
+
     # MultiTag
     def create_multi_tag(self, name="", type_="", positions=0,
                          copy_from=None, keep_copy_id=True):
@@ -167,7 +201,7 @@ class Block(Entity):
 
     def create_data_array(self, name="", array_type="", dtype=None, shape=None,
                           data=None, compression=Compression.Auto,
-                          copy_from=None, keep_copy_id=True):
+                          copy_from=None, keep_copy_id=True, storage=None):
         """
         Create/copy a new data array for this block. Either ``shape``
         or ``data`` must be given. If both are given their shape must agree.
@@ -190,6 +224,11 @@ class Block(Entity):
         :type copy_from: DataArray
         :param keep_copy_id: Specify if the id should be copied in copy mode
         :type keep_copy_id: bool
+        :param storage: Chunk shape and filters of the data. Defaults to the
+                        policy of the Block, or of the File if the Block has
+                        none. The compression of the policy is used if
+                        ``compression`` is Auto.
+        :type storage: :class:`~nixio.StoragePolicy`
 
         :returns: The newly created data array.
         :rtype: :class:`~nixio.DataArray`
@@ -220,14 +259,141 @@ class Block(Entity):
         data_arrays = self._h5group.open_group("data_arrays")
         if name in data_arrays:
             raise exceptions.DuplicateName("create_data_array")
+        if storage is None:
+            storage = self._storage_policy
+        if compression == Compression.Auto and storage is not None:
+            compression = storage.compression
         if compression == Compression.Auto:
             compression = self._compr
         da = DataArray._create_new(self, data_arrays, name, array_type,
-                                   dtype, shape, compression)
+                                   dtype, shape, compression, storage)
         if data is not None:
             da.write_direct(data)
         return da
 
+    def create_data_arrays(self, names, array_types="", dtypes=None,
+                           shapes=None, data=None, units=None, labels=None,
+                           dimensions=None, compression=Compression.Auto,
+                           storage=None):
+        """
+        Create many data arrays for this block in one call. Arrays that only
+        differ in their name and data are copied from the first one and all
+        arrays get the same creation time. For 1000 small arrays with a unit
+        and one dimension each, this is about four to five times faster than
+        calling create_data_array and the append dimension methods for each
+        array; the rest of the time is spent by HDF5 creating the groups,
+        datasets and attributes of each array.
+
+        Apart from ``names``, each argument is either a single value for all
+        arrays or a sequence with one value per array. For each array either
+        a shape or its data must be given, as for create_data_array.
+
+        :param names: The names of the data arrays to create.
+        :type names: list of str
+        :param array_types: The types of the data arrays.
+        :type array_types: str or list of str
+        :param dtypes: Which data-types to use for storage
+        :type dtypes: :class:`numpy.dtype` or list of :class:`numpy.dtype`
+        :param shapes: Layouts (dimensionality and extent)
+        :type shapes: tuple of int or list of tuples
+        :param data: The data of the arrays, either a sequence with one array
+                     per name or an array whose first axis runs over the
+                     names.
+        :type data: array-like data
+        :param units: The units of the data arrays.
+        :type units: str or list of str
+        :param labels: The labels of the data arrays.
+        :type labels: str or list of str
+        :param dimensions: The dimensions of the data arrays. Each dimension
+                           is described by a dict with a ``dimension_type``
+                           ("sample", "range" or "set", or a DimensionType)
+                           and the arguments of the corresponding append
+                           dimension method of DataArray, e.g.,
+                           ``{"dimension_type": "sample",
+                           "sampling_interval": 0.001, "unit": "s"}``.
+        :type dimensions: list of dict or list of lists of dict
+        :param compression: En-/disable dataset compression.
+        :type compression: :class:`~nixio.Compression`
+        :param storage: Chunk shape and filters of the data. Defaults to the
+                        policy of the Block, or of the File if the Block has
+                        none.
+        :type storage: :class:`~nixio.StoragePolicy`
+
+        :returns: The newly created data arrays.
+        :rtype: list of :class:`~nixio.DataArray`
+        """
+        names = list(names)
+        count = len(names)
+        types = _per_array(array_types, count, "array_types")
+        if data is None:
+            data = [None] * count
+        elif len(data) != count:
+            raise ValueError("The data must contain one array per name")
+        else:
+            data = list(data)
+        if (shapes is not None and
+                all(isinstance(n, Integral) for n in shapes)):
+            shapes = [tuple(shapes)] * count
+        else:
+            shapes = _per_array(shapes, count, "shapes")
+        dtypes = _per_array(dtypes, count, "dtypes")
+        units = _per_array(units, count, "units")
+        labels = _per_array(labels, count, "labels")
+        if not dimensions or isinstance(dimensions[0], dict):
+            dimensions = [dimensions or []] * count
+        elif len(dimensions) != count:
+            raise ValueError("dimensions must be given once or for each of "
+                             "the {} DataArrays".format(count))
+
+        data_arrays = self._h5group.open_group("data_arrays")
+        existing = set(data_arrays.group) if data_arrays.group else set()
+        if len(set(names)) != count or existing.intersection(names):
+            raise exceptions.DuplicateName("create_data_arrays")
+        attrs = list()
+        layouts = dict()
+        for idx in range(count):
+            util.check_entity_name_and_type(names[idx], types[idx])
+            shape, dtype = shapes[idx], dtypes[idx]
+            if data[idx] is None:
+                if shape is None:
+                    raise ValueError("Either shape and or data must not be "
+                                     "None")
+                if dtype is None:
+                    dtype = 'f8'
+            else:
+                data[idx] = np.ascontiguousarray(data[idx])
+                if dtype is None:
+                    dtype = data[idx].dtype
+                if shape is not None:
+                    if tuple(shape) != data[idx].shape:
+                        raise ValueError("Shape must equal data.shape")
+                else:
+                    shape = data[idx].shape
+            shapes[idx], dtypes[idx] = tuple(shape), dtype
+            unit = units[idx]
+            if unit:
+                unit = util.units.sanitizer(unit)
+            util.check_attr_type(unit or None, str)
+            util.check_attr_type(labels[idx], str)
+            attrs.append({"unit": unit or None, "label": labels[idx]})
+            dims = list()
+            for spec in dimensions[idx]:
+                # descriptions shared by all arrays are only checked once
+                if id(spec) not in layouts:
+                    layouts[id(spec)] = _dimension_layout(spec)
+                dims.append(layouts[id(spec)])
+            dimensions[idx] = dims
+
+        if storage is None:
+            storage = self._storage_policy
+        if compression == Compression.Auto and storage is not None:
+            compression = storage.compression
+        if compression == Compression.Auto:
+            compression = self._compr
+        return DataArray._create_batch(self, data_arrays, names, types,
+                                       dtypes, shapes, data, compression,
+                                       storage, attrs, dimensions)
+
     def create_data_frame(self, name="", type_="", col_dict=None,
                           col_names=None, col_dtypes=None, data=None,
                           compression=Compression.No,
@@ -340,6 +506,53 @@ class Block(Entity):
                 df.write_direct(arr)
         return df
 
+    def create_data_frame_from_pandas(self, name, type_, frame,
+                                      compression=Compression.No):
+        """
+        Create a new data frame for this block from a
+        :class:`pandas.DataFrame` or from an iterable of pandas DataFrames
+        with the same columns (e.g., from ``pandas.read_csv(...,
+        chunksize=...)``), which are appended one after the other. Units are
+        taken from ``frame.attrs["units"]``. Requires pandas.
+
+        :param name: The name of the data frame to create.
+        :type name: str
+        :param type_: The type of the data frame.
+        :type type_: str
+        :param frame: The data
+        :type frame: pandas.DataFrame or iterable of pandas.DataFrame
+        :param compression: En-/disable dataset compression.
+        :type compression: :class:`~nixio.Compression`
+
+        :returns: The newly created data frame.
+        :rtype: :class:`~nixio.DataFrame`
+        """
+        return _create_from_columns(self, name, type_, _pandas_chunks(frame),
+                                    compression)
+
+    def create_data_frame_from_arrow(self, name, type_, table,
+                                     compression=Compression.No):
+        """
+        Create a new data frame for this block from a :class:`pyarrow.Table`
+        or :class:`pyarrow.RecordBatch`, or from an iterable of them with the
+        same schema, which are appended one after the other. Units are taken
+        from the ``unit`` metadata of the fields. Requires pyarrow.
+
+        :param name: The name of the data frame to create.
+        :type name: str
+        :param type_: The type of the data frame.
+        :type type_: str
+        :param table: The data
+        :type table: pyarrow.Table or pyarrow.RecordBatch or iterable of them
+        :param compression: En-/disable dataset compression.
+        :type compression: :class:`~nixio.Compression`
+
+        :returns: The newly created data frame.
+        :rtype: :class:`~nixio.DataFrame`
+        """
+        return _create_from_columns(self, name, type_, _arrow_chunks(table),
+                                    compression)
+
     def find_sources(self, filtr=lambda _: True, limit=None):
         """
         Get all sources in this block recursively.
@@ -362,6 +575,77 @@ class Block(Entity):
             limit = maxint
         return finders._find_sources(self, filtr, limit)
 
+    def find_tags_in_range(self, data_array, start, stop, dimension=0):
+        """
+        Finds the Tags and MultiTags of the block that reference the given
+        DataArray and tag a region overlapping the range ``[start, stop]``
+        along one of its dimensions. Start and stop are given in the unit of
+        the dimension; tag positions in other units are scaled to it.
+
+        The positions of all tags referencing the DataArray are indexed when
+        this method is first called for it and the index is reused until the
+        tags of the block, their positions, extents, units or references, or
+        the dimension are modified.
+
+        :param data_array: The referenced DataArray.
+        :type data_array: DataArray
+        :param start: The start of the range.
+        :param stop: The stop of the range.
+        :param dimension: The index of the dimension of the DataArray along
+                          which the range is given.
+        :type dimension: int
+
+        :returns: A list of (tag, indices) tuples, in the order of the tags
+                  in the block, where indices is an array of the matching
+                  positions of the tag (always [0] for a Tag).
+        :rtype: list of tuple
+        """
+        def build():
+            return self._tag_intervals(data_array, dimension)
+
+        key = ("tags", data_array.id, dimension)
+        index, owners, posidx, tags = h5cache.derived(
+            self._h5group.group, key, build
+        )
+        hits = index.overlapping(start, stop)
+        if not len(hits):
+            return []
+        owners, posidx = owners[hits], posidx[hits]
+        bounds = np.flatnonzero(np.diff(owners)) + 1
+        result = list()
+        for first, last in zip(np.r_[0, bounds], np.r_[bounds, len(hits)]):
+            container, id_ = tags[owners[first]]
+            tag = getattr(self, container)[id_]
+            result.append((tag, posidx[first:last]))
+        return result
+
+    def _tag_intervals(self, data_array, dimension):
+        dim = data_array.dimensions[dimension]
+        starts, stops, owners, posidx = list(), list(), list(), list()
+        tags = list()
+        for container in ("tags", "multi_tags"):
+            for tag in getattr(self, container):
+                if data_array.id not in tag.references:
+                    continue
+                intervals = tag._intervals(dimension)
+                if intervals is None:
+                    continue
+                units = tag.units
+                unit = units[dimension] if dimension < len(units) else None
+                scaling = tag._unit_scaling(unit, dim)
+                tstarts, tstops = intervals
+                starts.append(tstarts * scaling)
+                stops.append(tstops * scaling)
+                owners.append(np.full(len(tstarts), len(tags), np.int64))
+                posidx.append(np.arange(len(tstarts), dtype=np.int64))
+                tags.append((container, tag.id))
+        if not tags:
+            empty = np.empty(0)
+            return (IntervalIndex(empty, empty), empty.astype(np.int64),
+                    empty.astype(np.int64), tags)
+        return (IntervalIndex(np.concatenate(starts), np.concatenate(stops)),
+                np.concatenate(owners), np.concatenate(posidx), tags)
+
     def pprint(self, indent=2, max_length=120, extra=True, start_depth=0):
         """
         Pretty Printing the Data and MetaData Tree of the whole File
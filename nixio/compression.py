@@ -13,3 +13,6 @@ class Compression(Enum):
     No = "None"
     DeflateNormal = "DeflateNormal"
     Auto = "Auto"
+    DeflateFast = "DeflateFast"
+    DeflateBest = "DeflateBest"
+    LZF = "LZF"
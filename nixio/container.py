@@ -1,3 +1,5 @@
+from numbers import Integral
+
 from .entity import Entity
 try:
     from collections.abc import Iterable
@@ -36,12 +38,17 @@ class Container(object):
         return len(self._backend)
 
     def __getitem__(self, item):
-        if isinstance(item, int):
+        if isinstance(item, slice):
+            names = self._backend.child_names()[item]
+            return [self._inst_item(self._backend.get_by_name(name))
+                    for name in names]
+        if isinstance(item, Integral):
+            names = self._backend.child_names()
             if item < 0:
-                item = len(self) + item
-            if item < 0 or item >= len(self):
+                item = len(names) + item
+            if item < 0 or item >= len(names):
                 raise IndexError("Index out of bounds: {}".format(item))
-            item = self._backend.get_by_pos(item)
+            item = self._backend.get_by_name(names[item])
         else:
             item = self._backend.get_by_id_or_name(item)
         return self._inst_item(item)
@@ -211,7 +218,7 @@ class LinkContainer(Container):
             self.append(item)
 
     def __getitem__(self, identifier):
-        if isinstance(identifier, int):
+        if isinstance(identifier, (Integral, slice)):
             return super(LinkContainer, self).__getitem__(identifier)
         else:
             if util.is_uuid(identifier):
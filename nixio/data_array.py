@@ -19,6 +19,7 @@ from .dimensions import (Dimension, SampledDimension, RangeDimension,
                          SetDimension, DimensionType, DimensionContainer)
 from . import util
 from .compression import Compression
+from .storage import StoragePolicy
 
 from .exceptions import InvalidUnit
 from .section import Section
@@ -38,15 +39,96 @@ class DataArray(Entity, DataSet):
 
     @classmethod
     def _create_new(cls, nixparent, h5parent, name, type_, data_type, shape,
-                    compression):
+                    compression, storage=None):
+        if compression == Compression.Auto:
+            compression = Compression.No
+        if storage is None:
+            storage = StoragePolicy()
+        dsargs = storage.dataset_args(shape, data_type)
+        if dsargs["chunks"] is None and compression != Compression.No:
+            raise ValueError("Contiguous data cannot be compressed")
         newentity = super(DataArray, cls)._create_new(nixparent, h5parent,
                                                       name, type_)
-        datacompr = False
-        if compression == Compression.DeflateNormal:
-            datacompr = True
-        newentity._h5group.create_dataset("data", shape, data_type, datacompr)
+        newentity._h5group.create_dataset("data", shape, data_type,
+                                          compression, **dsargs)
         return newentity
 
+    @classmethod
+    def _create_batch(cls, nixparent, h5parent, names, types, dtypes, shapes,
+                      data, compression, storage, attrs, dimensions):
+        """
+        Creates several DataArrays at once. The groups and attributes are
+        written through the batch methods of the backend, all arrays get the
+        same time stamps and arrays with the same shape and dtype reuse the
+        dataset layout of the first one. Arrays that only differ from an
+        earlier one in their name and data are created as copies of it.
+        """
+        if compression == Compression.Auto:
+            compression = Compression.No
+        if storage is None:
+            storage = StoragePolicy()
+        layouts = dict()
+        for dtype, shape in zip(dtypes, shapes):
+            key = (dtype, tuple(shape))
+            if key not in layouts:
+                dsargs = storage.dataset_args(shape, dtype)
+                if (dsargs["chunks"] is None and
+                        compression != Compression.No):
+                    raise ValueError("Contiguous data cannot be compressed")
+                layouts[key] = dsargs
+
+        stamp = util.time_to_str(util.now_int())
+        templates = dict()
+        copies = dict()
+        h5groups = list()
+        for idx, name in enumerate(names):
+            entity_attrs = {"name": name, "entity_id": util.create_id()}
+            key = (types[idx], dtypes[idx], tuple(shapes[idx]),
+                   tuple(sorted(attrs[idx].items())),
+                   tuple(id(dim) for dim in dimensions[idx]))
+            if key in copies:
+                # arrays that only differ in their name, ID and data are
+                # copies of the first one
+                h5group = h5parent.create_copies(copies[key], [name])[0]
+                h5group.set_attrs(entity_attrs)
+                h5groups.append(h5group)
+                continue
+            h5group = h5parent.create_groups([name])[0]
+            entity_attrs.update(type=types[idx], created_at=stamp,
+                                updated_at=stamp)
+            entity_attrs.update(attrs[idx])
+            h5group.set_attrs(entity_attrs)
+
+            layout = (dtypes[idx], tuple(shapes[idx]))
+            if layout in templates:
+                h5group.create_dataset_like("data", templates[layout],
+                                            shapes[idx])
+            else:
+                dataset = h5group.create_dataset("data", shapes[idx],
+                                                 dtypes[idx], compression,
+                                                 **layouts[layout])
+                if shapes[idx]:
+                    templates[layout] = dataset
+
+            if dimensions[idx]:
+                dimgroup = h5group.create_groups(["dimensions"])[0]
+                dimnames = [str(i + 1) for i in range(len(dimensions[idx]))]
+                for dimgrp, (dimattrs, datasets) in zip(
+                        dimgroup.create_groups(dimnames), dimensions[idx]):
+                    dimgrp.set_attrs(dimattrs)
+                    for dsname, (values, dtype) in datasets.items():
+                        dimgrp.write_data(dsname, values, dtype=dtype)
+            copies[key] = h5group
+            h5groups.append(h5group)
+
+        # the data is written last, so that it is not copied
+        entities = list()
+        for h5group, values in zip(h5groups, data):
+            if values is not None:
+                h5group.get_dataset("data").write_data(values)
+            entities.append(cls(nixparent, h5group))
+        return entities
+
     def _read_data(self, sl=None):
         coeff = self.polynom_coefficients
         origin = self.expansion_origin
@@ -280,9 +362,10 @@ class DataArray(Entity, DataSet):
         if u == "":
             u = None
         util.check_attr_type(u, str)
-        if (self._dimension_count() == 1 and
-            self.dimensions[0].dimension_type == DimensionType.Range and
-                self.dimensions[0].is_alias and u is not None):
+        # only units that are set need to be checked against the dimensions
+        if (u is not None and self._dimension_count() == 1 and
+                self.dimensions[0].dimension_type == DimensionType.Range and
+                self.dimensions[0].is_alias):
             if not (util.units.is_si(u) or util.units.is_compound(u)):
                 raise InvalidUnit(
                     "[{}]: Non-SI units are not allowed if the DataArray "
@@ -293,6 +376,41 @@ class DataArray(Entity, DataSet):
         if self._parent._parent.time_auto_update:
             self.force_updated_at()
 
+    def as_memmap(self):
+        """
+        Returns the data as a read-only :class:`numpy.memmap` of the file,
+        so that the data is not copied into memory, but read by the operating
+        system as it is accessed. Only data that is stored contiguously and
+        uncompressed can be mapped (see
+        :meth:`~nixio.StoragePolicy.contiguous`). For other data, and for
+        data with calibration coefficients, the data is read into a new
+        array instead.
+
+        :returns: The data
+        :rtype: :class:`numpy.memmap` or :class:`numpy.ndarray`
+        """
+        if not (self.polynom_coefficients or self.expansion_origin):
+            mapped = self._h5group.get_dataset("data").memmap()
+            if mapped is not None:
+                return mapped
+        return self._read_data()
+
+    def view(self, index):
+        """
+        Returns a lazy :class:`~nixio.data_view.DataView` of the data selected
+        by ``index``. The index can contain integers, slices (with steps),
+        integer and boolean arrays and an Ellipsis. No data is read until the
+        view is indexed or converted to an array, and then only the selected
+        data is read, e.g., ``da.view(np.s_[::10])[:]`` reads every tenth
+        value.
+
+        :param index: The selection
+
+        :returns: The view of the selected data
+        :rtype: DataView
+        """
+        return DataView(self, ()).view(index)
+
     def get_slice(self, positions, extents=None, mode=DataSliceMode.Index):
         datadim = len(self.shape)
         if not len(positions) == datadim:
@@ -320,8 +438,9 @@ class DataArray(Entity, DataSet):
         for dim, pos, ext in zip(self.dimensions, positions, extents):
             if dim.dimension_type in (DimensionType.Sample,
                                       DimensionType.Range):
-                dpos.append(dim.index_of(pos))
-                dext.append(dim.index_of(pos+ext)-dpos[-1])
+                start, stop = dim.index_of((pos, pos+ext))
+                dpos.append(int(start))
+                dext.append(int(stop - start))
             elif dim.dimension_type == DimensionType.Set:
                 dpos.append(int(pos))
                 dext.append(int(ext))
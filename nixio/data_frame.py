@@ -13,17 +13,183 @@ except ImportError:
     from collections import Iterable, Sequence
 from collections import OrderedDict
 from inspect import isclass
+from numbers import Integral, Real
 import numpy as np
 from .exceptions import OutOfBounds
 from .entity import Entity
 from . import util
 from .data_set import DataSet
 from .datatype import DataType
+from .compression import Compression
+from .util import query as rowquery
 from .section import Section
 from six import string_types
 import csv
 
 
+DEFAULT_QUERY_ROWS = 65536
+# HDF5 attributes are limited to 64 KiB; keep the statistics well below that
+MAX_STATISTICS_BLOCKS = 2048
+
+
+def _column_array(column):
+    # columns of variable length strings are converted to string arrays
+    if column.dtype.hasobject:
+        return np.array(column.tolist())
+    return column
+
+
+def _import_pandas():
+    try:
+        import pandas
+    except ImportError:
+        raise ImportError("Converting DataFrames to and from pandas "
+                          "requires the pandas package")
+    return pandas
+
+
+def _import_arrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Converting DataFrames to and from Arrow "
+                          "requires the pyarrow package")
+    return pyarrow
+
+
+def _export_column(column):
+    # each column gets its own contiguous array; strings are decoded
+    if column.dtype.hasobject:
+        return np.array([v.decode() if isinstance(v, bytes) else v
+                         for v in column], dtype=object)
+    return np.ascontiguousarray(column)
+
+
+def _object_column(name, column):
+    """
+    Converts a column of Python objects into an array of strings, bools,
+    integers or floats, depending on its values. Raises a TypeError if the
+    values are of different kinds or not of one of these.
+    """
+    values = column.tolist()
+    kinds = set()
+    for value in values:
+        if isinstance(value, (bool, np.bool_)):
+            kinds.add("b")
+        elif isinstance(value, Integral):
+            kinds.add("i")
+        elif isinstance(value, Real):
+            kinds.add("f")
+        elif isinstance(value, string_types + (bytes, )):
+            kinds.add("S")
+        else:
+            kinds.add(type(value).__name__)
+    if not kinds or kinds == {"S"}:
+        return column
+    if kinds == {"b"}:
+        return np.array(values, dtype=bool)
+    if kinds == {"i"}:
+        return np.array(values, dtype=np.int64)
+    if kinds <= {"i", "f"}:
+        return np.array(values, dtype=np.float64)
+    raise TypeError("Column '{}' holds values of different or unsupported "
+                    "types ({})".format(name, ", ".join(sorted(kinds))))
+
+
+def _import_columns(names, columns):
+    """
+    Builds the compound data of a DataFrame from columns given as numpy
+    arrays. Columns of Python objects get the type of their values; strings
+    are stored as variable length strings.
+    """
+    columns = [_object_column(name, col) if col.dtype.hasobject else col
+               for name, col in zip(names, columns)]
+    dtypes = [util.vlen_str_dtype if col.dtype.hasobject or
+              col.dtype.kind in "SU" else col.dtype for col in columns]
+    data = np.empty(len(columns[0]) if columns else 0,
+                    dtype=list(zip(names, dtypes)))
+    for name, col in zip(names, columns):
+        if col.dtype.kind == "S":
+            col = np.char.decode(col)
+        data[name] = col
+    return OrderedDict(zip(names, dtypes)), data
+
+
+def _create_from_columns(block, name, type_, chunks, compression):
+    """
+    Creates a DataFrame from an iterable of (names, columns, units) chunks;
+    the first creates the DataFrame, the others are appended.
+    """
+    df = None
+    for names, columns, units in chunks:
+        col_dict, data = _import_columns(names, columns)
+        if df is None:
+            df = block.create_data_frame(
+                name, type_, col_dict=col_dict,
+                data=data if len(data) else None, compression=compression
+            )
+            if any(units):
+                df.units = [u or "" for u in units]
+        elif len(data):
+            df.append(data)
+    return df
+
+
+def _pandas_column(series):
+    """
+    Converts a pandas column into a numpy array. Columns of nullable types
+    (e.g., Int64, boolean) get the corresponding numpy type. Missing values
+    become NaN in floating point columns; other columns cannot hold them
+    and raise a TypeError.
+    """
+    dtype = getattr(series.dtype, "numpy_dtype", None)
+    if dtype is None:
+        return series.to_numpy()
+    if series.hasnans:
+        if dtype.kind != "f":
+            raise TypeError("Column '{}' has missing values, which a column "
+                            "of type {} cannot hold".format(series.name,
+                                                           dtype))
+        return series.to_numpy(dtype=dtype, na_value=np.nan)
+    return series.to_numpy(dtype=dtype)
+
+
+def _pandas_chunks(frame):
+    """
+    Yields the (names, columns, units) chunks of a :class:`pandas.DataFrame`
+    or of an iterable of them; units are taken from ``frame.attrs["units"]``.
+    """
+    pd = _import_pandas()
+    if isinstance(frame, pd.DataFrame):
+        frame = [frame]
+    for fr in frame:
+        names = [str(n) for n in fr.columns]
+        columns = [_pandas_column(fr[c]) for c in fr.columns]
+        units = fr.attrs.get("units", dict())
+        yield names, columns, [units.get(n) for n in names]
+
+
+def _arrow_chunks(table):
+    """
+    Yields the (names, columns, units) chunks of a :class:`pyarrow.Table` or
+    :class:`pyarrow.RecordBatch` or of an iterable of them; units are taken
+    from the ``unit`` metadata of the fields.
+    """
+    pa = _import_arrow()
+    if isinstance(table, (pa.Table, pa.RecordBatch)):
+        table = [table]
+    for tab in table:
+        names, units = list(), list()
+        for field in tab.schema:
+            names.append(str(field.name))
+            unit = (field.metadata or dict()).get(b"unit")
+            units.append(unit.decode() if unit else None)
+        columns = [col.to_numpy(zero_copy_only=False)
+                   if isinstance(col, pa.Array) else
+                   col.to_numpy() for col in tab.columns]
+        yield names, columns, units
+
+
 class DataFrame(Entity, DataSet):
 
     def __init__(self, nixparent, h5group):
@@ -61,20 +227,18 @@ class DataFrame(Entity, DataSet):
         if isclass(datatype) and any(issubclass(datatype, st)
                                      for st in string_types):
             datatype = util.vlen_str_dtype
-        dt_arr = [(n, dty) for n, dty in zip(self.column_names, self.dtype)]
-        dt_arr.append((name, datatype))
-        dt = np.dtype(dt_arr)
-        column = np.array(column, dtype=datatype)
-        new_da = []
-        for i, rows in enumerate(self._h5group.group['data'][:]):
-            li = list(rows)
-            li.append(column[i])
-            tu = tuple(li)
-            new_da.append(tu)
-        farr = np.ascontiguousarray(new_da, dtype=dt)
-        del self._h5group.group['data']
-        self._h5group.group['data'] = farr
-        self._h5group.create_dataset("data", (self.shape[0],), dt)
+        fields = self._h5group.group["data"].dtype.fields
+        dt = np.dtype([(n, fields[n][0]) for n in self.column_names] +
+                      [(name, datatype)])
+        # copy the existing columns field by field and replace the dataset
+        # in a single write
+        data = self._read_data()
+        farr = np.empty(len(data), dtype=dt)
+        for n in self.column_names:
+            farr[n] = data[n]
+        farr[name] = column
+        del self._h5group.group["data"]
+        self._h5group.create_dataset("data", (len(farr),), dt)
         self.write_direct(farr)
 
     def append_rows(self, data):
@@ -105,15 +269,15 @@ class DataFrame(Entity, DataSet):
         """
         if len(column) != self.shape[0]:
             raise ValueError('If there are missing data, please fill in None')
-        if not index and not name:
+        if index is None and name is None:
             raise ValueError("Either index or name must not be None")
         if name is None:
             name = self._find_name_by_idx(index)
-        column = np.array(column)
-        for i, rows in enumerate(self._h5group.group['data'][:]):
-            cell = column[i]
-            rows[name] = cell
-            self.write_rows(rows=[rows], index=[i])
+        # write only the column's field of all rows in one hyperslab
+        fielddt = self._h5group.group["data"].dtype.fields[name][0]
+        values = np.empty(len(column), dtype=[(name, fielddt)])
+        values[name] = column
+        self._write_data(values, sl=(slice(None), name))
 
     def read_columns(self, index=None, name=None, sl=None,
                      group_by_cols=False):
@@ -134,27 +298,19 @@ class DataFrame(Entity, DataSet):
         if index is None and name is None:
             raise ValueError("Either index or name must not be None")
         if name is None:
-            name = []
-            for ci in index:
-                name.append(self.column_names[ci])
+            name = [self.column_names[ci] for ci in index]
+        name = [str(n) for n in name]
         if sl is None:
             slic = np.s_[:]
         else:
             slic = np.s_[sl]
+        # read only the requested fields, in a single read
+        data = self._read_data(sl=(slic, ) + tuple(name))
         if len(name) == 1:
-            get_col = self._read_data(sl=slic)[name]
-            get_col = [i[0] for i in get_col]
-            return np.array(get_col)
+            return _column_array(data)
         if group_by_cols:
-            gcol = []
-            for n in name:
-                get_col = self._read_data(sl=slic)[n]
-                get_col = [i for i in get_col]
-                gcol.append(get_col)
-            return np.array(gcol)
-        else:
-            get_col = self._read_data(sl=slic)[name]
-            return get_col
+            return np.array([_column_array(data[n]) for n in name])
+        return data
 
     def write_rows(self, rows, index):
         """
@@ -296,6 +452,231 @@ class DataFrame(Entity, DataSet):
         count = len(self)
         return count
 
+    def to_pandas(self, sl=None):
+        """
+        Read the DataFrame (or the rows selected by ``sl``) into a
+        :class:`pandas.DataFrame`. The data is read with a single read and
+        each column is copied once. The units of the columns are stored in
+        the ``attrs["units"]`` dictionary of the pandas DataFrame.
+        Requires pandas.
+
+        :param sl: The rows to read; None for all rows
+        :type sl: slice or iterable of int
+
+        :returns: The data
+        :rtype: :class:`pandas.DataFrame`
+        """
+        data = self._read_data(sl)
+        start = 0
+        if isinstance(sl, slice):
+            start = sl.indices(len(self))[0]
+        return self._pandas_frame(data, start)
+
+    def iter_pandas(self, chunksize):
+        """
+        Read the DataFrame in chunks of ``chunksize`` rows, e.g., for tables
+        that do not fit into memory. The next chunk is read while the
+        current one is being processed. Requires pandas.
+
+        :param chunksize: Number of rows in each chunk
+        :type chunksize: int
+
+        :returns: A generator of :class:`pandas.DataFrame`
+        """
+        _import_pandas()
+        for idx, data in enumerate(self.read_blocks(chunksize)):
+            yield self._pandas_frame(data, idx * chunksize)
+
+    def _pandas_frame(self, data, start=0):
+        pd = _import_pandas()
+        names = self.column_names
+        columns = OrderedDict((n, _export_column(data[n])) for n in names)
+        index = pd.RangeIndex(start, start + len(data))
+        frame = pd.DataFrame(columns, index=index, copy=False)
+        units = self.units
+        if units is not None:
+            frame.attrs["units"] = OrderedDict(
+                (n, u) for n, u in zip(names, units) if u
+            )
+        return frame
+
+    def to_arrow(self, sl=None):
+        """
+        Read the DataFrame (or the rows selected by ``sl``) into a
+        :class:`pyarrow.Table`. The units of the columns are stored in the
+        metadata of the fields of the schema under ``unit``.
+        Requires pyarrow.
+
+        :param sl: The rows to read; None for all rows
+        :type sl: slice or iterable of int
+
+        :returns: The data
+        :rtype: :class:`pyarrow.Table`
+        """
+        pa = _import_arrow()
+        return pa.Table.from_batches([self._arrow_batch(self._read_data(sl))])
+
+    def iter_arrow(self, chunksize):
+        """
+        Read the DataFrame in chunks of ``chunksize`` rows, e.g., for tables
+        that do not fit into memory. Requires pyarrow.
+
+        :param chunksize: Number of rows in each chunk
+        :type chunksize: int
+
+        :returns: A generator of :class:`pyarrow.RecordBatch`
+        """
+        _import_arrow()
+        for data in self.read_blocks(chunksize):
+            yield self._arrow_batch(data)
+
+    def _arrow_batch(self, data):
+        pa = _import_arrow()
+        names = self.column_names
+        units = self.units
+        if units is None:
+            units = [None] * len(names)
+        arrays, fields = list(), list()
+        for n, u in zip(names, units):
+            arr = pa.array(_export_column(data[n]))
+            arrays.append(arr)
+            fields.append(pa.field(n, arr.type,
+                                   metadata={"unit": u} if u else None))
+        return pa.RecordBatch.from_arrays(arrays, schema=pa.schema(fields))
+
+    def _write_data(self, data, sl=None):
+        self._drop_statistics()
+        super(DataFrame, self)._write_data(data, sl)
+
+    def compute_statistics(self, rows=DEFAULT_QUERY_ROWS):
+        """
+        Compute the minimum and maximum of each numeric column for blocks of
+        ``rows`` rows and store them with the DataFrame. Queries use them to
+        skip blocks that cannot contain matching rows. The statistics are
+        dropped when the DataFrame is written to. For large DataFrames the
+        block size is increased to limit the size of the statistics.
+
+        :param rows: The number of rows in each block
+        :type rows: int
+        """
+        count = len(self)
+        rows = max(int(rows), -(-count // MAX_STATISTICS_BLOCKS), 1)
+        fields = self._h5group.group["data"].dtype.fields
+        names = [n for n in self.column_names
+                 if fields[n][0].kind in "iuf"]
+        self._drop_statistics()
+        if not names or not count:
+            return
+        statdt = [(n, fields[n][0]) for n in names]
+        nblocks = -(-count // rows)
+        mins = np.empty(nblocks, dtype=statdt)
+        maxs = np.empty(nblocks, dtype=statdt)
+        for idx, start in enumerate(range(0, count, rows)):
+            data = self._read_data(sl=(slice(start, start+rows), ) +
+                                   tuple(names))
+            for n in names:
+                col = data[n] if len(names) > 1 else data
+                if col.dtype.kind == "f":
+                    with np.errstate(invalid="ignore"):
+                        mins[n][idx] = np.fmin.reduce(col)
+                        maxs[n][idx] = np.fmax.reduce(col)
+                else:
+                    mins[n][idx] = col.min()
+                    maxs[n][idx] = col.max()
+        dataset = self._h5group.get_dataset("data")
+        dataset.set_attr("statistics_min", mins)
+        dataset.set_attr("statistics_max", maxs)
+        dataset.set_attr("statistics_rows", (rows, count))
+
+    def _statistics(self):
+        dataset = self._h5group.get_dataset("data")
+        rowinfo = dataset.get_attr("statistics_rows")
+        if rowinfo is None or rowinfo[1] != len(self):
+            return None
+        return (int(rowinfo[0]), dataset.get_attr("statistics_min"),
+                dataset.get_attr("statistics_max"))
+
+    def _drop_statistics(self):
+        dataset = self._h5group.get_dataset("data")
+        if dataset.get_attr("statistics_rows") is not None:
+            for name in ("statistics_rows", "statistics_min",
+                         "statistics_max"):
+                dataset.set_attr(name, None)
+
+    def where(self, conditions, chunksize=None):
+        """
+        Return the indices of the rows that match all the given conditions.
+        Each condition is a tuple ``(column, op, value)``, where ``op`` is one
+        of ``==, !=, <, <=, >, >=, in, not in``, e.g.,
+        ``df.where([("trial_type", "==", "go"), ("rt", "<", 0.5)])``.
+        See :meth:`~nixio.DataFrame.query`.
+
+        :param conditions: The conditions
+        :type conditions: list of tuples
+        :param chunksize: Number of rows evaluated at once
+
+        :returns: The indices of the matching rows
+        :rtype: numpy.ndarray of int
+        """
+        return self._select(rowquery.conditions(conditions), chunksize)
+
+    def query(self, expr, chunksize=None):
+        """
+        Return the indices of the rows that match the query expression, e.g.,
+        ``df.query("trial_type == 'go' and rt < 0.5")``. Expressions compare
+        columns with constants using ``==, !=, <, <=, >, >=, in, not in``
+        and combine comparisons with ``and``, ``or``, ``not``.
+
+        The rows are evaluated block by block and only the columns used in
+        the expression are read. If statistics were stored with
+        :meth:`~nixio.DataFrame.compute_statistics`, blocks that cannot
+        contain matching rows are not read at all. The matching rows can be
+        read with :meth:`~nixio.DataFrame.read_rows`.
+
+        :param expr: The query
+        :type expr: str
+        :param chunksize: Number of rows evaluated at once; defaults to the
+                          block size of the statistics
+        :type chunksize: int
+
+        :returns: The indices of the matching rows
+        :rtype: numpy.ndarray of int
+        """
+        return self._select(rowquery.parse(expr), chunksize)
+
+    def _select(self, pred, chunksize=None):
+        names = rowquery.fields(pred)
+        for n in names:
+            if n not in self.column_names:
+                raise ValueError("Unknown column {}".format(n))
+        count = len(self)
+        stats = self._statistics()
+        if stats is not None and chunksize in (None, stats[0]):
+            rows, mins, maxs = stats
+            statnames = mins.dtype.names
+        else:
+            rows = chunksize or DEFAULT_QUERY_ROWS
+            statnames = None
+
+        hits = [np.empty(0, dtype=np.int64)]
+        for idx, start in enumerate(range(0, count, rows)):
+            if statnames and rowquery.can_skip(
+                    pred, dict(zip(statnames, mins[idx])),
+                    dict(zip(statnames, maxs[idx]))):
+                continue
+            size = min(rows, count - start)
+            columns = dict()
+            if names:
+                data = self._read_data(sl=(slice(start, start+rows), ) +
+                                       tuple(names))
+                if len(names) == 1:
+                    columns = {names[0]: data}
+                else:
+                    columns = dict((n, data[n]) for n in names)
+            mask = rowquery.evaluate(pred, columns, size)
+            hits.append(np.flatnonzero(mask) + start)
+        return np.concatenate(hits)
+
     def write_to_csv(self, filename, mode='w'):
         """
         Export the whole DataFrame to a CSV file
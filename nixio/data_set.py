@@ -6,8 +6,13 @@
 # Redistribution and use in source and binary forms, with or without
 # modification, are permitted under the terms of the BSD License. See
 # LICENSE file in the root of the Project.
+from collections import deque
+from multiprocessing.pool import ThreadPool
+
 import numpy as np
 
+from .stream_writer import StreamWriter, DEFAULT_BUFFER_BYTES
+
 
 class DataSet(object):
     """
@@ -116,6 +121,67 @@ class DataSet(object):
         sl = tuple(slice(o, c+o) for o, c in zip(offset, count))
         self._write_data(data, sl)
 
+    def stream_writer(self, axis=0, buffer_bytes=DEFAULT_BUFFER_BYTES):
+        """
+        Returns a :class:`~nixio.stream_writer.StreamWriter` for appending
+        many small blocks of data along the ``axis`` specified. Appended data
+        is buffered in memory and written in large pieces, and the dataset
+        is resized rarely. This is much faster than calling
+        :meth:`~nixio.data_set.DataSet.append` for each block. The writer
+        should be used as a context manager, or closed when done, which
+        writes the remaining data and trims the dataset to its final size.
+
+        The writer can be used for any DataArray, e.g., the positions and
+        extents of a MultiTag, and for the rows of a DataFrame.
+
+        :param axis: Along which axis to append the data to
+        :param buffer_bytes: Size of the write buffer in bytes
+
+        :returns: The writer
+        :rtype: :class:`~nixio.stream_writer.StreamWriter`
+        """
+        return StreamWriter(self, axis, buffer_bytes)
+
+    def read_blocks(self, size, axis=0, readahead=1):
+        """
+        Reads the data in consecutive blocks of ``size`` entries along the
+        ``axis`` specified, e.g., for scanning through a long recording. The
+        next ``readahead`` blocks are read in the background while a block is
+        being processed.
+
+        :param size: Number of entries along the axis in each block
+        :param axis: Along which axis to read the blocks
+        :param readahead: Number of blocks to read ahead (0 reads each block
+                          when it is requested)
+
+        :returns: A generator of the blocks
+        """
+        if size < 1:
+            raise ValueError("Block size must be positive")
+        ndim = len(self.shape)
+
+        def read(start):
+            sl = tuple(slice(start, start+size) if i == axis else slice(None)
+                       for i in range(ndim))
+            return self._read_data(sl)
+
+        starts = range(0, self.shape[axis], size)
+        if not readahead:
+            for start in starts:
+                yield read(start)
+            return
+        pool = ThreadPool(1)
+        try:
+            pending = deque()
+            for start in starts:
+                pending.append(pool.apply_async(read, (start, )))
+                if len(pending) > readahead:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+        finally:
+            pool.terminate()
+
     @staticmethod
     def __index_to_tuple(index):
         tidx = type(index)
@@ -7,29 +7,97 @@
 # modification, are permitted under the terms of the BSD License. See
 # LICENSE file in the root of the Project.
 import numpy as np
-try:
-    from collections.abc import Iterable
-except ImportError:
-    from collections import Iterable
+from numbers import Integral
 from .data_set import DataSet
 from .exceptions import OutOfBounds
 
 
+def _count(start, stop, step):
+    if step > 0:
+        return max(0, (stop - start + step - 1) // step)
+    return max(0, (start - stop - step - 1) // -step)
+
+
+class _Stride(object):
+    """
+    The indices ``start, start + step, ...`` of ``length`` elements along one
+    dimension of the data. Works like a slice of a python 3 range.
+    """
+
+    def __init__(self, start, step, length):
+        self.start = start
+        self.step = step
+        self.length = length
+
+    @classmethod
+    def from_slice(cls, sl, extent):
+        start, stop, step = sl.indices(extent)
+        return cls(start, step, _count(start, stop, step))
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(self.length)
+            return _Stride(self.start + start * self.step, self.step * step,
+                           _count(start, stop, step))
+        if idx < 0:
+            idx += self.length
+        return self.start + idx * self.step
+
+    def to_slice(self):
+        """
+        The increasing slice selecting the same elements and whether the
+        elements are in reverse order.
+        """
+        if not self.length:
+            return slice(0, 0), False
+        first, last = self.start, self.start + (self.length - 1) * self.step
+        if self.step < 0:
+            return slice(last, first + 1, -self.step), True
+        return slice(first, last + 1, self.step), False
+
+
 class DataView(DataSet):
+    """
+    A lazy view on the data of a DataArray. The view stores, for each
+    dimension of the DataArray, which indices it selects: a single index, a
+    range of indices with a step, or an array of indices. Indexing the view
+    reads only the selected data from the file. Views on views are created
+    with :meth:`~nixio.data_view.DataView.view`, which combines the
+    selections without reading any data.
+
+    Integer and boolean arrays select along a single dimension each. When
+    arrays are given for more than one dimension, they select independently
+    of each other (like :class:`h5py.Dataset`), not pointwise as in numpy.
+    """
 
     def __init__(self, da, sl):
         self.array = da
         self._h5group = self.array._h5group
-        self._slice = sl
 
-        if any(s.stop > e for s, e in zip(sl, self.array.data_extent)):
+        extent = self.array.data_extent
+        if any(s.stop is not None and s.stop > e for s, e in zip(sl, extent)):
             raise OutOfBounds(
                 "Trying to create DataView which is out of bounds"
             )
+        self._index = (tuple(_Stride.from_slice(s, e)
+                             for s, e in zip(sl, extent)) +
+                       tuple(_Stride(0, 1, e) for e in extent[len(sl):]))
+
+    @classmethod
+    def _from_index(cls, da, index):
+        view = cls.__new__(cls)
+        view.array = da
+        view._h5group = da._h5group
+        view._index = index
+        return view
 
     @property
     def data_extent(self):
-        return tuple(s.stop - s.start for s in self._slice)
+        return tuple(len(idx) for idx in self._index
+                     if not isinstance(idx, Integral))
 
     @data_extent.setter
     def data_extent(self, v):
@@ -39,51 +107,155 @@ class DataView(DataSet):
     def data_type(self):
         return self.array.data_type
 
-    def _write_data(self, data, count, offset):
-        if not count:
-            count = self._count
-        offset = self._transform_coordinates(count, offset)
-        return super(DataView, self)._write_data(data, count, offset)
+    def view(self, index):
+        """
+        Returns a new DataView of the data selected by ``index`` from this
+        view. The index can contain integers, slices (with steps), integer
+        and boolean arrays and an Ellipsis. No data is read from the file.
+
+        :param index: The selection, relative to this view
+
+        :returns: The view of the selected data
+        :rtype: DataView
+        """
+        return DataView._from_index(self.array, self._compose(index))
+
+    def _compose(self, index):
+        if not isinstance(index, tuple):
+            index = (index, )
+        ndim = len(self.data_extent)
+        if any(idx is None for idx in index):
+            raise IndexError("Adding new axes is not supported")
+        if sum(idx is Ellipsis for idx in index) > 1:
+            raise IndexError("An index can only have a single Ellipsis")
+        if any(idx is Ellipsis for idx in index):
+            pos = [idx is Ellipsis for idx in index].index(True)
+            fill = (slice(None), ) * (ndim - len(index) + 1)
+            index = index[:pos] + fill + index[pos+1:]
+        if len(index) > ndim:
+            raise IndexError("Too many indices for DataView")
+        index = iter(index + (slice(None), ) * (ndim - len(index)))
+
+        composed = list()
+        for current in self._index:
+            if isinstance(current, Integral):
+                composed.append(current)
+            else:
+                composed.append(self._compose_dim(current, next(index)))
+        return tuple(composed)
+
+    @staticmethod
+    def _compose_dim(current, idx):
+        length = len(current)
+        if isinstance(idx, (Integral, np.integer)):
+            if not -length <= idx < length:
+                raise OutOfBounds("Index {} is out of bounds for dimension "
+                                  "with size {}".format(idx, length))
+            return int(current[idx])
+        if isinstance(idx, slice):
+            return current[idx]
+
+        try:
+            idx = np.asarray(idx)
+        except Exception:
+            raise IndexError("Unsupported index")
+        if idx.ndim != 1:
+            raise IndexError("Index arrays must be one dimensional")
+        if idx.dtype == bool:
+            if len(idx) != length:
+                raise IndexError("Boolean index of size {} does not match "
+                                 "dimension with size {}".format(len(idx),
+                                                                 length))
+            idx = np.flatnonzero(idx)
+        elif idx.size == 0:
+            idx = idx.astype(np.int64)
+        elif not np.issubdtype(idx.dtype, np.integer):
+            raise IndexError("Unsupported index")
+        if idx.size and (idx.min() < -length or idx.max() >= length):
+            raise OutOfBounds("Index array is out of bounds for dimension "
+                              "with size {}".format(length))
+        idx = np.where(idx < 0, idx + length, idx)
+        if isinstance(current, _Stride):
+            return current.start + idx * current.step
+        return current[idx]
+
+    def _selection(self, index):
+        """
+        Turns a composed index into a selection h5py can read, i.e., integers,
+        slices with a positive step and at most one increasing index list.
+        Returns the selection and the operations that turn the data that was
+        read into the requested data.
+        """
+        selection, post = list(), list()
+        pointsel = False
+        axis = 0
+        for idx in index:
+            if isinstance(idx, Integral):
+                selection.append(idx)
+                continue
+            if isinstance(idx, _Stride):
+                sl, reverse = idx.to_slice()
+                selection.append(sl)
+                if reverse:
+                    post.append((axis, None))
+            elif idx.size == 0:
+                selection.append(slice(0, 0))
+            else:
+                uniq, inverse = np.unique(idx, return_inverse=True)
+                span = uniq[-1] - uniq[0] + 1
+                if not pointsel and len(uniq) * 8 < span:
+                    # sparse indices: select the points in the file
+                    selection.append(uniq)
+                    pointsel = True
+                    if len(uniq) != len(idx) or np.any(inverse != np.arange(
+                            len(idx))):
+                        post.append((axis, inverse))
+                else:
+                    # dense indices: read the enclosing block
+                    selection.append(slice(uniq[0], uniq[-1] + 1))
+                    post.append((axis, idx - uniq[0]))
+            axis += 1
+        return tuple(selection), post
 
     def _read_data(self, sl=None):
-        dvslices = self._slice
-        # complete DataView slices (turn Nones into values)
-        dvslices = tuple(slice(*dv.indices(l)) for dv, l in
-                         zip(dvslices, self.array.shape))
-        sup = super(DataView, self)
-        if sl is None or sl == slice(None, None, None):
-            # full DataView: pass dvslices directly
-            return sup._read_data(dvslices)
-        if isinstance(sl, int):
-            # single value or dimension, offset by DataView start on first dim
-            readslice = dvslices[0].start + sl
-            return sup._read_data(readslice)
-        if isinstance(sl, Iterable):
-            # combine slices
-            readslice = list()
-            for readi, datai in zip(sl, dvslices):
-                if readi is None:
-                    readslice.append(datai)
-                elif isinstance(readi, int):
-                    readslice.append(datai.start + readi)
-                elif isinstance(readi, slice):
-                    start = datai.start + (readi.start or 0)
-                    stop = (datai.start + readi.stop
-                            if readi.stop else datai.stop)
-                    readslice.append(slice(start, stop, readi.step))
-            return sup._read_data(tuple(readslice))
-
-        # something else? Just read the underlying data then slice it
-        # probably inefficient, but correct
-        return sup._read_data(dvslices).read_data(sl)
-
-    def _transform_coordinates(self, count, offset):
-        if not offset:
-            if np.any(np.greater(count, self._count)):
-                raise OutOfBounds("Trying to access data outside of range")
-            return self._offset
-        else:
-            co = tuple(c + o for c, o in zip(count, offset))
-            if any(c > sc for c, sc in zip(co, self._count)):
-                raise OutOfBounds("Trying to access data outside of range")
-            return tuple(so + o for so, o in zip(self._offset, offset))
+        index = self._index if sl is None else self._compose(sl)
+        selection, post = self._selection(index)
+        data = self.array._read_data(selection)
+        for axis, take in post:
+            if take is None:
+                data = np.flip(data, axis)
+            else:
+                data = np.take(data, take, axis=axis)
+        return data
+
+    def _write_data(self, data, sl=None):
+        index = self._index if sl is None else self._compose(sl)
+        shape = tuple(len(idx) for idx in index
+                      if not isinstance(idx, Integral))
+        data = np.broadcast_to(np.asarray(data), shape)
+        selection = list()
+        arrays = 0
+        axis = 0
+        for idx in index:
+            if isinstance(idx, Integral):
+                selection.append(idx)
+                continue
+            if isinstance(idx, _Stride):
+                sl, reverse = idx.to_slice()
+                selection.append(sl)
+                if reverse:
+                    data = np.flip(data, axis)
+            else:
+                arrays += 1
+                if arrays > 1:
+                    raise IndexError("Writing with index arrays is only "
+                                     "supported in a single dimension")
+                order = np.argsort(idx, kind="stable")
+                idx = idx[order]
+                if np.any(idx[1:] == idx[:-1]):
+                    raise IndexError("Cannot write with repeated indices")
+                data = np.take(data, order, axis=axis)
+                selection.append(idx)
+            axis += 1
+        super(DataView, self)._write_data(np.ascontiguousarray(data),
+                                          tuple(selection))
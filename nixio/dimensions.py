@@ -14,6 +14,7 @@ from .datatype import DataType
 from .dimension_type import DimensionType
 from . import util
 from .container import Container
+from .hdf5 import h5cache
 from six import string_types
 
 
@@ -33,6 +34,51 @@ class DimensionContainer(Container):
         return cls(item, idx)
 
 
+# Ticks of range dimensions with more elements are not held in memory;
+# lookups only read the parts of the ticks they need from the file
+MAX_CACHED_TICKS = 1 << 20
+
+
+def _dimension_layout(spec):
+    """
+    Turns the description of a dimension for the batch creation of
+    DataArrays into the attributes and datasets of the dimension group. The
+    description is a dict with a ``dimension_type`` and the arguments of the
+    corresponding ``append_*_dimension`` method of DataArray.
+    """
+    spec = dict(spec)
+    attrs, datasets = dict(), dict()
+    try:
+        dimtype = DimensionType(spec.pop("dimension_type"))
+        if dimtype == DimensionType.Sample:
+            attrs["sampling_interval"] = spec.pop("sampling_interval")
+        elif dimtype == DimensionType.Range:
+            datasets["ticks"] = (spec.pop("ticks"), DataType.Double)
+    except KeyError as exc:
+        raise ValueError("Dimension description without {}".format(exc))
+    attrs["dimension_type"] = dimtype.value
+    if dimtype == DimensionType.Sample:
+        util.check_attr_type(attrs["sampling_interval"], Number)
+        optional = (("label", str), ("unit", str), ("offset", Number))
+    elif dimtype == DimensionType.Range:
+        optional = (("label", str), ("unit", str))
+    else:
+        labels = spec.pop("labels", None)
+        if labels:
+            datasets["labels"] = (labels, util.vlen_str_dtype)
+        optional = ()
+    for name, type_ in optional:
+        value = spec.pop(name, None)
+        if value is not None:
+            util.check_attr_type(value, type_)
+            attrs[name] = value
+    if spec:
+        raise ValueError("Invalid arguments for {} dimension: {}".format(
+            dimtype.value, ", ".join(sorted(spec))
+        ))
+    return attrs, datasets
+
+
 class Dimension(object):
 
     def __init__(self, h5group, index):
@@ -68,6 +114,110 @@ class Dimension(object):
     def __repr__(self):
         return self.__str__()
 
+
+class Axis(object):
+    """
+    A lazy, regularly spaced axis: the ``count`` positions ``start``,
+    ``start + step``, ... . Positions are only computed when they are
+    accessed, so that axes of very long sampled dimensions can be passed
+    around without holding them in memory. Slicing an Axis returns a new
+    Axis, numpy.asarray(axis) computes all positions.
+
+    :param start: The first position.
+    :param step: The distance between consecutive positions.
+    :param count: The number of positions.
+    """
+
+    def __init__(self, start, step, count):
+        self.start = start
+        self.step = step
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            first, stop, stride = index.indices(self.count)
+            count = len(range(first, stop, stride))
+            return Axis(self.start + first * self.step, self.step * stride,
+                        count)
+        if np.ndim(index):
+            index = np.asarray(index)
+            if np.any(index >= self.count) or np.any(index < -self.count):
+                raise IndexError("Axis index out of range")
+            index = np.where(index < 0, index + self.count, index)
+            return self.start + index * self.step
+        if not -self.count <= index < self.count:
+            raise IndexError("Axis index out of range")
+        if index < 0:
+            index += self.count
+        return self.start + index * self.step
+
+    def __iter__(self):
+        for idx in range(self.count):
+            yield self.start + idx * self.step
+
+    def __array__(self, dtype=None, copy=None):
+        values = self.start + np.arange(self.count) * self.step
+        if dtype is not None:
+            values = values.astype(dtype)
+        return values
+
+    def __eq__(self, other):
+        if isinstance(other, Axis):
+            return ((self.start, self.step, self.count) ==
+                    (other.start, other.step, other.count))
+        if isinstance(other, (tuple, list)):
+            return len(other) == self.count and tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "Axis(start={}, step={}, count={})".format(self.start,
+                                                          self.step,
+                                                          self.count)
+
+    def searchsorted(self, position, side="left"):
+        """
+        Finds the indices at which the given positions would have to be
+        inserted to keep the axis sorted, like numpy.searchsorted.
+
+        :param position: A position or an array of positions.
+        :param side: "left" or "right", see numpy.searchsorted.
+
+        :returns: The insertion indices.
+        :rtype: int or numpy.ndarray of int64
+        """
+        if side not in ("left", "right"):
+            raise ValueError("side must be 'left' or 'right'")
+        if self.step <= 0:
+            raise ValueError("Only increasing axes can be searched")
+        position = np.asarray(position, dtype=float)
+        before = np.less if side == "left" else np.less_equal
+        raw = (position - self.start) / self.step
+        index = np.clip(np.floor(raw) + 1, 0, self.count).astype(np.int64)
+        # correct rounding errors of the division by comparing with the
+        # positions around the estimate
+        index = np.where((index > 0) &
+                         ~before(self.start + (index - 1) * self.step,
+                                 position),
+                         index - 1, index)
+        index = np.where((index < self.count) &
+                         before(self.start + index * self.step, position),
+                         index + 1, index)
+        if np.ndim(index):
+            return index.astype(np.int64)
+        return int(index)
+
+
 class SampledDimension(Dimension):
 
     def __init__(self, h5group, index):
@@ -84,47 +234,69 @@ class SampledDimension(Dimension):
         """
         Returns the position corresponding to a given index.
 
-        :param index: A positive integer.
+        :param index: A positive integer or an array of positive integers.
 
         :returns: The position matching to the index.
-        :rtype: float
+        :rtype: float or numpy.ndarray of float
         """
         offset = self.offset if self.offset else 0
         sample = self.sampling_interval
+        if np.ndim(index):
+            index = np.asarray(index)
         return index * sample + offset
 
     def index_of(self, position):
         """
         Returns the index of a certain position in the dimension.
+        If an array of positions is given, an array with the index of each
+        position is returned.
 
-        :param position: The position.
+        :param position: The position or an array of positions.
 
         :returns: The nearest index.
-        :rtype: int
+        :rtype: int or numpy.ndarray of int64
         """
         offset = self.offset if self.offset else 0
         sample = self.sampling_interval
-        index = np.round((position - offset) / sample)
-        if index < 0:
+        index = np.round((np.asarray(position) - offset) / sample)
+        if np.any(index < 0):
             raise IndexError("Position is out of bounds of this dimension!")
+        if np.ndim(index):
+            return index.astype(np.int64)
         return int(index)
 
-    def axis(self, count, start=0):
+    def axis(self, count, start=0, as_array=False):
         """
         Get an axis as defined by this sampled dimension.
 
         :param count: A positive integer specifying the length of the axis
         (no of samples).
         :param start: positive integer, indicates the starting sample.
+        :param as_array: Return the axis as a numpy array instead of a tuple.
 
         :returns: The created axis
-        :rtype: list
+        :rtype: tuple or numpy.ndarray
+        """
+        axis = np.asarray(self.lazy_axis(count, start))
+        if as_array:
+            return axis
+        return tuple(axis)
+
+    def lazy_axis(self, count, start=0):
+        """
+        Get an axis as defined by this sampled dimension without computing
+        its positions.
+
+        :param count: A positive integer specifying the length of the axis
+        (no of samples).
+        :param start: positive integer, indicates the starting sample.
+
+        :returns: The axis
+        :rtype: Axis
         """
         offset = self.offset if self.offset else 0.0
         sample = self.sampling_interval
-        start_val = start * sample + offset
-        end_val = (start + count) * sample + offset
-        return tuple(np.arange(start_val, end_val, sample))
+        return Axis(start * sample + offset, sample, count)
 
     @property
     def label(self):
@@ -165,9 +337,6 @@ class SampledDimension(Dimension):
 
 class RangeDimension(Dimension):
 
-    def __init__(self, h5group, index):
-        super(RangeDimension, self).__init__(h5group, index)
-
     @classmethod
     def _create_new(cls, parent, index, ticks):
         newdim = super(RangeDimension, cls)._create_new(parent, index)
@@ -194,14 +363,7 @@ class RangeDimension(Dimension):
 
     @property
     def ticks(self):
-        g = self._redirgrp
-        if g.has_data("ticks"):
-            ticks = g.get_data("ticks")
-        elif g.has_data("data"):
-            ticks = g.get_data("data")
-        else:
-            raise AttributeError("Attribute 'ticks' is not set.")
-        return tuple(ticks)
+        return tuple(self._ticks_array)
 
     @ticks.setter
     def ticks(self, ticks):
@@ -209,6 +371,57 @@ class RangeDimension(Dimension):
             raise ValueError("Ticks are not given in an ascending order.")
         self._h5group.write_data("ticks", ticks)
 
+    @property
+    def _ticks_array(self):
+        """
+        The ticks as a read-only numpy array.
+        """
+        ticks = self._cached_ticks()
+        if ticks is None:
+            ticks = np.array(self._ticks_dataset().read_data())
+            ticks.flags.writeable = False
+        return ticks
+
+    def _cached_ticks(self):
+        """
+        The ticks as a read-only numpy array, or None if they are too large
+        to be held in memory (see MAX_CACHED_TICKS). The array is kept with
+        the derived values of the file, so repeated lookups do not touch the
+        file again until the ticks, or the data of the linked DataArray of
+        an Alias Range dimension, are written.
+        """
+        return h5cache.derived(self._h5group.group, "ticks",
+                               self._read_ticks)
+
+    def _read_ticks(self):
+        dataset = self._ticks_dataset()
+        if dataset.shape[0] > MAX_CACHED_TICKS:
+            return None
+        ticks = np.array(dataset.read_data())
+        ticks.flags.writeable = False
+        return ticks
+
+    def _ticks_dataset(self):
+        """
+        The H5DataSet holding the ticks, which is the data of the linked
+        DataArray for Alias Range dimensions.
+        """
+        g = self._redirgrp
+        if g.has_data("ticks"):
+            return g.get_dataset("ticks")
+        if g.has_data("data"):
+            return g.get_dataset("data")
+        raise AttributeError("Attribute 'ticks' is not set.")
+
+    def _large_ticks(self):
+        """
+        Returns the H5DataSet of the ticks if they are too large to be held
+        in memory (see MAX_CACHED_TICKS), or None.
+        """
+        if self._cached_ticks() is not None:
+            return None
+        return self._ticks_dataset()
+
     @property
     def _redirgrp(self):
         """
@@ -242,59 +455,125 @@ class RangeDimension(Dimension):
     def index_of(self, position):
         """
         Returns the index of a certain position in the dimension.
+        If an array of positions is given, an array with the index of each
+        position is returned.
 
-        :param position: The position.
+        :param position: The position or an array of positions.
 
         :returns: The nearest index.
-        :rtype: int
+        :rtype: int or numpy.ndarray of int64
         """
-        ticks = self.ticks
-        if position < ticks[0]:
-            return 0
-        elif position > ticks[-1]:
-            return len(ticks) - 1
-
-        ticks = np.array(ticks)
-        pidxs = np.flatnonzero((ticks - position) <= 0)
-        return int(pidxs[-1])
+        dataset = self._large_ticks()
+        if dataset is None:
+            ticks = self._ticks_array
+            index = np.searchsorted(ticks, position, side="right") - 1
+            nticks = len(ticks)
+        else:
+            index = _search_dataset(dataset, position)
+            nticks = dataset.shape[0]
+        index = np.clip(index, 0, nticks - 1)
+        if np.ndim(index):
+            return index.astype(np.int64)
+        return int(index)
 
     def tick_at(self, index):
         """
         Returns the tick at the given index. Will throw an Exception if the
         index is out of bounds.
 
-        :param index: The index.
+        :param index: The index or an array of indices.
+
+        :returns: The corresponding position.
+        :rtype: double or numpy.ndarray of double
+        """
+        dataset = self._large_ticks()
+        if dataset is None:
+            ticks = self._ticks_array
+            if np.ndim(index):
+                return ticks[np.asarray(index)]
+            return float(ticks[index])
+
+        nticks = dataset.shape[0]
+        index = np.asarray(index)
+        if np.any(index >= nticks) or np.any(index < -nticks):
+            raise IndexError("RangeDimension.tick_at: Index is out of "
+                             "bounds.")
+        index = np.where(index < 0, index + nticks, index)
+        if not index.ndim:
+            return float(dataset.read_data(int(index)))
+        if not index.size:
+            return np.empty(index.shape, dtype=dataset.dtype)
+        # h5py reads lists of indices in increasing order only
+        uniq, inverse = np.unique(index, return_inverse=True)
+        return dataset.read_data(uniq)[inverse.reshape(index.shape)]
+
+    def position_at(self, index):
+        """
+        Returns the position corresponding to a given index. For a
+        RangeDimension this is the tick at the given index.
+
+        :param index: The index or an array of indices.
 
         :returns: The corresponding position.
-        :rtype: double
+        :rtype: double or numpy.ndarray of double
         """
-        ticks = list(self.ticks)
-        return ticks[index]
+        return self.tick_at(index)
 
-    def axis(self, count, start=0):
+    def axis(self, count, start=0, as_array=False):
         """
         Get an axis as defined by this range dimension.
 
         :param count: A positive integer specifying the length of the axis
         (no of points).
         :param start: positive integer, indicates the starting tick.
+        :param as_array: Return the axis as a numpy array instead of a tuple.
 
         :returns: The created axis
-        :rtype: list
+        :rtype: tuple or numpy.ndarray
         """
-        ticks = self.ticks
+        dataset = self._large_ticks()
+        nticks = len(self._ticks_array) if dataset is None else \
+            dataset.shape[0]
         end = start + count
-        if end > len(ticks):
+        if end > nticks:
             raise IndexError("RangeDimension.axis: Count is invalid, "
                              "reaches beyond the ticks stored in this "
                              "dimension.")
-        return ticks[start:end]
+        if dataset is None:
+            axis = self._ticks_array[start:end]
+        else:
+            axis = dataset.read_data(slice(start, end))
+        if as_array:
+            return axis
+        return tuple(axis)
 
 
-class SetDimension(Dimension):
+def _search_dataset(dataset, position):
+    """
+    Like ``numpy.searchsorted(ticks, position, side="right") - 1`` for ticks
+    stored in a dataset, reading only parts of the ticks: a first search in
+    one tick per chunk finds the chunk of each position and a second search
+    in the ticks of that chunk the index.
+    """
+    nticks = dataset.shape[0]
+    step = dataset.dataset.chunks[0] if dataset.dataset.chunks else 65536
+    coarse = dataset.read_data(slice(0, nticks, step))
+    position = np.asarray(position)
+    blocks = np.searchsorted(coarse, position, side="right") - 1
+    index = np.full(position.shape, -1, dtype=np.int64)
+    flatpos, flatblocks = position.reshape(-1), blocks.reshape(-1)
+    flatindex = index.reshape(-1)
+    for block in np.unique(flatblocks[flatblocks >= 0]):
+        first = block * step
+        fine = dataset.read_data(slice(first, min(first + step, nticks)))
+        sel = flatblocks == block
+        flatindex[sel] = (first +
+                          np.searchsorted(fine, flatpos[sel], side="right") -
+                          1)
+    return index if index.ndim else index[()]
 
-    def __init__(self, h5group, index):
-        super(SetDimension, self).__init__(h5group, index)
+
+class SetDimension(Dimension):
 
     @classmethod
     def _create_new(cls, parent, index):
@@ -304,6 +583,12 @@ class SetDimension(Dimension):
 
     @property
     def labels(self):
+        # the decoded labels are kept with the derived values of the file
+        # until they are written
+        return h5cache.derived(self._h5group.group, "labels",
+                               self._read_labels)
+
+    def _read_labels(self):
         labels = tuple(self._h5group.get_data("labels"))
         if len(labels) and isinstance(labels[0], bytes):
             labels = tuple(l.decode() for l in labels)
@@ -8,6 +8,20 @@
 # LICENSE file in the root of the Project.
 
 from . import util
+from .hdf5 import h5cache
+
+
+def defer_update(h5obj):
+    """
+    Records that the update time of the entity stored in the h5py object must
+    be set when the batch_updates block of its file ends. Returns False if
+    the file is not in such a block.
+    """
+    state = h5cache.lookup(h5obj)
+    if state is None or state.updates is None:
+        return False
+    state.updates[h5cache.objkey(h5obj)] = h5obj
+    return True
 
 
 class Entity(object):
@@ -30,8 +44,9 @@ class Entity(object):
         h5group.set_attr("type", type_)
         h5group.set_attr("entity_id", id_)
         newentity = cls(nixparent, h5group)
-        newentity.force_created_at()
-        newentity.force_updated_at()
+        t = util.now_int()
+        newentity.force_created_at(t)
+        newentity.force_updated_at(t)
         return newentity
 
     @property
@@ -84,10 +99,15 @@ class Entity(object):
         Sets the update time `updated_at` to the given time.
         (default: current time)
 
+        Inside a File.batch_updates block, setting the current time is
+        deferred to the end of the block.
+
         :param t: The time to set.
         :type t: int
         """
         if t is None:
+            if defer_update(self._h5group.h5obj):
+                return
             t = util.now_int()
         else:
             util.check_attr_type(t, int)
@@ -6,7 +6,7 @@
 # Redistribution and use in source and binary forms, with or without
 # modification, are permitted under the terms of the BSD License. See
 # LICENSE file in the root of the Project.
-from .entity import Entity
+from .entity import Entity, defer_update
 from .data_array import DataArray
 from .link_type import LinkType
 from six import string_types
@@ -50,8 +50,7 @@ class Feature(object):
         lt = LinkType(lt)
         self._h5group.set_attr("link_type", lt.value)
         if self._parent._parent._parent.time_auto_update:
-            t = util.now_int()
-            self._h5group.set_attr("updated_at", util.time_to_str(t))
+            self._touch()
 
     @property
     def data(self):
@@ -71,6 +70,10 @@ class Feature(object):
             del self._h5group["data"]
         self._h5group.create_link(da, "data")
         if self._parent._parent._parent.time_auto_update:
+            self._touch()
+
+    def _touch(self):
+        if not defer_update(self._h5group.h5obj):
             t = util.now_int()
             self._h5group.set_attr("updated_at", util.time_to_str(t))
 
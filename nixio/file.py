@@ -9,6 +9,8 @@
 import os
 import gc
 import numpy as np
+from collections import OrderedDict
+from contextlib import contextmanager
 from warnings import warn
 
 try:
@@ -16,17 +18,23 @@ try:
 except ImportError:
     from sys import maxsize as maxint
 import h5py
+from six import string_types
 
 from .hdf5.h5group import H5Group
+from .hdf5 import h5cache
+from .hdf5 import h5chunks
 from .block import Block
-from .section import Section
+from .section import Section, _import_trees
+from .property import legacy_layout
+from . import entity
 from .container import Container, SectionContainer
 from . import util
 from .exceptions import InvalidFile, DuplicateName
 from .util import find as finders
 from .validate import Validate
 from .compression import Compression
-from .dimensions import RangeDimension, SetDimension, SampledDimension
+from .access import AccessOptions
+from .section_index import SectionIndex
 
 
 FILE_FORMAT = "nix"
@@ -71,28 +79,58 @@ def map_file_mode(mode):
         raise ValueError("Invalid file mode specified.")
 
 
-def make_fapl():
+def make_fapl(access=None):
+    if access is not None:
+        return access.make_fapl()
     return h5py.h5p.create(h5py.h5p.FILE_ACCESS)
 
 
-def make_fcpl():
+def make_fcpl(access=None):
     fcpl = h5py.h5p.create(h5py.h5p.FILE_CREATE)
     flags = h5py.h5p.CRT_ORDER_TRACKED | h5py.h5p.CRT_ORDER_INDEXED
     fcpl.set_link_creation_order(flags)
+    if access is not None:
+        access.apply_fcpl(fcpl)
     return fcpl
 
 
 class File(object):
 
     def __init__(self, path, mode=FileMode.ReadWrite,
-                 compression=Compression.Auto, auto_update_time=False):
+                 compression=Compression.Auto, auto_update_time=False,
+                 cache=None, storage=None, mmap=False, threads=None,
+                 access=None):
         """
         Open a NIX file, or create it if it does not exist.
 
         :param path: Path to file
         :param mode: FileMode ReadOnly, ReadWrite, or Overwrite.
                     (default: ReadWrite)
-        :param compression: No, DeflateNormal, Auto (default: Auto)
+        :param compression: No, DeflateFast, DeflateNormal, DeflateBest, LZF,
+                            Auto (default: Auto)
+        :param cache: Keep entity attributes and small datasets (e.g.,
+                      dimension ticks, calibration coefficients) in memory
+                      after they are first read. Either a bool or the maximum
+                      number of cached entries. Writes go to the file
+                      directly and drop the affected entries.
+                      (default: None, which enables the cache only for files
+                      opened ReadOnly)
+        :param storage: Default chunk shape and filters for the data of new
+                        DataArrays (StoragePolicy). Blocks created without a
+                        policy of their own use this one. (default: None)
+        :param mmap: Read the data of DataArrays that are stored contiguously
+                     and uncompressed through read-only memory maps instead
+                     of copying it (see DataArray.as_memmap). Other data is
+                     read normally. (default: False)
+        :param threads: Number of threads for decompressing the chunks of
+                        Deflate compressed data in large reads. (default:
+                        None, which decompresses in the calling thread)
+        :param access: HDF5 file access options, such as the sizes of the
+                       chunk and metadata caches and the file driver. Either
+                       an AccessOptions object or the name of a preset
+                       ("streaming-write", "random-read", "archive").
+                       (default: None, which uses the defaults of the HDF5
+                       library)
         :return: nixio.File object
         """
         try:
@@ -105,24 +143,44 @@ class File(object):
                 "Cannot open non-existent file in ReadOnly mode!"
             )
 
+        if isinstance(access, string_types):
+            access = AccessOptions.preset(access)
+
         new = False
         if not os.path.exists(path) or mode == FileMode.Overwrite:
             mode = FileMode.Overwrite
             h5mode = map_file_mode(mode)
-            fid = h5py.h5f.create(path, flags=h5mode, fapl=make_fapl(),
-                                  fcpl=make_fcpl())
+            fid = h5py.h5f.create(path, flags=h5mode,
+                                  fapl=make_fapl(access),
+                                  fcpl=make_fcpl(access))
             new = True
         else:
             h5mode = map_file_mode(mode)
-            fid = h5py.h5f.open(path, flags=h5mode, fapl=make_fapl())
+            fid = h5py.h5f.open(path, flags=h5mode, fapl=make_fapl(access))
 
         self._h5file = h5py.File(fid)
+        if cache is None:
+            cache = mode == FileMode.ReadOnly
+        if cache is True:
+            cache = h5cache.H5Cache()
+        elif cache:
+            cache = h5cache.H5Cache(maxsize=int(cache))
+        else:
+            cache = None
+        self._state = h5cache.H5FileState(cache, mmap=bool(mmap))
+        h5cache.register(self._h5file, self._state)
+        self._reader = None
+        if threads:
+            self._reader = h5chunks.ChunkReader(threads)
+            h5chunks.register(self._h5file, self._reader)
         self._root = H5Group(self._h5file, "/", create=True)
         self._h5group = self._root  # to match behaviour of other objects
         self._time_auto_update = True
         if new:
             self._create_header()
         self._check_header(mode)
+        # resolved once for all properties of the file
+        self._legacy_properties = legacy_layout(self.version)
         self.mode = mode
         self._data = self._root.open_group("data", create=True)
         self.metadata = self._root.open_group("metadata", create=True)
@@ -134,16 +192,23 @@ class File(object):
         if compression == Compression.Auto:
             compression = Compression.No
         self._compr = compression
+        self._storage = storage
         # make container props but don't initialise
         self._blocks = None
         self._sections = None
+        self._section_index = None
+        if mode != FileMode.ReadOnly and SectionIndex(self._h5file).persisted:
+            # keep the stored index up to date with the changes
+            self._watch_sections()
 
     @classmethod
     def open(cls, path, mode=FileMode.ReadWrite, compression=Compression.Auto,
-             backend=None,  auto_update_time=False):
+             backend=None,  auto_update_time=False, cache=None,
+             storage=None, mmap=False, threads=None, access=None):
         if backend is not None:
             warn("Backend selection is deprecated. Ignoring value.")
-        return cls(path, mode, compression, auto_update_time)
+        return cls(path, mode, compression, auto_update_time, cache, storage,
+                   mmap, threads, access)
 
     def _create_header(self):
         self.format = FILE_FORMAT
@@ -185,6 +250,7 @@ class File(object):
         # convert to np.int32 since py3 defaults to 64
         v = np.array(v, dtype=np.int32)
         self._root.set_attr("version", v)
+        self._legacy_properties = legacy_layout(v)
         if self.time_auto_update:
             self.force_updated_at()
 
@@ -219,6 +285,44 @@ class File(object):
     def time_auto_update(self, auto_update_flag):
         self._time_auto_update = auto_update_flag
 
+    @contextmanager
+    def batch_updates(self):
+        """
+        A context manager that defers the update times set while it is
+        active. Instead of writing the current time each time an entity is
+        changed, the changed entities are recorded and each gets a single
+        ``updated_at`` when the block ends (or when the file is closed).
+        Nested blocks are merged into the outermost one.
+
+        Usage::
+
+            with nixfile.batch_updates():
+                for da in block.data_arrays:
+                    da.unit = "mV"
+        """
+        state = self._state
+        if state.updates is not None:
+            yield
+            return
+        state.updates = OrderedDict()
+        try:
+            yield
+        finally:
+            # the file may have been closed inside the block
+            self._write_updates()
+
+    def _write_updates(self):
+        pending = self._state.updates
+        self._state.updates = None
+        if not pending:
+            return
+        stamp = util.time_to_str(util.now_int())
+        for h5obj in pending.values():
+            # written to the objects directly, which also works for entities
+            # that were deleted in the meantime
+            h5obj.attrs["updated_at"] = stamp
+            h5cache.invalidate(h5obj, "attr", "updated_at")
+
     @property
     def created_at(self):
         """
@@ -263,6 +367,8 @@ class File(object):
         :type t: int
         """
         if t is None:
+            if entity.defer_update(self._h5file):
+                return
             t = util.now_int()
         else:
             util.check_attr_type(t, int)
@@ -281,45 +387,30 @@ class File(object):
         except ValueError:
             return False
 
-    def validate(self):
+    def validate(self, processes=None, since=None, timings=None):
         """
         Checks if the file is a valid nix file.
 
+        :param processes: Number of processes that check the blocks in
+                          parallel. (default: None, which checks them in this
+                          process)
+        :type processes: int
+        :param since: POSIX time of a previous validation. Only entities
+                      updated since then are checked. (default: None, which
+                      checks all entities)
+        :type since: int
+        :param timings: A dictionary that receives the total time in seconds
+                        spent in each kind of check.
+        :type timings: dict
+
         :returns: A dict which contains all objects in file and related errors
         :rtype: Dictionary
         """
         validator = Validate(self)
-        validator.check_file()
         validator.form_dict()
         errors = validator.errors
-        for bi, blk in enumerate(self.blocks):
-            validator.check_blocks(blk, bi)
-            for gi, grp in enumerate(blk.groups):
-                validator.check_groups(grp, gi, bi)
-            for di, da in enumerate(blk.data_arrays):
-                validator.check_data_arrays(da, di, bi)
-                for dimi, dim in enumerate(da.dimensions):
-                    if isinstance(dim, RangeDimension):
-                        validator.check_range_dim(dim, dimi, di, bi)
-                    if isinstance(dim, SetDimension):
-                        validator.check_set_dim(dim, dimi, di, bi)
-                    if isinstance(dim, SampledDimension):
-                        validator.check_sampled_dim(dim, dimi, di, bi)
-            for mti, mt in enumerate(blk.multi_tags):
-                validator.check_multi_tag(mt, mti, bi)
-                for fi, fea in enumerate(mt.features):
-                    validator.check_features(fea, 'multi_tags', bi, mti, fi)
-            for ti, tag in enumerate(blk.tags):
-                validator.check_tag(tag, ti, bi)
-                for fi, fea in enumerate(tag.features):
-                    validator.check_features(fea, 'tags', bi, ti, fi)
-            for src in blk.find_sources():
-                validator.check_sources(src, bi)
-
-        for si, sec in enumerate(self.find_sections()):
-            validator.check_section(sec, si)
-            for pi, prop in enumerate(sec.props):
-                validator.check_property(prop, pi, si)
+        for finding in validator.iter_findings(since, processes, timings):
+            validator.record(finding)
 
         if validator.error_count:
             print("{} errors found".format(validator.error_count))
@@ -328,6 +419,17 @@ class File(object):
             print("No errors found: The file is a valid NIX file")
             return errors
 
+    def iter_validate(self, processes=None, since=None, timings=None):
+        """
+        Checks if the file is a valid nix file and yields the errors of each
+        object as soon as it has been checked. See
+        :meth:`~nixio.validate.Validate.iter_findings` for the parameters.
+
+        :returns: The findings of the objects with errors
+        :rtype: generator of Finding
+        """
+        return Validate(self).iter_findings(since, processes, timings)
+
     def pprint(self, indent=2, max_length=120, extra=True, max_depth=3):
         """
         Pretty Printing the Data and MetaData Tree of the whole File
@@ -402,14 +504,23 @@ class File(object):
         """
         Closes an open file.
         """
+        self._write_updates()
+        index = self._section_index
+        if index is not None and index.persisted and index.modified:
+            index.save()
         gc.collect()  # should handle refs better instead of calling collect()
+        h5cache.unregister(self._h5file, self._state)
+        self._state.clear()
+        if self._reader is not None:
+            h5chunks.unregister(self._h5file, self._reader)
+            self._reader.close()
         # Flush is probably unnecessary
         self._h5file.flush()
         self._h5file.close()
 
     # Block
     def create_block(self, name="", type_="", compression=Compression.Auto,
-                     copy_from=None, keep_copy_id=True):
+                     copy_from=None, keep_copy_id=True, storage=None):
         """
         Create a new block inside the file.
 
@@ -417,11 +528,15 @@ class File(object):
         :type name: str
         :param type_: The type of the block.
         :type type_: str
-        :param compression: No, DeflateNormal, Auto (default: Auto)
+        :param compression: No, DeflateFast, DeflateNormal, DeflateBest, LZF,
+                            Auto (default: Auto)
         :param copy_from: The Block to be copied, None in normal mode
         :type copy_from: Block
         :param keep_copy_id: Specify if the id should be copied in copy mode
         :type keep_copy_id: bool
+        :param storage: Default chunk shape and filters for the DataArrays of
+                        the block (default: the policy of the File)
+        :type storage: StoragePolicy
 
         :returns: The newly created block.
         :rtype: Block
@@ -448,7 +563,8 @@ class File(object):
             raise ValueError("Block with the given name already exists!")
         if compression == Compression.Auto:
             compression = self._compr
-        block = Block._create_new(self, self._data, name, type_, compression)
+        block = Block._create_new(self, self._data, name, type_, compression,
+                                  storage)
         return block
 
     # Section
@@ -472,6 +588,26 @@ class File(object):
         sec = Section._create_new(self, self.metadata, name, type_, oid)
         return sec
 
+    def import_metadata(self, trees, keep_ids=False):
+        """
+        Creates the metadata sections described by nested dicts, or updates
+        existing sections of the same names. This is much faster than
+        creating the sections and properties one by one (see
+        Section.update_from_dict for the form of the dicts).
+
+        :param trees: The root sections, either a dict of section names and
+                      dicts, a list of Sections or odML-style sections, or
+                      an odML-style document with a ``sections`` attribute.
+        :type trees: dict
+        :param keep_ids: Use the ids in the trees ("id" keys) for the new
+                         entities instead of creating new ones.
+        :type keep_ids: bool
+
+        :returns: The created or updated root sections.
+        :rtype: list of Section
+        """
+        return _import_trees(self, self.metadata, trees, keep_ids)
+
     @property
     def blocks(self):
         """
@@ -507,6 +643,72 @@ class File(object):
             limit = maxint
         return finders._find_sections(self, filtr, limit)
 
+    def query_sections(self, type=None, props=None):
+        """
+        Get all sections, including child sections, of the given type whose
+        properties match all of the given conditions, e.g.,
+
+            file.query_sections(type="subject",
+                                props={"species": "mouse",
+                                       "age": (">", 30)})
+
+        A condition is a value, which the property must be equal to, a list
+        of values, one of which the property must be equal to, or a tuple of
+        an operator (==, !=, <, <=, >, >=, in, not in) and a value. A
+        property with several values matches if one of its values matches.
+        Numbers are only compared with numbers and strings with strings.
+
+        The sections are selected using an index of the property values,
+        which is built on the first query and kept up to date with the
+        changes made through this File object. The index can be stored in
+        the file using create_metadata_index.
+
+        :param type: The type of the sections (default: None, any type)
+        :type type: str
+        :param props: Dictionary of property names and conditions.
+        :type props: dict
+
+        :returns: The matching sections in depth first order.
+        :rtype: list of Section
+        """
+        paths = self._watch_sections().query(type, props)
+        result = list()
+        for path in paths:
+            names = path.split("/")
+            section = self.sections[names[0]]
+            for name in names[1:]:
+                section = section.sections[name]
+            result.append(section)
+        return result
+
+    def create_metadata_index(self):
+        """
+        Stores the property value index used by query_sections in a hidden
+        group of the file, so that it does not need to be built again when
+        the file is opened. Sections whose updated_at time or number of
+        properties differ from the stored index are read again when the
+        index is loaded; changes made through nixio are recorded in the
+        stored index when the file is closed.
+        """
+        if self.mode == FileMode.ReadOnly:
+            raise RuntimeError("Cannot create a metadata index in a file "
+                               "opened ReadOnly")
+        self._watch_sections().save()
+
+    def delete_metadata_index(self):
+        """
+        Removes the property value index stored by create_metadata_index.
+        """
+        index = self._watch_sections()
+        if index.persisted:
+            del self._h5file[index.group]
+
+    def _watch_sections(self):
+        if self._section_index is None:
+            self._section_index = SectionIndex(self._h5file)
+            self._state.derived.watchers.append(self._section_index.mark)
+        return self._section_index
+
     @property
     def sections(self):
         """
@@ -0,0 +1,709 @@
+# -*- coding: utf-8 -*-
+# Copyright © 2020, German Neuroinformatics Node (G-Node)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the Project.
+from collections import OrderedDict
+
+import h5py
+import numpy as np
+
+
+MISSING = object()
+
+# The H5FileState of each open file, keyed by its HDF5 file number
+_files = dict()
+
+# The derived values that are being computed, innermost last, as (state,
+# set of the parts of objects they read) tuples
+_recording = list()
+
+
+class H5Cache(object):
+    """
+    Size bounded cache for the attributes and small datasets of the HDF5
+    objects in one file. Entries are keyed by the HDF5 object itself, not by
+    the path it was opened through, so objects that are reachable through
+    several links share their entries. When the cache is full, the least
+    recently used entries are evicted.
+
+    :param maxsize: The maximum number of cached entries.
+    :param maxdatasize: Datasets with more elements than this are never
+                        cached.
+    """
+
+    def __init__(self, maxsize=65536, maxdatasize=1024):
+        self.maxsize = maxsize
+        self.maxdatasize = maxdatasize
+        self._entries = OrderedDict()
+        self._objects = dict()
+
+    def get(self, key):
+        value = self._entries.pop(key, MISSING)
+        if value is not MISSING:
+            # re-insert to mark the entry as most recently used
+            self._entries[key] = value
+        return value
+
+    def put(self, key, value):
+        self._entries.pop(key, None)
+        self._entries[key] = value
+        self._objects.setdefault(key[0], set()).add(key)
+        while len(self._entries) > self.maxsize:
+            oldkey, _ = self._entries.popitem(last=False)
+            self._discard(oldkey)
+
+    def invalidate(self, key):
+        if self._entries.pop(key, MISSING) is not MISSING:
+            self._discard(key)
+
+    def forget(self, objkey):
+        """
+        Drops all entries of one HDF5 object.
+        """
+        for key in self._objects.pop(objkey, ()):
+            self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._objects.clear()
+
+    def _discard(self, key):
+        keys = self._objects.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._objects[key[0]]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class H5IdIndex(object):
+    """
+    Maps the entity IDs of the children of container groups (e.g., the
+    data_arrays group of a Block) to their names. The map of a container is
+    built the first time it is requested and is kept up to date by the
+    backend when children are created or deleted, which makes lookups by ID
+    independent of the number of children. An ID maps to a list of names,
+    since objects that were copied with their ID share it.
+
+    The index also keeps the names of the children of each container in
+    creation order, for access by position. These lists are dropped when
+    children are added or removed and listed again when next requested.
+    """
+
+    def __init__(self):
+        self._containers = dict()
+        self._names = dict()
+
+    def get(self, objkey):
+        """
+        Returns the id to names map of a container or None if it has not
+        been built yet.
+        """
+        entry = self._containers.get(objkey)
+        if entry is None:
+            return None
+        return entry[0]
+
+    def put(self, objkey, ids):
+        names = dict()
+        for id_, idnames in ids.items():
+            for name in idnames:
+                names[name] = id_
+        self._containers[objkey] = (ids, names)
+
+    def add(self, objkey, id_, name):
+        self._names.pop(objkey, None)
+        entry = self._containers.get(objkey)
+        if entry is None:
+            return
+        self.remove(objkey, name)
+        ids, names = entry
+        ids.setdefault(id_, []).append(name)
+        names[name] = id_
+
+    def remove(self, objkey, name):
+        self._names.pop(objkey, None)
+        entry = self._containers.get(objkey)
+        if entry is None:
+            return
+        ids, names = entry
+        id_ = names.pop(name, None)
+        if id_ is not None:
+            idnames = ids[id_]
+            idnames.remove(name)
+            if not idnames:
+                del ids[id_]
+
+    def get_names(self, objkey):
+        """
+        Returns the names of the children of a container in creation order
+        or None if they have not been listed yet.
+        """
+        return self._names.get(objkey)
+
+    def put_names(self, objkey, names):
+        self._names[objkey] = names
+
+    def forget_names(self, objkey):
+        self._names.pop(objkey, None)
+
+    def forget(self, objkey):
+        self._containers.pop(objkey, None)
+        self._names.pop(objkey, None)
+
+    def clear(self):
+        self._containers.clear()
+        self._names.clear()
+
+
+class H5RefIndex(object):
+    """
+    Reverse reference index of a file. Maps each entity ID to all links that
+    point to an object with that ID, i.e., to the object itself in its
+    container as well as to every link in LinkContainers and to metadata,
+    positions, extents, etc. links. Each link is stored as the object that
+    holds it and the name of the link. The index is built in one pass over
+    the file when it is first needed and is then kept up to date by the
+    backend.
+    """
+
+    def __init__(self):
+        self.built = False
+        self._targets = dict()
+        self._links = dict()
+        self._owners = dict()
+
+    def build(self, h5file):
+        self.clear()
+        self.built = True
+
+        def visit(_, obj):
+            if isinstance(obj, h5py.Group):
+                self._add_children(obj)
+
+        self._add_children(h5file)
+        h5file.visititems(visit)
+
+    def _add_children(self, group):
+        ownerkey = objkey(group)
+        for name, obj in group.items():
+            id_ = _read_id(obj)
+            if id_ is not None:
+                self.add(group, name, id_, ownerkey)
+
+    def add(self, owner, name, id_, ownerkey=None):
+        if not self.built:
+            return
+        if ownerkey is None:
+            ownerkey = objkey(owner)
+        key = (ownerkey, name)
+        self._discard(key)
+        self._owners[ownerkey] = (owner.name, owner.ref)
+        self._links[key] = id_
+        self._targets.setdefault(id_, set()).add(key)
+
+    def remove(self, owner, name, ownerkey=None):
+        if ownerkey is None:
+            ownerkey = objkey(owner)
+        self._discard((ownerkey, name))
+
+    def _discard(self, key):
+        id_ = self._links.pop(key, None)
+        if id_ is not None:
+            keys = self._targets[id_]
+            keys.discard(key)
+            if not keys:
+                del self._targets[id_]
+
+    def links(self, h5file, id_):
+        """
+        Returns a list of (owner, name) tuples for all links that point to an
+        object with the given ID. Links that no longer exist are dropped.
+        """
+        if not self.built:
+            self.build(h5file)
+        result = []
+        for key in list(self._targets.get(id_, ())):
+            path, ref = self._owners[key[0]]
+            try:
+                # opening by path is much faster than by reference, but the
+                # path may have been removed or may lead to another object
+                owner = h5file.get(path)
+                if owner is None or objkey(owner) != key[0]:
+                    owner = h5file[ref]
+                    if owner.name is None:
+                        # deleted from the file but still open somewhere
+                        raise KeyError(path)
+                obj = owner.get(key[1])
+            except (KeyError, ValueError):
+                obj = None
+            if obj is None or _read_id(obj) != id_:
+                self._discard(key)
+                continue
+            result.append((owner, key[1]))
+        return result
+
+    def clear(self):
+        self.built = False
+        self._targets.clear()
+        self._links.clear()
+        self._owners.clear()
+
+
+class H5DerivedCache(object):
+    """
+    Values computed from the contents of a file, e.g., the interval indexes
+    of the tags of a Block. Entries are keyed by the HDF5 object they belong
+    to and a name. While a value is computed, the backend records the
+    attributes, data and children it reads from the file (see ``accessed``)
+    and the entry is dropped when any of them is written, created or
+    deleted through the backend. Callables in ``watchers`` are called with
+    the HDF5 path of each modified object.
+    """
+
+    def __init__(self):
+        self._entries = dict()
+        self._dependents = dict()
+        self.watchers = list()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return MISSING
+        return entry[0]
+
+    def depends(self, key):
+        """
+        Returns the (object key, part) tuples the entry was derived from.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return ()
+        return entry[1]
+
+    def put(self, key, value, depends=()):
+        self._drop(key)
+        self._entries[key] = (value, frozenset(depends))
+        for objkey, part in depends:
+            parts = self._dependents.setdefault(objkey, dict())
+            parts.setdefault(part, set()).add(key)
+
+    def modified(self, objkey, part):
+        """
+        Drops the entries that were derived from ``part`` of an object, i.e.,
+        the name of an attribute or None for its data and children.
+        """
+        parts = self._dependents.get(objkey)
+        if parts is not None:
+            for key in list(parts.get(part, ())):
+                self._drop(key)
+
+    def forget(self, objkey):
+        """
+        Drops the entries that were derived from any part of an object.
+        """
+        parts = self._dependents.get(objkey)
+        if parts is not None:
+            for key in set().union(*parts.values()):
+                self._drop(key)
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for objkey, part in entry[1]:
+            parts = self._dependents[objkey]
+            keys = parts[part]
+            keys.discard(key)
+            if not keys:
+                del parts[part]
+                if not parts:
+                    del self._dependents[objkey]
+
+    def clear(self):
+        self._entries.clear()
+        self._dependents.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class H5FileState(object):
+    """
+    The caches and indexes of one open file. The File creates its state when
+    it is opened and attaches it with ``register``; the functions of this
+    module find the state of the file of the h5py object they are given.
+
+    :param cache: The H5Cache for attributes and small datasets or None.
+    :param mmap: True to read data through memory maps where possible.
+    """
+
+    def __init__(self, cache=None, mmap=False):
+        self.cache = cache
+        self.index = H5IdIndex()
+        self.refindex = H5RefIndex()
+        self.derived = H5DerivedCache()
+        self.mmaps = dict() if mmap else None
+        # objects were deleted, whose storage HDF5 may reuse for new objects
+        self.freed = False
+        # the h5py objects of the entities whose update time is set when the
+        # batch_updates block of the file ends, keyed by object number;
+        # None outside of such a block
+        self.updates = None
+
+    def clear(self):
+        if self.cache is not None:
+            self.cache.clear()
+        self.index.clear()
+        self.refindex.clear()
+        self.derived.clear()
+        if self.mmaps is not None:
+            self.mmaps.clear()
+
+
+def _read_id(h5obj):
+    id_ = h5obj.attrs.get("entity_id")
+    if isinstance(id_, bytes):
+        id_ = id_.decode()
+    return id_
+
+
+def objkey(h5obj):
+    """
+    Returns the key of the given h5py object in the caches and indexes of
+    its file, the HDF5 object number. Unlike the hash of the object, the
+    number is unique within the file.
+    """
+    return h5py.h5g.get_objinfo(h5obj.id).objno
+
+
+def register(h5file, state):
+    """
+    Attaches an H5FileState to an open h5py File. All lookups for objects in
+    that file go through its caches and indexes until it is unregistered.
+    """
+    _files[h5file.id.fileno] = state
+
+
+def unregister(h5file, state):
+    fileno = h5file.id.fileno
+    if _files.get(fileno) is state:
+        del _files[fileno]
+
+
+def _lookup(h5obj):
+    """
+    Returns the state of the file containing the given h5py object and the
+    key of the object, or (None, None) if the file has no state.
+    """
+    if not _files:
+        return None, None
+    info = h5py.h5g.get_objinfo(h5obj.id)
+    state = _files.get(info.fileno)
+    if state is None:
+        return None, None
+    return state, info.objno
+
+
+def lookup(h5obj):
+    """
+    Returns the state of the file containing the given h5py object or None
+    if the file has no state.
+    """
+    if not _files:
+        return None
+    return _files.get(h5obj.id.fileno)
+
+
+def derived(h5obj, name, loader):
+    """
+    Returns the derived value ``name`` of the given h5py object. If the
+    value is not cached, or anything it was derived from was modified since
+    it was cached, it is computed by calling ``loader`` without arguments.
+    """
+    state, key = _lookup(h5obj)
+    if state is None:
+        return loader()
+    values = state.derived
+    key = (key, name)
+    value = values.get(key)
+    if value is MISSING:
+        _recording.append((state, set()))
+        try:
+            value = loader()
+        finally:
+            _, depends = _recording.pop()
+        values.put(key, value, depends)
+    else:
+        depends = values.depends(key)
+    if _recording and _recording[-1][0] is state:
+        # a value derived from this one depends on the same objects
+        _recording[-1][1].update(depends)
+    return value
+
+
+def accessed(h5obj, attr=None):
+    """
+    Records that the value that is being derived was read from the
+    attribute ``attr`` of the given h5py object, or from its data or
+    children if ``attr`` is None. Has no effect unless a derived value is
+    being computed.
+    """
+    if _recording:
+        state, key = _lookup(h5obj)
+        _record(state, key, attr)
+
+
+def _record(state, key, attr=None):
+    if _recording and _recording[-1][0] is state:
+        _recording[-1][1].add((key, attr))
+
+
+def _modified(state, h5obj, key, attr=None, forget=False):
+    values = state.derived
+    if forget:
+        values.forget(key)
+    else:
+        values.modified(key, attr)
+    for watcher in values.watchers:
+        watcher(h5obj.name)
+
+
+def _cleared(state, h5obj):
+    # objects were modified without going through the backend, so any
+    # derived value may be outdated
+    values = state.derived
+    values.clear()
+    for watcher in values.watchers:
+        watcher(h5obj.name)
+
+
+def _copy(value):
+    # cached arrays and lists are handed out as copies so that callers
+    # cannot modify the cached value
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, list):
+        return list(value)
+    return value
+
+
+def cached(h5obj, kind, name, loader):
+    """
+    Returns the value of ``kind`` (e.g., "attr") ``name`` of the given h5py
+    object from the cache of its file. If the value is not cached, it is read
+    using ``loader``, which is called without arguments, and stored unless it
+    is an array larger than the maximum data size of the cache.
+    """
+    state, key = _lookup(h5obj)
+    if state is None:
+        return loader()
+    _record(state, key, name if kind == "attr" else None)
+    cache = state.cache
+    if cache is None:
+        return loader()
+    key = (key, kind, name)
+    value = cache.get(key)
+    if value is MISSING:
+        value = loader()
+        if (isinstance(value, np.ndarray) and
+                value.size > cache.maxdatasize):
+            return value
+        cache.put(key, value)
+    return _copy(value)
+
+
+def invalidate(h5obj, kind, name):
+    """
+    Drops a cached value of the given h5py object. Called whenever the value
+    is written or deleted.
+    """
+    state, key = _lookup(h5obj)
+    if state is None:
+        return
+    if state.cache is not None:
+        state.cache.invalidate((key, kind, name))
+    _modified(state, h5obj, key, name if kind == "attr" else None)
+
+
+def forget(h5obj):
+    """
+    Drops all cached values of the given h5py object. Called for newly
+    created objects, since HDF5 may reuse the storage of a deleted object,
+    which would make the new object look like the old one to the cache and
+    the id index.
+    """
+    state, key = _lookup(h5obj)
+    if state is None:
+        return
+    if state.cache is not None:
+        state.cache.forget(key)
+    _modified(state, h5obj, key, forget=True)
+    state.index.forget(key)
+    if state.mmaps is not None:
+        state.mmaps.pop(key, None)
+
+
+def forget_tree(h5group):
+    """
+    Drops all cached values of the given h5py Group and of the objects below
+    it. Called for trees of objects that are created at once, e.g., by
+    copying. The objects below the group are only visited if objects were
+    deleted since the file was opened, since otherwise none of them can
+    have cached values.
+    """
+    forget(h5group)
+    state = lookup(h5group)
+    if state is not None and state.freed:
+        h5group.visititems(lambda _, obj: forget(obj))
+
+
+def mapped(h5dataset, loader):
+    """
+    Returns the memory map of the given h5py dataset if its file reads
+    through memory maps, or None otherwise. The map is created using
+    ``loader``, which returns None for datasets that cannot be mapped.
+    """
+    state, key = _lookup(h5dataset)
+    if state is None:
+        return None
+    _record(state, key)
+    mmaps = state.mmaps
+    if mmaps is None:
+        return None
+    if key not in mmaps:
+        mmaps[key] = loader()
+    return mmaps[key]
+
+
+def unmap(h5dataset):
+    """
+    Drops the memory map of the given h5py dataset. Called whenever the
+    dataset is written or resized.
+    """
+    state, key = _lookup(h5dataset)
+    if state is None:
+        return
+    _modified(state, h5dataset, key)
+    if state.mmaps is not None:
+        state.mmaps.pop(key, None)
+
+
+def clear(h5obj):
+    """
+    Drops all cached values of the file containing the given h5py object.
+    Called when whole trees of objects are deleted or copied.
+    """
+    state = lookup(h5obj)
+    if state is None:
+        return
+    state.freed = True
+    if state.cache is not None:
+        state.cache.clear()
+    _cleared(state, h5obj)
+    if state.mmaps is not None:
+        state.mmaps.clear()
+
+
+def child_ids(h5group, loader):
+    """
+    Returns the id to names map of the children of the given h5py Group or
+    None if its file has no id index. If the map has not been built yet, it
+    is created by calling ``loader``, which must return a dict that maps
+    each ID to a list of names.
+    """
+    state, key = _lookup(h5group)
+    if state is None:
+        return None
+    _record(state, key)
+    ids = state.index.get(key)
+    if ids is None:
+        ids = loader()
+        state.index.put(key, ids)
+    return ids
+
+
+def child_names(h5group, loader):
+    """
+    Returns the names of the children of the given h5py Group in creation
+    order. The list is created by calling ``loader`` the first time it is
+    requested and kept in the id index of the file until children are
+    added or removed. Callers must not modify the list.
+    """
+    state, key = _lookup(h5group)
+    if state is None:
+        return loader()
+    _record(state, key)
+    names = state.index.get_names(key)
+    # the count guards against children that were changed without going
+    # through the backend
+    if names is None or len(names) != len(h5group):
+        names = loader()
+        state.index.put_names(key, names)
+    return names
+
+
+def children_changed(h5group):
+    """
+    Drops the list of the children of the given h5py Group. Called when a
+    child is created.
+    """
+    state, key = _lookup(h5group)
+    if state is not None:
+        _modified(state, h5group, key)
+        state.index.forget_names(key)
+
+
+def clear_index(h5obj):
+    """
+    Drops the id index and the reference index of the file containing the
+    given h5py object. Called when objects are copied, since copies do not
+    go through the backend.
+    """
+    state = lookup(h5obj)
+    if state is not None:
+        state.index.clear()
+        _cleared(state, h5obj)
+        state.refindex.clear()
+
+
+def lookup_refs(h5obj):
+    """
+    Returns the reverse reference index attached to the file containing the
+    given h5py object or None if the file has no index.
+    """
+    state = lookup(h5obj)
+    if state is None:
+        return None
+    return state.refindex
+
+
+def add_link(owner, name, id_):
+    """
+    Records that the h5py Group ``owner`` holds a link ``name`` to an object
+    with the entity ID ``id_`` in the id index and the reference index.
+    """
+    state, key = _lookup(owner)
+    if state is not None:
+        state.index.add(key, id_, name)
+        _modified(state, owner, key)
+        state.refindex.add(owner, name, id_, key)
+
+
+def remove_link(owner, name):
+    """
+    Removes the link ``name`` of the h5py Group ``owner`` from the id index
+    and the reference index.
+    """
+    state, key = _lookup(owner)
+    if state is not None:
+        state.freed = True
+        state.index.remove(key, name)
+        _modified(state, owner, key)
+        state.refindex.remove(owner, name, key)
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+# Copyright © 2020, German Neuroinformatics Node (G-Node)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the Project.
+import zlib
+from itertools import product
+from multiprocessing.pool import ThreadPool
+from numbers import Integral
+
+import h5py
+import numpy as np
+
+
+# Per file chunk readers, keyed by the HDF5 file number of the open file
+_readers = dict()
+
+# chunks with checksums are left to h5py, which verifies them
+_supported_filters = (h5py.h5z.FILTER_DEFLATE, h5py.h5z.FILTER_SHUFFLE)
+
+
+class ChunkReader(object):
+    """
+    Reads the data of chunked, deflate compressed datasets by decompressing
+    the chunks that intersect a selection on a pool of threads, directly into
+    the output array. The raw chunks are read from the file one after the
+    other, but zlib releases the GIL while decompressing, so that the
+    decompression runs in parallel.
+
+    Only selections of integers and slices without a step are read this way;
+    other selections and datasets with other filters are left to h5py.
+
+    :param threads: The number of decompression threads.
+    :param minchunks: Selections that touch fewer chunks are left to h5py.
+    """
+
+    def __init__(self, threads, minchunks=4):
+        self.threads = threads
+        self.minchunks = minchunks
+        self._pool = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = ThreadPool(self.threads)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def read(self, dataset, sl=None):
+        """
+        Returns the data of the h5py dataset selected by ``sl``, or None if
+        the dataset or the selection are not supported.
+        """
+        filters = _filters(dataset)
+        if filters is None:
+            return None
+        region = _region(dataset.shape, sl)
+        if region is None:
+            return None
+        starts, stops, squeeze = region
+        chunks = dataset.chunks
+        grid = [range(start // c, (stop - 1) // c + 1)
+                for start, stop, c in zip(starts, stops, chunks)]
+        if int(np.prod([len(g) for g in grid])) < self.minchunks:
+            return None
+
+        dtype = dataset.dtype
+        out = np.empty(tuple(stop - start
+                             for start, stop in zip(starts, stops)), dtype)
+        pending = list()
+        for coords in product(*grid):
+            offset = tuple(i * c for i, c in zip(coords, chunks))
+            src, dst = list(), list()
+            for o, c, start, stop in zip(offset, chunks, starts, stops):
+                lo, hi = max(o, start), min(o + c, stop)
+                src.append(slice(lo - o, hi - o))
+                dst.append(slice(lo - start, hi - start))
+            src, dst = tuple(src), tuple(dst)
+            try:
+                mask, raw = dataset.id.read_direct_chunk(offset)
+            except RuntimeError:
+                # chunk was never written
+                out[dst] = dataset.fillvalue
+                continue
+            pending.append(self.pool.apply_async(
+                _decode_into, (raw, mask, filters, dtype, chunks, out,
+                               src, dst)
+            ))
+        for result in pending:
+            result.get()
+        return out[tuple(0 if sq else slice(None) for sq in squeeze)]
+
+
+def _filters(dataset):
+    """
+    The filter pipeline of the dataset, if its chunks can be decoded by the
+    ChunkReader, or None.
+    """
+    if dataset.chunks is None:
+        return None
+    dtype = dataset.dtype
+    if (dtype.hasobject or dtype.fields is not None or
+            dtype.kind not in "biufc"):
+        return None
+    dcpl = dataset.id.get_create_plist()
+    filters = [dcpl.get_filter(idx)[0] for idx in range(dcpl.get_nfilters())]
+    if (h5py.h5z.FILTER_DEFLATE not in filters or
+            any(f not in _supported_filters for f in filters)):
+        return None
+    return filters
+
+
+def _region(shape, sl):
+    """
+    Turns a selection into the start and stop of the selected region in each
+    dimension and whether the dimension is dropped from the result. Returns
+    None for selections with steps or index arrays, empty selections and
+    invalid selections.
+    """
+    if sl is None:
+        sl = ()
+    elif not isinstance(sl, tuple):
+        sl = (sl, )
+    if any(s is Ellipsis for s in sl):
+        if sum(s is Ellipsis for s in sl) > 1:
+            return None
+        pos = [s is Ellipsis for s in sl].index(True)
+        sl = (sl[:pos] + (slice(None), ) * (len(shape) - len(sl) + 1) +
+              sl[pos+1:])
+    if len(sl) > len(shape):
+        return None
+    sl = sl + (slice(None), ) * (len(shape) - len(sl))
+
+    starts, stops, squeeze = list(), list(), list()
+    for s, n in zip(sl, shape):
+        if isinstance(s, Integral) and not isinstance(s, bool):
+            if not -n <= s < n:
+                return None
+            s = s + n if s < 0 else s
+            starts.append(s)
+            stops.append(s + 1)
+            squeeze.append(True)
+        elif isinstance(s, slice):
+            start, stop, step = s.indices(n)
+            if step != 1 or stop <= start:
+                return None
+            starts.append(start)
+            stops.append(stop)
+            squeeze.append(False)
+        else:
+            return None
+    if not starts:
+        return None
+    return starts, stops, squeeze
+
+
+def _decode_into(raw, mask, filters, dtype, chunks, out, src, dst):
+    # undo the filters in the reverse order of the pipeline, skipping the
+    # filters that were not applied to this chunk
+    for idx in reversed(range(len(filters))):
+        if mask & (1 << idx):
+            continue
+        if filters[idx] == h5py.h5z.FILTER_DEFLATE:
+            raw = zlib.decompress(raw)
+        elif filters[idx] == h5py.h5z.FILTER_SHUFFLE and dtype.itemsize > 1:
+            raw = np.frombuffer(raw, np.uint8).reshape(dtype.itemsize, -1)
+            raw = raw.T.tobytes()
+    chunk = np.frombuffer(raw, dtype).reshape(chunks)
+    out[dst] = chunk[src]
+
+
+def register(h5file, reader):
+    """
+    Attaches a ChunkReader to an open h5py File. Data of that file is read
+    through the reader where possible until it is unregistered.
+    """
+    _readers[h5file.id.fileno] = reader
+
+
+def unregister(h5file, reader):
+    fileno = h5file.id.fileno
+    if _readers.get(fileno) is reader:
+        del _readers[fileno]
+
+
+def lookup(h5obj):
+    """
+    Returns the ChunkReader attached to the file containing the given h5py
+    object or None if the file has no reader.
+    """
+    if not _readers:
+        return None
+    return _readers.get(h5obj.id.fileno)
@@ -6,29 +6,139 @@
 # Redistribution and use in source and binary forms, with or without
 # modification, are permitted under the terms of the BSD License. See
 # LICENSE file in the root of the Project.
+import h5py
+import numpy as np
+import six
+
 from ..datatype import DataType
+from ..compression import Compression
 from .. import util
+from . import h5cache
+from . import h5chunks
+
+
+_deflate_levels = {
+    Compression.DeflateFast: 1,
+    Compression.DeflateNormal: 6,
+    Compression.DeflateBest: 9,
+}
+
+
+def compression_args(compression, level=None):
+    """
+    Returns the h5py dataset creation arguments for the given compression.
+    ``compression`` may be a Compression value or a bool, where True means
+    DeflateNormal. ``level`` overrides the level of Deflate compression.
+    """
+    if compression is True:
+        compression = Compression.DeflateNormal
+    if compression in _deflate_levels:
+        if level is None:
+            level = _deflate_levels[compression]
+        return {"compression": "gzip", "compression_opts": level}
+    if compression == Compression.LZF:
+        return {"compression": "lzf"}
+    return dict()
+
+
+# HDF5 types of attribute values written by write_attrs, keyed by
+# the numpy dtype of numbers or the encoding of strings
+_attr_types = dict()
+
+_str_dtypes = {"ascii": h5py.string_dtype("ascii"),
+               "utf-8": h5py.string_dtype("utf-8")}
+
+
+def _attr_array(value):
+    """
+    Converts an attribute value into an array of the type h5py would store
+    it as and returns the key of its HDF5 type, or returns None for values
+    that are left to h5py.
+    """
+    if isinstance(value, bytes):
+        key = "ascii"
+    elif isinstance(value, six.text_type):
+        key = "utf-8"
+    elif (isinstance(value, (six.integer_types, float, np.number)) and
+          not isinstance(value, (bool, np.bool_))):
+        data = np.asarray(value)
+        return data.dtype.str, data
+    else:
+        return None
+    # the string dtypes only differ in their metadata, which numpy ignores
+    # when comparing dtypes, so they are keyed by their encoding
+    return key, np.array(value, dtype=_str_dtypes[key])
+
+
+def _attr_type(key, dtype):
+    tid = _attr_types.get(key)
+    if tid is None:
+        tid = h5py.h5t.py_create(dtype, logical=True)
+        _attr_types[key] = tid
+    return tid
+
+
+def write_attrs(h5obj, attrs):
+    """
+    Sets several attributes of an h5py group or dataset at once. Strings and
+    numbers are written through the low level HDF5 interface, reusing the
+    attribute types, which is considerably faster than writing them one by
+    one through h5py. Attributes with a value of None are removed.
+    """
+    oid = h5obj.id
+    scalar = h5py.h5s.create(h5py.h5s.SCALAR)
+    for name, value in attrs.items():
+        bname = name.encode("utf-8")
+        tid = None
+        converted = None if value is None else _attr_array(value)
+        if converted is not None:
+            key, data = converted
+            tid = _attr_type(key, data.dtype)
+        if h5py.h5a.exists(oid, bname):
+            attr = h5py.h5a.open(oid, bname)
+            if (tid is not None and attr.get_type() == tid and
+                    attr.get_space().get_simple_extent_type() ==
+                    h5py.h5s.SCALAR):
+                # an attribute of the same type is overwritten in place
+                attr.write(data)
+                h5cache.invalidate(h5obj, "attr", name)
+                continue
+            h5py.h5a.delete(oid, bname)
+        if tid is not None:
+            attr = h5py.h5a.create(oid, bname, tid, scalar)
+            attr.write(data)
+        elif value is not None:
+            h5obj.attrs[name] = value
+        h5cache.invalidate(h5obj, "attr", name)
 
 
 class H5DataSet(object):
 
     def __init__(self, parent, name, dtype=None, shape=None,
-                 compression=False):
+                 compression=False, chunks=True, level=None, shuffle=False,
+                 fletcher32=False, dataset=None):
         self._parent = parent
         self.name = name
-        if (dtype is None) or (shape is None):
+        if dataset is not None:
+            self.dataset = dataset
+        elif (dtype is None) or (shape is None):
             self.dataset = self._parent[name]
         else:
-            maxshape = (None,) * len(shape)
+            # contiguous datasets (chunks=None) have a fixed size
+            maxshape = (None,) * len(shape) if chunks is not None else None
             if dtype == DataType.String:
                 dtype = util.vlen_str_dtype
-            comprargs = dict()
-            if compression:
-                comprargs = {"compression": "gzip", "compression_opts": 6}
+            comprargs = compression_args(compression, level)
+            if shuffle:
+                comprargs["shuffle"] = True
+            if fletcher32:
+                comprargs["fletcher32"] = True
             self.dataset = self._parent.require_dataset(
-                name, shape=shape, dtype=dtype, chunks=True, maxshape=maxshape,
-                **comprargs
+                name, shape=shape, dtype=dtype, chunks=chunks,
+                maxshape=maxshape, **comprargs
             )
+            h5cache.forget(self.dataset)
+            h5cache.children_changed(self._parent)
         self.h5obj = self.dataset
 
     @classmethod
@@ -38,12 +148,54 @@ class H5DataSet(object):
         return cls(parent, name)
 
     def write_data(self, data, sl=None):
-        if sl is None:
+        if sl is None and self._matches(data):
+            # write the whole array without going through h5py's selections
+            self.dataset.id.write(h5py.h5s.ALL, h5py.h5s.ALL, data)
+        elif sl is None:
             self.dataset[:] = data
         else:
             self.dataset[sl] = data
+        h5cache.invalidate(self._parent, "data", self.name)
+        h5cache.unmap(self.dataset)
+
+    def _matches(self, data):
+        dataset = self.dataset
+        return (isinstance(data, np.ndarray) and data.size and
+                data.shape == dataset.shape and data.dtype == dataset.dtype and
+                data.dtype.kind in "biufc" and data.flags.c_contiguous)
+
+    def memmap(self):
+        """
+        Returns a read-only numpy.memmap of the data in the file, or None if
+        the data cannot be mapped, i.e., if it is chunked or filtered, has
+        not been written yet, or is not of a fixed size numeric type.
+        """
+        dataset = self.dataset
+        if (dataset.chunks is not None or not dataset.shape or
+                not dataset.size or dataset.dtype.hasobject or
+                dataset.dtype.fields is not None or dataset.external):
+            return None
+        offset = dataset.id.get_offset()
+        if offset is None:
+            return None
+        h5file = dataset.file
+        if h5file.driver not in ("sec2", "stdio"):
+            return None
+        if h5file.mode != "r":
+            # the data must be in the file before it can be mapped
+            h5file.flush()
+        return np.memmap(h5file.filename, dtype=dataset.dtype, mode="r",
+                         offset=offset, shape=dataset.shape)
 
     def read_data(self, sl=None):
+        mapped = h5cache.mapped(self.dataset, self.memmap)
+        if mapped is not None:
+            return mapped if sl is None else mapped[sl]
+        reader = h5chunks.lookup(self.dataset)
+        if reader is not None:
+            data = reader.read(self.dataset, sl)
+            if data is not None:
+                return data
         if sl is None:
             return self.dataset[:]
         try:
@@ -59,12 +211,29 @@ class H5DataSet(object):
                 del self.dataset.attrs[name]
         else:
             self.dataset.attrs[name] = value
+        h5cache.invalidate(self.dataset, "attr", name)
+        if name == "entity_id" and value is not None:
+            h5cache.add_link(self._parent, self.name, value)
+
+    def set_attrs(self, attrs):
+        """
+        Sets several attributes at once (see H5Group.set_attrs).
+
+        :param attrs: the attribute names and values
+        :type attrs: dict
+        """
+        write_attrs(self.dataset, attrs)
+        if attrs.get("entity_id") is not None:
+            h5cache.add_link(self._parent, self.name, attrs["entity_id"])
 
     def get_attr(self, name):
-        attr = self.dataset.attrs.get(name)
-        if isinstance(attr, bytes):
-            attr = attr.decode()
-        return attr
+        def read():
+            attr = self.dataset.attrs.get(name)
+            if isinstance(attr, bytes):
+                attr = attr.decode()
+            return attr
+
+        return h5cache.cached(self.dataset, "attr", name, read)
 
     @property
     def shape(self):
@@ -73,6 +242,8 @@ class H5DataSet(object):
     @shape.setter
     def shape(self, shape):
         self.dataset.resize(shape)
+        h5cache.invalidate(self._parent, "data", self.name)
+        h5cache.unmap(self.dataset)
 
     @property
     def dtype(self):
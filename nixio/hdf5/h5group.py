@@ -11,7 +11,8 @@ import h5py
 import numpy as np
 from warnings import warn
 
-from .h5dataset import H5DataSet
+from .h5dataset import H5DataSet, write_attrs
+from . import h5cache
 from ..datatype import DataType
 from ..block import Block
 from ..section import Section
@@ -20,6 +21,13 @@ from .. import util
 from ..exceptions import InvalidEntity
 
 
+def _make_gcpl():
+    gcpl = h5py.h5p.create(h5py.h5p.GROUP_CREATE)
+    flags = h5py.h5p.CRT_ORDER_TRACKED | h5py.h5p.CRT_ORDER_INDEXED
+    gcpl.set_link_creation_order(flags)
+    return gcpl
+
+
 class H5Group(object):
 
     def __init__(self, parent, name, create=False):
@@ -28,18 +36,16 @@ class H5Group(object):
         self.group = None
         if create or name in self._parent:
             self._create_h5obj()
-        self.h5obj = self.group
 
     def _create_h5obj(self):
         if self.name in self._parent:
             self.group = self._parent[self.name]
         else:
-            gcpl = h5py.h5p.create(h5py.h5p.GROUP_CREATE)
-            flags = h5py.h5p.CRT_ORDER_TRACKED | h5py.h5p.CRT_ORDER_INDEXED
-            gcpl.set_link_creation_order(flags)
             name = self.name.encode("utf-8")
-            gid = h5py.h5g.create(self._parent.id, name, gcpl=gcpl)
+            gid = h5py.h5g.create(self._parent.id, name, gcpl=_make_gcpl())
             self.group = h5py.Group(gid)
+            h5cache.forget(self.group)
+            h5cache.children_changed(self._parent)
 
     @property
     def group(self):
@@ -54,11 +60,17 @@ class H5Group(object):
     def group(self, grp):
         self._group = grp
 
+    @property
+    def h5obj(self):
+        return self.group
+
     def create_link(self, target, name):
         self._create_h5obj()
         if name in self.group:
             del self.group[name]
+            h5cache.remove_link(self.group, name)
         self.group[name] = target._h5group.group
+        h5cache.add_link(self.group, name, target.id)
 
     @classmethod
     def create_from_h5obj(cls, h5obj):
@@ -85,7 +97,59 @@ class H5Group(object):
         self._create_h5obj()
         return H5Group(self.group, name, create)
 
-    def create_dataset(self, name, shape, dtype, compression=False):
+    def create_groups(self, names):
+        """
+        Creates new child groups with the given names, which must not exist
+        yet, and returns them as H5Group objects. The groups share a single
+        creation property list.
+
+        :param names: the names of the groups
+        :return: a list of H5Group objects
+        """
+        if self._group is None:
+            self._create_h5obj()
+        gcpl = _make_gcpl()
+        groups = list()
+        for name in names:
+            gid = h5py.h5g.create(self._group.id, name.encode("utf-8"),
+                                  gcpl=gcpl)
+            h5grp = H5Group.__new__(H5Group)
+            h5grp._parent = self._group
+            h5grp.name = name
+            h5grp.group = h5py.Group(gid)
+            h5cache.forget(h5grp.group)
+            groups.append(h5grp)
+        h5cache.children_changed(self._group)
+        return groups
+
+    def create_copies(self, template, names):
+        """
+        Creates copies of the child group ``template``, with its attributes
+        and everything below it, under the given names and returns them as
+        H5Group objects. The copies are made by the HDF5 library, which is
+        considerably faster than creating the same objects one by one.
+
+        :param template: the H5Group to copy
+        :param names: the names of the copies
+        :return: a list of H5Group objects
+        """
+        source = template.name.encode("utf-8")
+        groups = list()
+        for name in names:
+            bname = name.encode("utf-8")
+            h5py.h5o.copy(self._group.id, source, self._group.id, bname)
+            h5grp = H5Group.__new__(H5Group)
+            h5grp._parent = self._group
+            h5grp.name = name
+            h5grp.group = h5py.Group(h5py.h5g.open(self._group.id, bname))
+            h5cache.forget_tree(h5grp.group)
+            groups.append(h5grp)
+        h5cache.children_changed(self._group)
+        return groups
+
+    def create_dataset(self, name, shape, dtype, compression=False,
+                       chunks=True, level=None, shuffle=False,
+                       fletcher32=False):
         """
         Creates a dataset object under the current group with a given name,
         shape, and type.
@@ -93,11 +157,43 @@ class H5Group(object):
         :param name: the name of the dataset
         :param shape: tuple representing the shape of the dataset
         :param dtype: the type of the data for this dataset (DataType)
-        :param compression: whether to compress the data (default: False)
+        :param compression: whether to compress the data, either a bool or a
+                            Compression value (default: False)
+        :param chunks: the chunk shape or True to guess it (default: True)
+        :param level: the compression level for Deflate compression
+        :param shuffle: whether to apply the shuffle filter (default: False)
+        :param fletcher32: whether to store chunk checksums (default: False)
         :return: a new H5DataSet object
         """
         self._create_h5obj()
-        return H5DataSet(self.group, name, dtype, shape, compression)
+        return H5DataSet(self.group, name, dtype, shape, compression, chunks,
+                         level, shuffle, fletcher32)
+
+    def create_dataset_like(self, name, template, shape):
+        """
+        Creates a dataset with the given shape and the data type, chunk shape
+        and filters of another dataset, reusing its creation property list.
+
+        :param name: the name of the dataset
+        :param template: the H5DataSet to copy the layout from
+        :param shape: tuple representing the shape of the dataset
+        :return: a new H5DataSet object
+        """
+        if self._group is None:
+            self._create_h5obj()
+        tmpl = template.dataset
+        if tmpl.chunks is None:
+            maxshape = tuple(shape)
+        else:
+            maxshape = (h5py.h5s.UNLIMITED, ) * len(shape)
+        space = h5py.h5s.create_simple(tuple(shape), maxshape)
+        dsid = h5py.h5d.create(self._group.id, name.encode("utf-8"),
+                               tmpl.id.get_type(), space,
+                               dcpl=tmpl.id.get_create_plist())
+        dataset = h5py.Dataset(dsid)
+        h5cache.forget(dataset)
+        h5cache.children_changed(self._group)
+        return H5DataSet(self._group, name, dataset=dataset)
 
     def get_dataset(self, name):
         """
@@ -106,14 +202,14 @@ class H5Group(object):
         :param name: name of the dataset
         :return: H5DataSet object
         """
-        notfound = KeyError("No DataSet named {} found.")
         if self.group is None:
-            raise notfound
-        if name in self.group:
-            dset = self.group[name]
-            return H5DataSet.create_from_h5obj(dset)
-        else:
-            raise notfound
+            raise KeyError("No DataSet named {} found.".format(name))
+        h5cache.accessed(self.group)
+        try:
+            dsid = h5py.h5d.open(self.group.id, name.encode("utf-8"))
+        except KeyError:
+            raise KeyError("No DataSet named {} found.".format(name))
+        return H5DataSet(self.group, name, dataset=h5py.Dataset(dsid))
 
     def write_data(self, name, data, dtype=None, compression=False):
         """
@@ -136,6 +232,7 @@ class H5Group(object):
             dset = self.create_dataset(name, shape, dtype, compression)
 
         dset.write_data(data)
+        h5cache.invalidate(self.group, "data", name)
 
     def get_data(self, name):
         """
@@ -145,12 +242,14 @@ class H5Group(object):
         :param name: The name of the dataset
         :return: The data contained in the dataset as a numpy array or None
         """
-        if name not in self.group:
-            return []
+        def read():
+            if name not in self.group:
+                return []
+            dset = self.group[name]
+            # TODO: Error if dset is Group?
+            return dset[:]
 
-        dset = self.group[name]
-        # TODO: Error if dset is Group?
-        return dset[:]
+        return h5cache.cached(self.group, "data", name, read)
 
     def has_data(self, name):
         """
@@ -160,6 +259,7 @@ class H5Group(object):
         :return: True if Dataset exists in Group, False if it does not exist,
         or exists and is not a Dataset
         """
+        h5cache.accessed(self.group)
         if self.group.get(name, getclass=True) == h5py.Dataset:
             return True
         else:
@@ -169,12 +269,13 @@ class H5Group(object):
         if not self.group:
             return False
         if util.is_uuid(id_or_name):
-            for item in self:
-                if item.get_attr("entity_id") == id_or_name:
-                    return True
-            else:
+            try:
+                self.get_by_id(id_or_name)
+                return True
+            except KeyError:
                 return False
         else:
+            h5cache.accessed(self.group)
             return id_or_name in self.group
 
     def get_by_id_or_name(self, id_or_name):
@@ -184,28 +285,94 @@ class H5Group(object):
             return self.get_by_name(id_or_name)
 
     def get_by_name(self, name):
-        if self.group and name in self.group:
-            return self.create_from_h5obj(self.group[name])
+        if self.group and name in self:
+            return self._wrap_child(name, self.group[name])
         else:
             raise KeyError("Item not found '{}'".format(name))
 
+    def _wrap_child(self, name, h5obj):
+        """
+        Returns the H5Group or H5DataSet for the child ``name`` of this group,
+        which is the h5py object ``h5obj``.
+        """
+        if isinstance(h5obj, h5py.Group):
+            h5grp = H5Group.__new__(H5Group)
+            h5grp._parent = self.group
+            h5grp.name = name
+            h5grp.group = h5obj
+            return h5grp
+        elif isinstance(h5obj, h5py.Dataset):
+            return H5DataSet(self.group, name, dataset=h5obj)
+        else:
+            raise ValueError("Invalid object: "
+                             "{} must be either h5py.Group of h5py.Dataset.")
+
     def get_by_id(self, id_):
         if self.group:
-            for item in self:
-                if item.get_attr("entity_id") == id_:
-                    return item
+            ids = h5cache.child_ids(self.group, self._read_child_ids)
+            if ids is None:
+                for item in self:
+                    if item.get_attr("entity_id") == id_:
+                        return item
+            else:
+                for name in ids.get(id_, ()):
+                    if name in self.group:
+                        return self.get_by_name(name)
         raise KeyError("Item not found '{}'".format(id_))
 
+    def _read_child_ids(self):
+        """
+        Reads the entity IDs of all children and returns a dictionary that
+        maps each ID to the names of the children with that ID.
+        """
+        ids = dict()
+        for name, obj in self.group.items():
+            id_ = obj.attrs.get("entity_id")
+            if id_ is None:
+                continue
+            if isinstance(id_, bytes):
+                id_ = id_.decode()
+            ids.setdefault(id_, []).append(name)
+        return ids
+
     def get_by_pos(self, pos):
         if not self.group:
             raise IndexError
 
+        names = self.child_names()
+        if not -len(names) <= pos < len(names):
+            raise IndexError
+        return self.get_by_name(names[pos])
+
+    def child_names(self):
+        """
+        Returns the names of the children of the group in creation order
+        (or in name order for groups that do not track the creation order).
+        The list is cached until children are added or removed and must not
+        be modified.
+        """
+        if self.group is None:
+            return []
+        return h5cache.child_names(self.group, self._read_child_names)
+
+    def _read_child_names(self):
+        names = list()
+
+        def collect(name):
+            names.append(name.decode("utf-8"))
+
         # Using low level interface to specify iteration order
-        name, _ = self.group.id.links.iterate(lambda n: n,
-                                              idx_type=h5py.h5.INDEX_CRT_ORDER,
-                                              order=h5py.h5.ITER_INC,
-                                              idx=pos)
-        return self.get_by_name(name)
+        try:
+            self.group.id.links.iterate(collect,
+                                        idx_type=h5py.h5.INDEX_CRT_ORDER,
+                                        order=h5py.h5.ITER_INC)
+        except (KeyError, RuntimeError, ValueError):
+            # creation order is not tracked
+            del names[:]
+            self.group.id.links.iterate(collect,
+                                        idx_type=h5py.h5.INDEX_NAME,
+                                        order=h5py.h5.ITER_INC)
+        return names
 
     def delete(self, id_or_name):
         """
@@ -219,6 +386,8 @@ class H5Group(object):
             del self.group[name]
         except Exception:
             raise ValueError("Error deleting {} ".format(name))
+        h5cache.invalidate(self.group, "data", name)
+        h5cache.remove_link(self.group, name)
         # Delete if empty and non-root container
         groupdepth = len(self.group.name.split("/")) - 1
         if not len(self.group) and groupdepth > 1:
@@ -231,6 +400,14 @@ class H5Group(object):
         Deletes all references to a given list of objects, identified by their
         entity_id, below the current object.
         """
+        links = self._find_links(eid)
+        if links is not None:
+            for owner, name in links:
+                del owner[name]
+                h5cache.remove_link(owner, name)
+            h5cache.clear(self._group)
+            return
+
         # Use visit_items to traverse groups and check their children.
         # visit_items visits each item only once, so instead of checking
         # whether each item is the one we're searching for, we check whether
@@ -248,6 +425,51 @@ class H5Group(object):
                     del grp[ch.name]
 
         self._group.visititems(delete_by_id)
+        h5cache.clear(self._group)
+
+    def _find_links(self, eid):
+        """
+        Returns all links to the objects with the given IDs as a list of
+        (h5py.Group, name) tuples, using the reference index of the file.
+        Returns None if the file has no reference index or if an ID belongs
+        to more than one object (e.g., after copying with keep_id), in which
+        case only the links below the current object may be deleted and the
+        tree needs to be searched.
+        """
+        index = h5cache.lookup_refs(self._group)
+        if index is None:
+            return None
+        h5file = self._group.file
+        links = []
+        for id_ in set(eid):
+            target = None
+            for owner, name in index.links(h5file, id_):
+                objid = h5cache.objkey(owner[name])
+                if target is None:
+                    target = objid
+                elif objid != target:
+                    return None
+                links.append((owner, name))
+        return links
+
+    def find_referrers(self, id_, name=None):
+        """
+        Returns the groups that hold a link to the object with the given
+        entity_id, including the container that holds the object itself.
+        Uses the reverse reference index of the file.
+
+        :param id_: the entity_id of the link target
+        :param name: only consider links with this name (e.g., "metadata")
+        :return: list of H5Group objects
+        """
+        index = h5cache.lookup_refs(self.group)
+        if index is None:
+            index = h5cache.H5RefIndex()
+        referrers = []
+        for owner, lname in index.links(self.group.file, id_):
+            if name is None or lname == name:
+                referrers.append(self.create_from_h5obj(owner))
+        return referrers
 
     def set_attr(self, name, value):
         self._create_h5obj()
@@ -256,14 +478,37 @@ class H5Group(object):
                 del self.group.attrs[name]
         else:
             self.group.attrs[name] = value
+        h5cache.invalidate(self.group, "attr", name)
+        if name == "entity_id" and value is not None:
+            h5cache.add_link(self._parent, self.name, value)
+
+    def set_attrs(self, attrs):
+        """
+        Sets several attributes at once. Strings and numbers are written
+        through the low level HDF5 interface, reusing the attribute types,
+        which is considerably faster than writing them one by one with
+        set_attr. Attributes with a value of None are removed.
+
+        :param attrs: the attribute names and values
+        :type attrs: dict
+        """
+        if self._group is None:
+            self._create_h5obj()
+        write_attrs(self._group, attrs)
+        if attrs.get("entity_id") is not None:
+            h5cache.add_link(self._parent, self.name, attrs["entity_id"])
 
     def get_attr(self, name):
         if self.group is None:
             return None
-        attr = self.group.attrs.get(name)
-        if isinstance(attr, bytes):
-            attr = attr.decode()
-        return attr
+
+        def read():
+            attr = self.group.attrs.get(name)
+            if isinstance(attr, bytes):
+                attr = attr.decode()
+            return attr
+
+        return h5cache.cached(self.group, "attr", name, read)
 
     def find_children(self, filtr=None, limit=None):
         result = []
@@ -287,6 +532,10 @@ class H5Group(object):
         dest_grp = dest.group[cls]
         grp.copy(source=source, dest=dest_grp, name=name, shallow=shallow)
 
+        # the destination may be in a different file than the source
+        for h5obj in (grp, dest_grp):
+            h5cache.clear(h5obj)
+            h5cache.clear_index(h5obj)
         g = dest_grp[name]
         g.attrs["name"] = name
         if not keep_id:
@@ -356,12 +605,14 @@ class H5Group(object):
     def __iter__(self):
         if not len(self):
             return
-        for grp in self.group.values():
-            yield self.create_from_h5obj(grp)
+        group = self.group
+        for name in list(self.child_names()):
+            yield self._wrap_child(name, group[name])
 
     def __contains__(self, item):
         if self.group is None:
             return False
+        h5cache.accessed(self.group)
         return item in self.group
 
     def __len__(self):
@@ -372,6 +623,8 @@ class H5Group(object):
 
     def __delitem__(self, key):
         del self.group[key]
+        h5cache.invalidate(self.group, "data", key)
+        h5cache.remove_link(self.group, key)
 
     def __str__(self):
         return "<H5Group object: {}>".format(self.group.name)
@@ -7,6 +7,9 @@
 # modification, are permitted under the terms of the BSD License. See
 # LICENSE file in the root of the Project.
 import warnings
+
+import numpy as np
+
 from .tag import BaseTag, FeatureContainer
 from .container import LinkContainer
 from .feature import Feature
@@ -17,6 +20,8 @@ from .link_type import LinkType
 from .exceptions import (OutOfBounds, IncompatibleDimensions,
                          UninitializedEntity)
 from .section import Section
+from .util.intervals import IntervalIndex
+from .hdf5 import h5cache
 
 
 class MultiTag(BaseTag):
@@ -108,6 +113,61 @@ class MultiTag(BaseTag):
             self._features = FeatureContainer("features", self, Feature)
         return self._features
 
+    def _intervals(self, dimension):
+        """
+        The starts and stops of all tagged regions along one dimension or
+        None if the positions do not cover the dimension.
+        """
+        positions = np.asarray(self.positions[:], dtype=np.float64)
+        if positions.ndim == 1:
+            positions = positions.reshape(-1, 1)
+        if dimension >= positions.shape[1]:
+            return None
+        starts = positions[:, dimension]
+        stops = starts
+        extents = self.extents
+        if extents is not None:
+            extents = np.asarray(extents[:], dtype=np.float64)
+            if extents.ndim == 1:
+                extents = extents.reshape(-1, 1)
+            if dimension < extents.shape[1]:
+                stops = starts + extents[:len(starts), dimension]
+        return starts, stops
+
+    def positions_in_range(self, start, stop, dimension=0):
+        """
+        Finds the positions whose tagged regions overlap the range
+        ``[start, stop]`` along one dimension. A position without an extent
+        overlaps the range if it lies within it. Start and stop are given in
+        the units of the positions.
+
+        The positions are indexed when this method is first called and the
+        index is reused until the positions or extents are modified.
+
+        :param start: The start of the range.
+        :param stop: The stop of the range.
+        :param dimension: The dimension (column of the positions) along which
+                          the range is given.
+        :type dimension: int
+
+        :returns: The indices of the matching positions in increasing order.
+        :rtype: numpy.ndarray of int64
+        """
+        def build():
+            intervals = self._intervals(dimension)
+            if intervals is None:
+                return None
+            return IntervalIndex(*intervals)
+
+        index = h5cache.derived(self._h5group.group,
+                                ("positions", dimension), build)
+        if index is None:
+            raise IncompatibleDimensions(
+                "Positions do not have dimension {}".format(dimension),
+                "MultiTag.positions_in_range"
+            )
+        return index.overlapping(start, stop)
+
     def _get_slice(self, data, index):
         offset, count = self._get_offset_and_count(data, index)
         sl = tuple(slice(o, o+c) for o, c in zip(offset, count))
@@ -147,30 +207,195 @@ class MultiTag(BaseTag):
         else:
             dimpos = positions[index, 0:len(data.dimensions)]
         units = self.units
+        if extents:
+            extent = extents[index, 0:len(data.dimensions)]
         starts, stops = list(), list()
         for idx in range(dimpos.size):
             dim = data.dimensions[idx]
             unit = None
             if idx <= len(units) and len(units):
                 unit = units[idx]
-            starts.append(self._pos_to_idx(dimpos.item(idx), unit, dim))
+            pos = dimpos.item(idx)
+            if extents and idx < extent.size:
+                # convert start and end in one go
+                start, stop = self._pos_to_idx_array((pos, pos + extent[idx]),
+                                                     unit, dim)
+                starts.append(int(start))
+                stops.append(max(int(stop) + 1, starts[-1] + 1))
+            else:
+                starts.append(self._pos_to_idx(pos, unit, dim))
+                if not extents:
+                    stops.append(starts[-1] + 1)
 
-        if extents:
-            extent = extents[index, 0:len(data.dimensions)]
-            for idx in range(extent.size):
-                dim = data.dimensions[idx]
-                unit = None
-                if idx <= len(units) and len(units):
-                    unit = units[idx]
-                stop = self._pos_to_idx(dimpos.item(idx) + extent[idx],
-                                        unit, dim)
-                stop += 1
-                minstop = starts[idx] + 1
-                stops.append(max(stop, minstop))
+        return tuple(slice(start, stop) for start, stop in zip(starts, stops))
+
+    def _calc_data_slices_batch(self, data, posidx=None):
+        """
+        Vectorised counterpart of _calc_data_slices. Reads positions, extents
+        and units once and converts the requested positions to index ranges
+        for every dimension of ``data``.
+
+        :returns: Tuple of (starts, stops), each an int64 array of shape
+                  (number of positions, number of data dimensions).
+        """
+        positions = self.positions
+        extents = self.extents
+        ndim = len(data.dimensions)
+        incdim_exception = IncompatibleDimensions(
+            "Number of dimensions in positions does not match "
+            "dimensionality of data",
+            "MultiTag._calc_data_slices_batch"
+        )
+
+        def as_matrix(arr):
+            arr = np.asarray(arr[:], dtype=np.float64)
+            if arr.ndim == 1:
+                if ndim != 1:
+                    raise incdim_exception
+                arr = arr.reshape(-1, 1)
+            if arr.shape[1] > ndim:
+                raise incdim_exception
+            return arr
+
+        pos = as_matrix(positions)
+        ext = as_matrix(extents) if extents else None
+
+        if posidx is None:
+            posidx = np.arange(len(pos))
         else:
-            stops = [start+1 for start in starts]
+            posidx = np.asarray(posidx, dtype=np.int64).reshape(-1)
+            if np.any(posidx >= len(pos)) or np.any(posidx < 0):
+                raise OutOfBounds("Index out of bounds of positions!")
+        pos = pos[posidx]
+        if ext is not None:
+            if np.any(posidx >= len(ext)):
+                raise OutOfBounds("Index out of bounds of extents!")
+            ext = ext[posidx]
 
-        return tuple(slice(start, stop) for start, stop in zip(starts, stops))
+        units = self.units
+        dataextent = data.data_extent
+        starts = np.zeros((len(posidx), ndim), dtype=np.int64)
+        stops = np.empty((len(posidx), ndim), dtype=np.int64)
+        stops[:] = dataextent
+        for idx in range(pos.shape[1]):
+            dim = data.dimensions[idx]
+            unit = units[idx] if idx < len(units) else None
+            starts[:, idx] = self._pos_to_idx_array(pos[:, idx], unit, dim)
+            if ext is not None and idx < ext.shape[1]:
+                stop = self._pos_to_idx_array(pos[:, idx] + ext[:, idx],
+                                              unit, dim) + 1
+                stops[:, idx] = np.maximum(stop, starts[:, idx] + 1)
+            else:
+                stops[:, idx] = starts[:, idx] + 1
+
+        return starts, stops
+
+    @staticmethod
+    def _coalesce_slices(starts, stops):
+        """
+        Groups index ranges whose hyperslabs overlap so that each group can
+        be read with a single hyperslab selection. Ranges are sorted along
+        one dimension, in which they may also be adjacent; in all other
+        dimensions they must overlap. A range is only added to a group if
+        the merged hyperslab holds at most twice as many elements as the
+        ranges in it, otherwise it is read on its own.
+
+        :returns: A list of (members, start, stop) tuples, where members are
+                  the row indices into starts/stops covered by the hyperslab
+                  given by start and stop.
+        """
+        if not len(starts):
+            return []
+        # merge along the dimension in which the positions vary the most
+        axis = int(np.argmax(np.ptp(starts, axis=0)))
+        others = np.arange(starts.shape[1]) != axis
+        sizes = np.prod(stops - starts, axis=1)
+        order = np.argsort(starts[:, axis], kind="mergesort")
+        groups = []
+        members = [order[0]]
+        gstart = starts[order[0]].copy()
+        gstop = stops[order[0]].copy()
+        gsize = sizes[order[0]]
+        for idx in order[1:]:
+            start, stop = starts[idx], stops[idx]
+            if (start[axis] <= gstop[axis] and
+                    np.all(start[others] < gstop[others]) and
+                    np.all(stop[others] > gstart[others])):
+                mstart = np.minimum(gstart, start)
+                mstop = np.maximum(gstop, stop)
+                msize = gsize + sizes[idx]
+                if np.prod(mstop - mstart) <= 2 * msize:
+                    members.append(idx)
+                    gstart, gstop, gsize = mstart, mstop, msize
+                    continue
+            groups.append((members, gstart, gstop))
+            members = [idx]
+            gstart = start.copy()
+            gstop = stop.copy()
+            gsize = sizes[idx]
+        groups.append((members, gstart, gstop))
+        return groups
+
+    def tagged_data_batch(self, refidx, posidx=None, padded=False,
+                          fill_value=None):
+        """
+        Retrieves the data tagged by many positions of the MultiTag in a
+        single pass. Positions, extents and units are read only once, all
+        positions are converted to index ranges at once and overlapping
+        ranges are read from the file with a single hyperslab selection,
+        unless it would hold more than twice as many elements as the ranges.
+
+        Positions given as a 1D DataArray are treated as one position per
+        entry when the referenced data is 1D.
+
+        :param refidx: Index, name or id of the referenced DataArray.
+        :param posidx: Indices of the positions to retrieve (default: all).
+        :type posidx: list of int
+        :param padded: If True, return a single array with one row per
+                       position, padded to the largest extent, together with
+                       the shape of each tagged region.
+        :type padded: bool
+        :param fill_value: The value used for padding. Defaults to NaN for
+                           floating point data and 0 otherwise.
+
+        :returns: A list of numpy arrays, one for each position, or a tuple
+                  (data, shapes) if padded is True, where shapes is an
+                  int array of shape (number of positions, data dimensions).
+        """
+        references = self.references
+        if len(references) == 0:
+            raise OutOfBounds("There are no references in this multitag!")
+        ref = references[refidx]
+
+        starts, stops = self._calc_data_slices_batch(ref, posidx)
+        if np.any(stops > np.asarray(ref.data_extent, dtype=np.int64)):
+            raise OutOfBounds("References data slice out of the extent of the "
+                              "DataArray!")
+
+        result = [None] * len(starts)
+        for members, gstart, gstop in self._coalesce_slices(starts, stops):
+            sl = tuple(slice(b, e) for b, e in zip(gstart, gstop))
+            chunk = ref._read_data(sl)
+            # regions read together are copied out of the shared block, so
+            # that they do not alias each other or keep the block in memory
+            shared = len(members) > 1 and not padded
+            for idx in members:
+                local = tuple(slice(b - gb, e - gb) for b, e, gb in
+                              zip(starts[idx], stops[idx], gstart))
+                result[idx] = chunk[local].copy() if shared else chunk[local]
+
+        if not padded:
+            return result
+
+        shapes = stops - starts
+        dtype = result[0].dtype if result else ref.dtype
+        if fill_value is None:
+            fill_value = np.nan if np.issubdtype(dtype, np.floating) else 0
+        maxshape = tuple(shapes.max(axis=0)) if len(shapes) else ()
+        out = np.full((len(result),) + maxshape, fill_value, dtype=dtype)
+        for idx, chunk in enumerate(result):
+            out[(idx,) + tuple(slice(0, c) for c in chunk.shape)] = chunk
+        return out, shapes
 
     def retrieve_data(self, posidx, refidx):
         msg = ("Call to deprecated method MultiTag.retrieve_data. "
@@ -21,6 +21,73 @@ from .entity import Entity
 from . import util
 
 
+# DataType of each Python or numpy type of property values, filled when a
+# type is first seen by value_dtype
+_value_dtypes = dict()
+
+# the DataType of numpy arrays of property values by their dtype kind
+_kind_dtypes = {"b": DataType.Bool, "i": DataType.Int64, "u": DataType.Int64,
+                "f": DataType.Float, "U": DataType.String,
+                "S": DataType.String}
+
+# optional attributes of properties and the types of their values
+_attr_checks = (("unit", str), ("definition", str), ("uncertainty", Number),
+                ("reference", str), ("dependency", str),
+                ("dependency_value", str), ("value_origin", str))
+
+
+def value_dtype(values):
+    """
+    Returns the DataType of a list of property values and raises a TypeError
+    if the values are of different DataTypes. Each value is only looked at
+    to collect the set of their Python types; DataType.get_dtype is called
+    once for each type.
+
+    :param values: the values of a property
+    :type values: list or numpy.ndarray
+
+    :returns: the DataType of the values
+    """
+    if isinstance(values, np.ndarray) and values.dtype.kind in _kind_dtypes:
+        return _kind_dtypes[values.dtype.kind]
+    dtypes = set()
+    for type_ in set(map(type, values)):
+        dtype = _value_dtypes.get(type_)
+        if dtype is None:
+            value = next(v for v in values if type(v) is type_)
+            dtype = DataType.get_dtype(value)
+            _value_dtypes[type_] = dtype
+        dtypes.add(dtype)
+    if len(dtypes) > 1:
+        raise TypeError("Array contains inconsistent values.")
+    return dtypes.pop()
+
+
+def legacy_layout(version):
+    """
+    Returns True if the properties of files with the given format version
+    store their values, uncertainty and reference in compound datasets, as
+    files written before format version 1.1.1 do.
+
+    :param version: The file format version.
+    :type version: tuple of int
+    """
+    return tuple(version) < (1, 1, 1)
+
+
+def _uses_legacy_layout(section, h5obj):
+    """
+    Returns legacy_layout for the file containing a section, using the value
+    the File object resolved when it was opened if the section belongs to
+    one.
+    """
+    nixfile = section.file if section is not None else None
+    legacy = getattr(nixfile, "_legacy_properties", None)
+    if legacy is None:
+        legacy = legacy_layout(h5obj.file.attrs["version"])
+    return legacy
+
+
 class OdmlType(Enum):
     """
     OdmlType provides all types currently supported by the odML
@@ -95,6 +162,7 @@ class Property(Entity):
     def __init__(self, nixparent, h5dataset):
         super(Property, self).__init__(nixparent, h5dataset)
         self._h5dataset = self._h5group
+        self._legacy = None
 
     @classmethod
     def _create_new(cls, nixparent, h5parent, name, dtype, oid=None):
@@ -110,11 +178,80 @@ class Property(Entity):
         h5dataset.set_attr("entity_id", oid)
 
         newentity = cls(nixparent, h5dataset)
-        newentity.force_created_at()
-        newentity.force_updated_at()
+        t = util.now_int()
+        newentity.force_created_at(t)
+        newentity.force_updated_at(t)
 
         return newentity
 
+    @classmethod
+    def _create_batch(cls, nixparent, h5parent, names, values, dtypes, attrs,
+                      stamp, oids):
+        """
+        Creates several properties at once. Properties of the same DataType
+        share the dataset layout of the first one, and the attributes of each
+        property are written together.
+
+        :param values: the values of each property as a 1D numpy array
+        :param dtypes: the DataType of each property
+        :param attrs: the checked optional attributes of each property
+        :param stamp: the creation time string of all properties
+        :param oids: the ids of the properties, None to create new ids
+        """
+        templates = dict()
+        entities = list()
+        for name, vals, dtype, pattrs, oid in zip(names, values, dtypes,
+                                                  attrs, oids):
+            shape = (len(vals), )
+            if dtype in templates:
+                dataset = h5parent.create_dataset_like(name, templates[dtype],
+                                                       shape)
+            else:
+                # same layout as properties created with _create_new
+                dataset = h5parent.create_dataset(name, (0, ),
+                                                  cls._make_h5_dtype(dtype))
+                templates[dtype] = dataset
+                if len(vals):
+                    dataset.shape = shape
+            if len(vals):
+                dataset.write_data(vals)
+            if not util.is_uuid(oid):
+                oid = util.create_id()
+            entity_attrs = {"name": name, "entity_id": oid,
+                            "created_at": stamp, "updated_at": stamp}
+            entity_attrs.update(pattrs)
+            dataset.set_attrs(entity_attrs)
+            entities.append(cls(nixparent, dataset))
+        return entities
+
+    @staticmethod
+    def _check_attrs(attrs, first=None):
+        """
+        Checks the optional attributes of a property given in a dict and
+        returns them in the form they are stored in. ``first`` is a value of
+        the property to check the odml_type against.
+        """
+        checked = dict()
+        for key, type_ in _attr_checks:
+            value = attrs.get(key)
+            if value is None:
+                continue
+            util.check_attr_type(value, type_)
+            if key == "unit":
+                value = util.units.sanitizer(value) or None
+            elif key == "uncertainty":
+                value = float(value)
+            checked[key] = value
+        otype = attrs.get("odml_type")
+        if otype is not None:
+            if not isinstance(otype, OdmlType):
+                otype = OdmlType(otype)
+            if first is not None and not otype.compatible(first):
+                raise TypeError("Type '{}' is incompatible "
+                                "with property values".format(otype))
+            checked["odml_type"] = str(otype)
+        return checked
+
     @property
     def name(self):
         return self._h5dataset.get_attr("name")
@@ -145,9 +282,7 @@ class Property(Entity):
 
     @property
     def uncertainty(self):
-        dataset = self._h5dataset
-        x, y, z = dataset._parent.file.attrs["version"]
-        if x < 1 or (x == 1 and y < 1) or (x == 1 and y == 1 and z < 1):
+        if self._legacy_layout:
             val = self._h5dataset.dataset[:]
             v = val[0]["uncertainty"]
             return v
@@ -161,9 +296,7 @@ class Property(Entity):
 
     @property
     def reference(self):
-        dataset = self._h5dataset
-        x, y, z = dataset._parent.file.attrs["version"]
-        if x < 1 or (x == 1 and y < 1) or (x == 1 and y == 1 and z < 1):
+        if self._legacy_layout:
             val = self._h5dataset.dataset[:]
             v = val[0]["reference"]
             return v
@@ -227,34 +360,49 @@ class Property(Entity):
 
         self._h5dataset.set_attr("odml_type", str(new_type))
 
-    def _read_old_values(self):
-        val = self._h5dataset.dataset[:]
-        val_tu = tuple()
-        for v in val:
-            v = v["value"]
-            val_tu += (v,)
-        return val_tu
-
     @property
-    def values(self):
+    def _legacy_layout(self):
+        if self._legacy is None:
+            self._legacy = _uses_legacy_layout(self._parent,
+                                               self._h5dataset.dataset)
+        return self._legacy
+
+    def _read_values(self):
         dataset = self._h5dataset
-        x, y, z = dataset._parent.file.attrs["version"]
-        if x < 1 or (x == 1 and y < 1) or (x == 1 and y == 1 and z < 1):
-            v = self._read_old_values()
-            return v
+        if self._legacy_layout:
+            return dataset.dataset[:]["value"]
         if not sum(dataset.shape):
-            return tuple()
-
-        data = dataset.read_data()
+            return None
+        return dataset.read_data()
 
-        def data_to_value(dat):
-            if isinstance(dat, bytes):
-                dat = dat.decode()
-            return dat
+    @property
+    def values(self):
+        data = self._read_values()
+        if data is None:
+            return tuple()
+        if data.dtype.kind == "O" and not self._legacy_layout:
+            # variable length strings are read as bytes
+            return tuple([v.decode() if isinstance(v, bytes) else v
+                          for v in data])
+        return tuple(data)
 
-        values = tuple(map(data_to_value, data))
+    @property
+    def values_array(self):
+        """
+        The values of the property as a 1D numpy array, which is faster than
+        reading the tuple of values when the array is processed further.
+        String values are returned as an array of Python strings
+        (dtype object). This is a read-only property.
 
-        return values
+        :type: numpy.ndarray
+        """
+        data = self._read_values()
+        if data is None:
+            return np.empty(0, dtype=self._h5dataset.dtype)
+        if data.dtype.kind == "O" and not self._legacy_layout:
+            return np.array([v.decode() if isinstance(v, bytes) else v
+                             for v in data], dtype=object)
+        return np.asarray(data)
 
     @values.setter
     def values(self, vals):
@@ -291,7 +439,7 @@ class Property(Entity):
 
         arr = np.array(data, dtype=vtype).flatten('C')
         ds = self._h5dataset
-        src_len = len(self.values)
+        src_len = ds.shape[0]
         dlen = len(arr)
         ds.shape = (src_len+dlen,)
         ds.write_data(arr, sl=np.s_[src_len: src_len+dlen])
@@ -11,15 +11,18 @@ try:
 except ImportError:
     from sys import maxsize as maxint
 try:
-    from collections.abc import Sequence, Iterable
+    from collections.abc import Sequence, Iterable, Mapping
 except ImportError:
-    from collections import Sequence, Iterable
+    from collections import Sequence, Iterable, Mapping
+from collections import OrderedDict
 from six import string_types
+import h5py
 import numpy as np
 from .container import Container, SectionContainer
 from .datatype import DataType
 from .entity import Entity
-from .property import Property
+from .property import (Property, OdmlType, value_dtype,
+                       _uses_legacy_layout)
 from .util import find as finders
 from . import util
 from . import exceptions
@@ -46,6 +49,14 @@ class S(object):
         return getattr(self.section, item)
 
 
+# optional attributes of sections and properties that are exported by
+# Section.to_dict
+_section_attrs = ("definition", "reference", "repository")
+_property_attrs = ("unit", "definition", "uncertainty", "reference",
+                   "dependency", "dependency_value", "value_origin",
+                   "odml_type")
+
+
 class Section(Entity):
 
     def __init__(self, nixparent, h5group):
@@ -53,6 +64,7 @@ class Section(Entity):
         self._sec_parent = None
         self._sections = None
         self._properties = None
+        self._file = None
 
     @classmethod
     def _create_new(cls, nixparent, h5parent, name, type_, oid=None):
@@ -216,6 +228,50 @@ class Section(Entity):
 
         return self.sections[sec.attrs["entity_id"]]
 
+    def update_from_dict(self, tree, keep_ids=False):
+        """
+        Adds the properties and child sections described by a nested dict to
+        the section. This is much faster than creating them one by one: the
+        values are checked for the whole tree before anything is written,
+        the groups and attributes of new entities are written through the
+        batch methods of the backend, and properties of the same data type
+        share their dataset layout.
+
+        The dict has the form returned by to_dict::
+
+            {"type": "subject", "definition": "...",
+             "properties": {"species": "mouse",
+                            "weight": {"values": [21.5], "unit": "g"}},
+             "sections": {"session1": {"type": "session", ...}}}
+
+        All keys are optional. Properties are given by their values or by a
+        dict with the values and the attributes of the property; a property
+        without values requires a "dtype". Existing properties get the new
+        values and existing child sections are updated recursively. Instead
+        of a dict, an odML-style Section object with ``properties`` and
+        ``sections`` attributes can be given.
+
+        :param tree: The properties and child sections.
+        :type tree: dict
+        :param keep_ids: Use the ids in the tree ("id" keys) for the new
+                         entities instead of creating new ones.
+        :type keep_ids: bool
+        """
+        plan = _plan_section(tree, keep_ids)
+        _import_section(self, plan, util.time_to_str(util.now_int()), False)
+
+    def to_dict(self):
+        """
+        Returns the section with its properties and child sections as a
+        nested dict, in the form accepted by update_from_dict. The tree is
+        read in one traversal of the file, without creating Section and
+        Property objects.
+
+        :rtype: OrderedDict
+        """
+        group = self._h5group.group
+        return _export_section(group, _uses_legacy_layout(self, group))
+
     @property
     def reference(self):
         return self._h5group.get_attr("reference")
@@ -314,10 +370,12 @@ class Section(Entity):
 
         :type: File
         """
-        par = self._parent
-        while isinstance(par, Entity):
-            par = par._parent
-        return par
+        if self._file is None:
+            par = self._parent
+            while isinstance(par, Entity):
+                par = par._parent
+            self._file = par
+        return self._file
 
     @property
     def referring_objects(self):
@@ -332,59 +390,57 @@ class Section(Entity):
 
     @property
     def referring_blocks(self):
-        f = self.file
-        return list(blk for blk in f.blocks
-                    if blk.metadata is not None and blk.metadata.id == self.id)
+        ids = self._referring_ids()
+        return list(blk for blk in self.file.blocks if blk.id in ids)
 
     @property
     def referring_groups(self):
-        f = self.file
-        groups = []
-        for blk in f.blocks:
-            groups.extend(grp for grp in blk.groups
-                          if (grp.metadata is not None and
-                              grp.metadata.id == self.id))
-        return groups
+        return self._referring_entities("groups")
 
     @property
     def referring_data_arrays(self):
-        f = self.file
-        data_arrays = []
-        for blk in f.blocks:
-            data_arrays.extend(da for da in blk.data_arrays
-                               if (da.metadata is not None and
-                                   da.metadata.id == self.id))
-        return data_arrays
+        return self._referring_entities("data_arrays")
 
     @property
     def referring_tags(self):
-        f = self.file
-        tags = []
-        for blk in f.blocks:
-            tags.extend(tg for tg in blk.tags
-                        if (tg.metadata is not None and
-                            tg.metadata.id == self.id))
-        return tags
+        return self._referring_entities("tags")
 
     @property
     def referring_multi_tags(self):
-        f = self.file
-        multi_tags = []
-        for blk in f.blocks:
-            multi_tags.extend(mt for mt in blk.multi_tags
-                              if (mt.metadata is not None and
-                                  mt.metadata.id == self.id))
-        return multi_tags
+        return self._referring_entities("multi_tags")
 
     @property
     def referring_sources(self):
-        f = self.file
-        sources = []
-        for blk in f.blocks:
-            sources.extend(src for src in blk.sources
-                           if (src.metadata is not None and
-                               src.metadata.id == self.id))
-        return sources
+        return self._referring_entities("sources")
+
+    def _referring_ids(self):
+        """
+        Returns the IDs of all objects whose metadata is this section, using
+        the reverse reference index of the file.
+        """
+        referrers = self._h5group.find_referrers(self.id, "metadata")
+        return list(grp.get_attr("entity_id") for grp in referrers)
+
+    def _referring_entities(self, containername):
+        ids = self._referring_ids()
+        entities = []
+        if not ids:
+            return entities
+        for blk in self.file.blocks:
+            container = getattr(blk, containername)
+            found = []
+            for id_ in ids:
+                try:
+                    found.append(container[id_])
+                except KeyError:
+                    pass
+            if len(found) > 1:
+                # in the order of the container, as when iterating over it
+                order = dict((name, pos) for pos, name in
+                             enumerate(container._backend.child_names()))
+                found.sort(key=lambda entity: order[entity.name])
+            entities.extend(found)
+        return entities
 
     def find_sections(self, filtr=lambda _: True, limit=None):
         """
@@ -543,3 +599,258 @@ class Section(Entity):
         if "entity_id" in grp.attrs:
             id_ = util.create_id()
             grp.attrs.modify("entity_id", np.string_(id_))
+
+
+def _as_tree(obj):
+    """
+    Returns the dict describing a section given as a dict, a Section or an
+    odML-style object with ``properties`` and ``sections`` attributes.
+    """
+    if isinstance(obj, Mapping):
+        return obj
+    if isinstance(obj, Section):
+        return obj.to_dict()
+    tree = dict()
+    for key in ("type", "id") + _section_attrs:
+        value = getattr(obj, key, None)
+        if value is not None:
+            tree[key] = value
+    props = OrderedDict()
+    for prop in getattr(obj, "properties", None) or ():
+        spec = {"values": list(prop.values)}
+        for key in ("id", ) + _property_attrs[:-1]:
+            value = getattr(prop, key, None)
+            if value is not None:
+                spec[key] = value
+        odml_type = getattr(prop, "dtype", None)
+        if odml_type in ("date", "time", "datetime"):
+            spec["values"] = [str(v) for v in spec["values"]]
+        if odml_type in set(str(t) for t in OdmlType):
+            spec["odml_type"] = odml_type
+        props[prop.name] = spec
+    tree["properties"] = props
+    tree["sections"] = OrderedDict(
+        (sec.name, sec) for sec in getattr(obj, "sections", None) or ())
+    return tree
+
+
+def _named_trees(trees):
+    """
+    Returns the names and trees of sections given as a dict of names and
+    trees, an odML-style document with a ``sections`` attribute or a list
+    of Sections or odML-style sections.
+    """
+    if isinstance(trees, Mapping):
+        return list(trees.items())
+    if hasattr(trees, "sections") and not isinstance(trees, Section):
+        trees = trees.sections
+    elif isinstance(trees, Section):
+        trees = [trees]
+    return [(sec.name, sec) for sec in trees]
+
+
+def _data_type(name):
+    if name in ("str", "string", DataType.String, str):
+        return DataType.String
+    return np.dtype(name).type
+
+
+def _plan_property(spec, keep_ids):
+    """
+    Checks the values and attributes of a property and returns them in the
+    form they are written in: the values as a 1D array, their DataType, the
+    attributes and the id.
+    """
+    if isinstance(spec, Mapping):
+        values = spec.get("values")
+        attrs = spec
+    else:
+        values = spec
+        attrs = dict()
+    if values is None:
+        values = []
+    elif (isinstance(values, string_types) or
+          not isinstance(values, (Sequence, Iterable))):
+        values = [values]
+    elif not isinstance(values, (np.ndarray, list)):
+        values = list(values)
+
+    if len(values):
+        dtype = value_dtype(values)
+    elif attrs.get("dtype") is not None:
+        dtype = _data_type(attrs["dtype"])
+    else:
+        raise TypeError(
+            "Please provide either a non empty value or a DataType."
+        )
+    if dtype == DataType.String:
+        data = np.array(values, dtype=object).reshape(-1)
+    else:
+        data = np.asarray(values, dtype=dtype).reshape(-1)
+    first = data[0] if len(data) else None
+    oid = attrs.get("id") if keep_ids else None
+    return data, dtype, Property._check_attrs(attrs, first), oid
+
+
+def _plan_section(tree, keep_ids):
+    """
+    Checks a tree of sections and properties and returns it in the form it
+    is written in by _import_section.
+    """
+    tree = _as_tree(tree)
+    type_ = tree.get("type")
+    if type_ is not None:
+        util.check_entity_type(type_)
+    attrs = dict()
+    for key in _section_attrs:
+        value = tree.get(key)
+        if value is not None:
+            util.check_attr_type(value, str)
+            attrs[key] = value
+    props = list()
+    for name, spec in (tree.get("properties") or dict()).items():
+        util.check_entity_name(name)
+        props.append((name, ) + _plan_property(spec, keep_ids))
+    sections = list()
+    for name, child in _named_trees(tree.get("sections") or dict()):
+        util.check_entity_name(name)
+        sections.append((name, _plan_section(child, keep_ids)))
+    return {"type": type_, "attrs": attrs,
+            "id": tree.get("id") if keep_ids else None,
+            "props": props, "sections": sections}
+
+
+def _import_section(section, plan, stamp, created):
+    """
+    Writes the attributes, properties and child sections of a planned tree
+    to a section, which was just created if ``created`` is True.
+    """
+    h5group = section._h5group
+    if not created:
+        attrs = dict(plan["attrs"])
+        if plan["type"] is not None:
+            attrs["type"] = plan["type"]
+        if attrs:
+            h5group.set_attrs(attrs)
+    names = list()
+    if plan["props"]:
+        names.append("properties")
+    if plan["sections"]:
+        names.append("sections")
+    if created and names:
+        groups = dict(zip(names, h5group.create_groups(names)))
+    else:
+        groups = dict((name, h5group.open_group(name, True))
+                      for name in names)
+
+    props = plan["props"]
+    if props:
+        propgroup = groups["properties"]
+        existing = set() if created else set(propgroup.group)
+        new = [prop for prop in props if prop[0] not in existing]
+        for name, data, _, attrs, _ in props:
+            if name in existing:
+                prop = section.props[name]
+                prop.values = data.tolist()
+                if attrs:
+                    prop._h5dataset.set_attrs(attrs)
+        if new:
+            names, values, dtypes, attrs, oids = zip(*new)
+            Property._create_batch(section, propgroup, names, values, dtypes,
+                                   attrs, stamp, oids)
+    if plan["sections"]:
+        _import_sections(section, groups["sections"], plan["sections"], stamp)
+
+
+def _import_sections(nixparent, h5parent, plans, stamp):
+    """
+    Creates or updates the sections of planned trees in the group
+    ``h5parent``, which contains the child sections of ``nixparent``, and
+    returns them.
+    """
+    existing = set(h5parent.group) if h5parent.group is not None else set()
+    new = [(name, plan) for name, plan in plans if name not in existing]
+    created = dict()
+    if new:
+        h5groups = h5parent.create_groups([name for name, _ in new])
+        for (name, plan), h5group in zip(new, h5groups):
+            oid = plan["id"]
+            if not util.is_uuid(oid):
+                oid = util.create_id()
+            attrs = {"name": name, "type": plan["type"] or "undefined",
+                     "entity_id": oid, "created_at": stamp,
+                     "updated_at": stamp}
+            attrs.update(plan["attrs"])
+            h5group.set_attrs(attrs)
+            created[name] = h5group
+    sections = list()
+    for name, plan in plans:
+        if name in created:
+            section = Section(nixparent, created[name])
+        else:
+            section = Section(nixparent, h5parent.open_group(name))
+        if isinstance(nixparent, Section):
+            section._sec_parent = nixparent
+        _import_section(section, plan, stamp, name in created)
+        sections.append(section)
+    return sections
+
+
+def _import_trees(nixparent, h5parent, trees, keep_ids):
+    plans = [(name, _plan_section(tree, keep_ids))
+             for name, tree in _named_trees(trees)]
+    for name, _ in plans:
+        util.check_entity_name(name)
+    return _import_sections(nixparent, h5parent, plans,
+                            util.time_to_str(util.now_int()))
+
+
+def _export_property(dataset, old):
+    spec = OrderedDict()
+    attrs = dataset.attrs
+    values = list()
+    if dataset.shape and dataset.shape[0]:
+        data = dataset[()]
+        if old and data.dtype.names:
+            for key in ("uncertainty", "reference"):
+                if key in data.dtype.names:
+                    spec[key] = util.decode_value(data[0][key])
+            data = data["value"]
+        values = data.tolist()
+        if data.dtype.kind in "OS":
+            values = [util.decode_value(v) for v in values]
+    spec["values"] = values
+    if not values:
+        if h5py.check_string_dtype(dataset.dtype) is not None:
+            spec["dtype"] = "str"
+        else:
+            spec["dtype"] = dataset.dtype.name
+    present = set(attrs)
+    for key in _property_attrs:
+        if key in present:
+            spec[key] = util.decode_value(attrs[key])
+    spec["id"] = util.decode_value(attrs.get("entity_id"))
+    return spec
+
+
+def _export_section(group, old):
+    attrs = group.attrs
+    tree = OrderedDict()
+    tree["name"] = util.decode_value(attrs.get("name"))
+    tree["type"] = util.decode_value(attrs.get("type"))
+    tree["id"] = util.decode_value(attrs.get("entity_id"))
+    present = set(attrs)
+    for key in _section_attrs:
+        if key in present:
+            tree[key] = util.decode_value(attrs[key])
+    props = OrderedDict()
+    if "properties" in group:
+        for name, dataset in group["properties"].items():
+            props[name] = _export_property(dataset, old)
+    tree["properties"] = props
+    sections = OrderedDict()
+    if "sections" in group:
+        for name, child in group["sections"].items():
+            sections[name] = _export_section(child, old)
+    tree["sections"] = sections
+    return tree
@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+# Copyright © 2020, German Neuroinformatics Node (G-Node)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the Project.
+"""
+Index of the metadata Sections of a file and the values of their
+Properties, for selecting Sections by type and property values without
+reading every Property.
+
+The index can be stored in the hidden group INDEX_GROUP of the file. It
+records the ``updated_at`` time and the number of Properties of each
+Section; when the index is loaded, Sections for which either changed are
+read again. Changes made through nixio while the index is loaded are
+tracked and the affected Sections are read again before the next query.
+"""
+from numbers import Number
+
+import h5py
+import numpy as np
+from six import string_types
+
+from .util import query
+from .util.util import decode_value
+
+
+INDEX_GROUP = ".metadata_index"
+INDEX_VERSION = 1
+
+
+def _is_number(value):
+    return isinstance(value, (Number, np.number)) and \
+        not isinstance(value, string_types)
+
+
+def _read_strings(dataset):
+    return [decode_value(v) for v in dataset[()]]
+
+
+def _section_path(path):
+    """
+    Returns the HDF5 path of the Section group that contains the object at
+    ``path`` or None if the path is not inside a Section, e.g.,
+    "/metadata/a/sections/b/properties/p" gives "/metadata/a/sections/b".
+    Sections are also reached through the "metadata" links of other
+    entities.
+    """
+    parts = path.split("/")
+    for idx in range(1, len(parts)):
+        if parts[idx] == "metadata" and parts[idx - 1] != "properties":
+            break
+    else:
+        return None
+    # the root of the metadata tree contains sections, the metadata link of
+    # another entity is a section
+    end = idx + 1 if idx == 1 else idx
+    if end >= len(parts):
+        return None
+    while end + 2 < len(parts) and parts[end + 1] == "sections":
+        end += 2
+    return "/".join(parts[:end + 1])
+
+
+class _Entry(object):
+    """
+    The indexed state of one Section.
+    """
+
+    __slots__ = ("id", "type", "stamp", "props")
+
+    def __init__(self, id_, type_, stamp, props):
+        self.id = id_
+        self.type = type_
+        self.stamp = stamp
+        self.props = props
+
+
+class SectionIndex(object):
+    """
+    Index of the Sections of an open file, keyed by their path of names
+    below the metadata root (names of nested sections are joined by "/").
+
+    :param h5file: The h5py File.
+    """
+
+    group = INDEX_GROUP
+
+    def __init__(self, h5file):
+        self._h5file = h5file
+        self._entries = None
+        self._arrays = None
+        self._dirty = set()
+        self._changed = False
+        self._marked = False
+
+    @property
+    def persisted(self):
+        return INDEX_GROUP in self._h5file
+
+    @property
+    def modified(self):
+        """
+        True if the file was modified since the stored index was written.
+        """
+        return bool(self._h5file[INDEX_GROUP].attrs.get("dirty", 0))
+
+    def mark(self, path):
+        """
+        Records that the object at the given HDF5 path was modified.
+        """
+        if path is None:
+            return
+        secpath = _section_path(path)
+        if secpath is not None:
+            self._dirty.add(secpath)
+        elif path == "/" or path.startswith("/metadata") or \
+                path.endswith("/metadata"):
+            # sections may have been created or deleted
+            self._changed = True
+        else:
+            return
+        if not self._marked:
+            if self.persisted:
+                # tell future sessions that the stored index may be outdated
+                self._h5file[INDEX_GROUP].attrs["dirty"] = 1
+            self._marked = True
+
+    def refresh(self):
+        """
+        Brings the index up to date with the file.
+        """
+        if self._entries is None:
+            self._entries = self._load()
+            if self._entries is None:
+                self._entries = self._scan(dict(), reread=True)
+            else:
+                reread = self._h5file[INDEX_GROUP].attrs.get("dirty", 0)
+                self._entries = self._scan(self._entries, reread=bool(reread))
+            self._dirty.clear()
+            self._changed = False
+            self._arrays = None
+        elif self._dirty or self._changed:
+            ids = set()
+            for path in self._dirty:
+                obj = self._h5file.get(path)
+                if obj is not None:
+                    ids.add(decode_value(obj.attrs.get("entity_id")))
+            self._entries = self._scan(self._entries, reread=False, ids=ids)
+            self._dirty.clear()
+            self._changed = False
+            self._arrays = None
+
+    def _scan(self, previous, reread, ids=()):
+        """
+        Walks all Sections of the file and reads the Properties of the
+        Sections that are new, changed or listed in ``ids``.
+        """
+        entries = dict()
+        if "metadata" not in self._h5file:
+            return entries
+        stack = [(name, grp)
+                 for name, grp in reversed(list(
+                     self._h5file["metadata"].items()))]
+        while stack:
+            path, grp = stack.pop()
+            attrs = grp.attrs
+            id_ = decode_value(attrs.get("entity_id"))
+            nprops = len(grp["properties"]) if "properties" in grp else 0
+            updated = decode_value(attrs.get("updated_at"))
+            stamp = "{}/{}".format(updated, nprops)
+            old = previous.get(path)
+            if (reread or old is None or old.id != id_ or
+                    old.stamp != stamp or id_ in ids):
+                entries[path] = _Entry(id_, decode_value(attrs.get("type")),
+                                       stamp, self._read_props(grp))
+            else:
+                entries[path] = old
+            if "sections" in grp:
+                children = list(grp["sections"].items())
+                stack.extend(("{}/{}".format(path, name), child)
+                             for name, child in reversed(children))
+        return entries
+
+    @staticmethod
+    def _read_props(grp):
+        props = list()
+        if "properties" not in grp:
+            return props
+        for name, dataset in grp["properties"].items():
+            if not dataset.shape or not sum(dataset.shape):
+                continue
+            data = dataset[()]
+            if data.dtype.names and "value" in data.dtype.names:
+                # values of files older than 1.1.1
+                data = data["value"]
+            props.extend((name, decode_value(v)) for v in np.ravel(data))
+        return props
+
+    def _load(self):
+        if not self.persisted:
+            return None
+        grp = self._h5file[INDEX_GROUP]
+        if grp.attrs.get("version") != INDEX_VERSION:
+            return None
+        paths = _read_strings(grp["paths"])
+        ids = _read_strings(grp["ids"])
+        types = _read_strings(grp["types"])
+        stamps = _read_strings(grp["stamps"])
+        entries = dict((path, _Entry(id_, type_, stamp, list()))
+                       for path, id_, type_, stamp
+                       in zip(paths, ids, types, stamps))
+        rows = grp["value_rows"][()]
+        names = _read_strings(grp["value_names"])
+        isnum = grp["value_isnum"][()]
+        nums = grp["value_nums"][()]
+        strs = _read_strings(grp["value_strs"])
+        for row, name, isn, num, string in zip(rows, names, isnum, nums,
+                                               strs):
+            entries[paths[row]].props.append((name, num if isn else string))
+        return entries
+
+    def save(self):
+        """
+        Stores the index in the file, replacing a stored index.
+        """
+        self.refresh()
+        if self.persisted:
+            del self._h5file[INDEX_GROUP]
+        grp = self._h5file.create_group(INDEX_GROUP)
+        arrays = self._compile()
+        strdt = h5py.special_dtype(vlen=str)
+
+        def strings(name, values):
+            grp.create_dataset(name, data=np.array(values, dtype=object),
+                               dtype=strdt)
+
+        paths = arrays["paths"]
+        strings("paths", paths)
+        strings("ids", [self._entries[p].id or "" for p in paths])
+        strings("types", [self._entries[p].type or "" for p in paths])
+        strings("stamps", [self._entries[p].stamp for p in paths])
+        grp.create_dataset("value_rows", data=arrays["rows"])
+        strings("value_names", arrays["names"])
+        grp.create_dataset("value_isnum", data=arrays["isnum"])
+        grp.create_dataset("value_nums", data=arrays["nums"])
+        strings("value_strs", arrays["strs"])
+        grp.attrs["version"] = INDEX_VERSION
+        grp.attrs["dirty"] = 0
+        self._marked = False
+
+    def _compile(self):
+        if self._arrays is not None:
+            return self._arrays
+        paths = list(self._entries)
+        rows, names, isnum, nums, strs = [], [], [], [], []
+        for row, path in enumerate(paths):
+            for name, value in self._entries[path].props:
+                rows.append(row)
+                names.append(name)
+                if _is_number(value):
+                    isnum.append(True)
+                    nums.append(float(value))
+                    strs.append("")
+                else:
+                    isnum.append(False)
+                    nums.append(np.nan)
+                    strs.append(str(value))
+        self._arrays = {
+            "paths": paths,
+            "types": np.array([self._entries[p].type for p in paths],
+                              dtype=object),
+            "rows": np.array(rows, dtype=np.int64),
+            "names": np.array(names, dtype=object),
+            "isnum": np.array(isnum, dtype=bool),
+            "nums": np.array(nums, dtype=np.float64),
+            "strs": np.array(strs, dtype=object),
+        }
+        return self._arrays
+
+    def query(self, type_=None, props=None):
+        """
+        Returns the paths of the Sections of the given type whose Properties
+        match all conditions in ``props``, in depth first order. See
+        File.query_sections for the conditions.
+        """
+        self.refresh()
+        arrays = self._compile()
+        match = np.ones(len(arrays["paths"]), dtype=bool)
+        if type_ is not None:
+            match &= arrays["types"] == type_
+        for name, cond in (props or dict()).items():
+            op, value = _condition(cond)
+            sel = np.flatnonzero(arrays["names"] == name)
+            hits = _match_values(op, value, arrays["isnum"][sel],
+                                 arrays["nums"][sel], arrays["strs"][sel])
+            found = np.zeros(len(match), dtype=bool)
+            found[arrays["rows"][sel][hits]] = True
+            match &= found
+        return [arrays["paths"][idx] for idx in np.flatnonzero(match)]
+
+
+def _condition(cond):
+    if isinstance(cond, tuple) and len(cond) == 2 and \
+            isinstance(cond[0], string_types):
+        op, value = cond
+    elif isinstance(cond, (list, set, frozenset)):
+        op, value = "in", cond
+    else:
+        op, value = "==", cond
+    if op not in query._comparisons and op not in ("in", "not in"):
+        raise ValueError("Unsupported operator {}".format(op))
+    return op, value
+
+
+def _match_values(op, value, isnum, nums, strs):
+    """
+    Compares property values, given as numbers (where isnum is True) and
+    strings, with a condition.
+    """
+    if op in ("in", "not in"):
+        numvals = [float(v) for v in value if _is_number(v)]
+        strvals = [v for v in value if isinstance(v, string_types)]
+        hits = ((isnum & np.isin(nums, numvals)) |
+                (~isnum & np.isin(strs, strvals)))
+        return ~hits if op == "not in" else hits
+    if _is_number(value):
+        with np.errstate(invalid="ignore"):
+            return isnum & query.evaluate(("cmp", "v", op, float(value)),
+                                          {"v": nums})
+    if isinstance(value, string_types):
+        hits = np.zeros(len(strs), dtype=bool)
+        hits[~isnum] = query.evaluate(("cmp", "v", op, value),
+                                      {"v": strs[~isnum]})
+        return hits
+    raise TypeError("Property values can only be compared with numbers and "
+                    "strings")
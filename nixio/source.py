@@ -58,15 +58,30 @@ class Source(Entity):
 
     @property
     def referring_data_arrays(self):
-        return [da for da in self._parent.data_arrays if self in da.sources]
+        return self._referring_entities(self._parent.data_arrays)
 
     @property
     def referring_tags(self):
-        return [tg for tg in self._parent.tags if self in tg.sources]
+        return self._referring_entities(self._parent.tags)
 
     @property
     def referring_multi_tags(self):
-        return [mt for mt in self._parent.multi_tags if self in mt.sources]
+        return self._referring_entities(self._parent.multi_tags)
+
+    def _referring_entities(self, container):
+        """
+        Returns the entities of the given container that link to this source,
+        using the reverse reference index of the file. Sources are linked
+        under their ID in the "sources" group of the referring entity.
+        """
+        entities = []
+        for grp in self._h5group.find_referrers(self.id, self.id):
+            id_ = grp.parent.get_attr("entity_id")
+            try:
+                entities.append(container[id_])
+            except KeyError:
+                pass
+        return entities
 
     def find_sources(self, filtr=lambda _: True, limit=None):
         """
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+# Copyright © 2020, German Neuroinformatics Node (G-Node)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the Project.
+from numbers import Integral
+
+import numpy as np
+
+from .compression import Compression
+
+
+DEFAULT_CHUNK_BYTES = 1024 * 1024
+
+
+def _itemsize(dtype):
+    return max(np.dtype(dtype).itemsize, 1)
+
+
+def _extent(n):
+    # datasets that are created empty are meant to grow; use a guess for the
+    # extent of such dimensions, like h5py does
+    return n if n > 0 else 1024
+
+
+class TargetSizeChunks(object):
+    """
+    Chunk shape with (approximately) the given size in bytes and the same
+    proportions as the dataset. The chunk is shrunk by halving its largest
+    dimension until it fits.
+
+    :param nbytes: The target chunk size in bytes.
+    """
+
+    def __init__(self, nbytes=DEFAULT_CHUNK_BYTES):
+        self.nbytes = nbytes
+
+    def __call__(self, shape, dtype):
+        chunks = [_extent(n) for n in shape]
+        itemsize = _itemsize(dtype)
+        while np.prod(chunks) * itemsize > self.nbytes:
+            idx = int(np.argmax(chunks))
+            if chunks[idx] == 1:
+                break
+            chunks[idx] = (chunks[idx] + 1) // 2
+        return tuple(chunks)
+
+
+class AppendChunks(object):
+    """
+    Chunk shape for data that grows along one axis (e.g., time-major
+    recordings that are appended to). A chunk spans the full extent of all
+    other dimensions and as many entries along ``axis`` as fit into
+    ``nbytes``, so that each append touches as few chunks as possible.
+
+    :param axis: The axis the data grows along.
+    :param nbytes: The target chunk size in bytes.
+    """
+
+    def __init__(self, axis=0, nbytes=DEFAULT_CHUNK_BYTES):
+        self.axis = axis
+        self.nbytes = nbytes
+
+    def __call__(self, shape, dtype):
+        chunks = [max(n, 1) for n in shape]
+        other = int(np.prod(chunks)) // chunks[self.axis]
+        chunks[self.axis] = max(self.nbytes // (_itemsize(dtype) * other), 1)
+        return tuple(chunks)
+
+
+class AxisChunks(object):
+    """
+    Chunk shape for reading along one axis, one entry of the other
+    dimensions at a time (e.g., reading single channels from a recording of
+    shape (time, channels) with ``axis=0``). A chunk holds a single entry of
+    every other dimension and as many entries along ``axis`` as fit into
+    ``nbytes``, so that reading one channel does not touch the data of the
+    others.
+
+    :param axis: The axis that is read contiguously.
+    :param nbytes: The target chunk size in bytes.
+    """
+
+    def __init__(self, axis=0, nbytes=DEFAULT_CHUNK_BYTES):
+        self.axis = axis
+        self.nbytes = nbytes
+
+    def __call__(self, shape, dtype):
+        chunks = [1] * len(shape)
+        length = max(self.nbytes // _itemsize(dtype), 1)
+        if shape[self.axis] > 0:
+            length = min(length, shape[self.axis])
+        chunks[self.axis] = length
+        return tuple(chunks)
+
+
+class StoragePolicy(object):
+    """
+    Describes how the data of DataArrays is stored in the file: the chunk
+    shape and the filters that are applied to each chunk. A policy can be
+    set on the File, on a Block, or passed to Block.create_data_array.
+
+    :param chunks: The chunk shape. Either None, to let the backend guess a
+                   shape, a tuple with one entry per dimension, or a callable
+                   that takes the shape and dtype of the dataset and returns
+                   a tuple (e.g., AppendChunks, AxisChunks or
+                   TargetSizeChunks). False stores the data contiguously,
+                   without chunks; such data cannot be resized or
+                   compressed, but can be memory mapped (see
+                   DataArray.as_memmap).
+    :param compression: The compression to use when none is requested
+                        explicitly (default: Auto, i.e., inherit the setting
+                        of the Block or File).
+    :param level: The compression level for Deflate compression (0 to 9),
+                  overriding the level implied by the Compression value.
+    :param shuffle: Enable the byte shuffle filter, which often improves
+                    the compression ratio of numeric data.
+    :param fletcher32: Store a checksum with each chunk.
+    """
+
+    def __init__(self, chunks=None, compression=Compression.Auto, level=None,
+                 shuffle=False, fletcher32=False):
+        if level is not None:
+            if not isinstance(level, Integral) or not 0 <= level <= 9:
+                raise ValueError("Compression level must be an integer "
+                                 "between 0 and 9")
+        compression = Compression(compression)
+        if chunks is False:
+            if compression not in (Compression.Auto, Compression.No):
+                raise ValueError("Contiguous data cannot be compressed")
+            if shuffle or fletcher32:
+                raise ValueError("Filters require chunked data")
+            compression = Compression.No
+        self.chunks = chunks
+        self.compression = compression
+        self.level = level
+        self.shuffle = shuffle
+        self.fletcher32 = fletcher32
+
+    @classmethod
+    def time_major(cls, axis=0, nbytes=DEFAULT_CHUNK_BYTES, **kwargs):
+        """
+        Policy for data that is appended to along ``axis``.
+        """
+        return cls(chunks=AppendChunks(axis, nbytes), **kwargs)
+
+    @classmethod
+    def per_channel(cls, axis=0, nbytes=DEFAULT_CHUNK_BYTES, **kwargs):
+        """
+        Policy for data that is read one channel at a time, where ``axis``
+        is the axis that is read contiguously (e.g., time).
+        """
+        return cls(chunks=AxisChunks(axis, nbytes), **kwargs)
+
+    @classmethod
+    def target_size(cls, nbytes, **kwargs):
+        """
+        Policy for chunks of about ``nbytes`` bytes.
+        """
+        return cls(chunks=TargetSizeChunks(nbytes), **kwargs)
+
+    @classmethod
+    def contiguous(cls):
+        """
+        Policy for data of a fixed size that is stored contiguously, e.g., to
+        memory map it when reading.
+        """
+        return cls(chunks=False)
+
+    def chunk_shape(self, shape, dtype):
+        """
+        Returns the chunk shape for a dataset with the given shape and dtype,
+        True if the backend should guess the chunk shape, or None for
+        contiguous data.
+        """
+        chunks = self.chunks
+        if chunks is False:
+            return None
+        if chunks is None or chunks is True:
+            return True
+        if callable(chunks):
+            chunks = chunks(shape, dtype)
+        chunks = tuple(int(c) for c in chunks)
+        if len(chunks) != len(shape):
+            raise ValueError(
+                "Chunk shape {} does not match the dimensionality of the "
+                "data {}".format(chunks, shape)
+            )
+        if any(c < 1 for c in chunks):
+            raise ValueError("Chunk dimensions must be positive: "
+                             "{}".format(chunks))
+        return chunks
+
+    def dataset_args(self, shape, dtype):
+        """
+        Returns the keyword arguments for creating a dataset with the given
+        shape and dtype in the backend.
+        """
+        return {"chunks": self.chunk_shape(shape, dtype),
+                "level": self.level,
+                "shuffle": self.shuffle,
+                "fletcher32": self.fletcher32}
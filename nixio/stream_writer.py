@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# Copyright © 2020, German Neuroinformatics Node (G-Node)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the Project.
+import numpy as np
+
+
+DEFAULT_BUFFER_BYTES = 4 * 1024 * 1024
+
+
+class StreamWriter(object):
+    """
+    Buffered writer for appending data to a DataArray or DataFrame along one
+    axis. Appended blocks are collected in a preallocated buffer and written
+    to the file in large pieces, which are sized to whole chunks of the
+    dataset. The dataset is grown geometrically, so that it is resized
+    rarely, and trimmed to the data that was actually written when the
+    writer is flushed or closed.
+
+    StreamWriters are created with ``DataSet.stream_writer`` and are best
+    used as a context manager::
+
+        with da.stream_writer(axis=0) as writer:
+            for block in acquisition:
+                writer.append(block)
+
+    Until the writer is flushed or closed, the extent of the dataset in the
+    file may be larger than the data written so far.
+
+    :param dataset: The DataArray or DataFrame to append to.
+    :param axis: The axis along which the data is appended.
+    :param buffer_bytes: The size of the write buffer in bytes.
+    """
+
+    def __init__(self, dataset, axis=0, buffer_bytes=DEFAULT_BUFFER_BYTES):
+        self._h5dataset = dataset._h5group.get_dataset("data")
+        shape = tuple(self._h5dataset.shape)
+        if not shape:
+            raise ValueError("Cannot append to scalar data")
+        if not -len(shape) <= axis < len(shape):
+            raise ValueError("Invalid axis {} for data with {} "
+                             "dimensions".format(axis, len(shape)))
+        self.axis = axis % len(shape)
+        self._shape = shape
+        self._dtype = self._h5dataset.dtype
+        self._length = shape[self.axis]
+        self._allocated = shape[self.axis]
+
+        # size the buffer to hold whole chunks along the axis
+        bufshape = list(shape)
+        bufshape[self.axis] = 1
+        slicebytes = max(int(np.prod(bufshape)) * self._dtype.itemsize, 1)
+        nslices = max(buffer_bytes // slicebytes, 1)
+        chunks = self._h5dataset.dataset.chunks
+        self._chunklen = chunks[self.axis] if chunks is not None else 1
+        nslices = max(nslices // self._chunklen, 1) * self._chunklen
+        bufshape[self.axis] = nslices
+        self._buffer = np.empty(bufshape, dtype=self._dtype)
+        self._buffered = 0
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        """
+        The length of the data along the axis, including buffered data.
+        """
+        return self._length + self._buffered
+
+    def _along_axis(self, start, stop):
+        return tuple(slice(start, stop) if i == self.axis else slice(None)
+                     for i in range(len(self._shape)))
+
+    def _prepare(self, data):
+        if self._dtype.names is not None and not (
+                isinstance(data, np.ndarray) and data.dtype == self._dtype):
+            # rows of a DataFrame given as sequences
+            data = np.array([tuple(row) for row in data], dtype=self._dtype)
+        else:
+            data = np.asarray(data, dtype=self._dtype)
+        if data.ndim == len(self._shape) - 1:
+            # a single slice along the axis
+            data = np.expand_dims(data, self.axis)
+        if data.ndim != len(self._shape):
+            raise ValueError(
+                "Data and DataArray must have the same dimensionality"
+            )
+        if any(s != ds for i, (s, ds) in enumerate(zip(self._shape,
+                                                       data.shape))
+               if i != self.axis):
+            raise ValueError("Shape of data and shape of DataArray must match "
+                             "in all dimension but axis!")
+        return data
+
+    def append(self, data):
+        """
+        Appends ``data`` along the axis of the writer. The shape of the data
+        must match the shape of the dataset in all other dimensions. A single
+        slice along the axis may be given without the axis dimension.
+
+        :param data: The data to append.
+        """
+        if self.closed:
+            raise ValueError("Cannot append to a closed StreamWriter")
+        data = self._prepare(data)
+        count = data.shape[self.axis]
+        bufsize = self._buffer.shape[self.axis]
+        if self._buffered + count > bufsize:
+            self._write_buffer()
+        if count >= bufsize:
+            # too large for the buffer, write through
+            self._write(data)
+            return
+        target = self._along_axis(self._buffered, self._buffered + count)
+        self._buffer[target] = data
+        self._buffered += count
+        if self._buffered == bufsize:
+            self._write_buffer()
+
+    def _write_buffer(self):
+        if self._buffered:
+            self._write(self._buffer[self._along_axis(0, self._buffered)])
+            self._buffered = 0
+
+    def _write(self, data):
+        count = data.shape[self.axis]
+        end = self._length + count
+        if end > self._allocated:
+            # grow geometrically, by at least one chunk
+            allocated = max(end, 2 * self._allocated,
+                            self._allocated + self._chunklen)
+            self._resize(allocated)
+        self._h5dataset.write_data(data, self._along_axis(self._length, end))
+        self._length = end
+
+    def _resize(self, length):
+        shape = list(self._shape)
+        shape[self.axis] = length
+        self._h5dataset.shape = tuple(shape)
+        self._allocated = length
+
+    def flush(self):
+        """
+        Writes all buffered data to the file and trims the dataset to the
+        data written.
+        """
+        self._write_buffer()
+        if self._allocated != self._length:
+            self._resize(self._length)
+
+    def close(self):
+        """
+        Flushes the writer. Further appends are not possible.
+        """
+        if not self.closed:
+            self.flush()
+            self._buffer = None
+            self.closed = True
@@ -115,7 +115,11 @@ class BaseTag(Entity):
         return np.all(np.less_equal(stops, dasize))
 
     @staticmethod
-    def _pos_to_idx(pos, unit, dim):
+    def _unit_scaling(unit, dim):
+        """
+        Checks that a position given in ``unit`` can be applied to ``dim``
+        and returns the factor that converts it to the unit of the dimension.
+        """
         dimtype = dim.dimension_type
         if dimtype == DimensionType.Set:
             dimunit = None
@@ -137,19 +141,12 @@ class BaseTag(Entity):
                         "Cannot apply a position with unit to a SetDimension",
                         "Tag._pos_to_idx"
                     )
-
-            index = dim.index_of(pos * scaling)
         elif dimtype == DimensionType.Set:
             if unit and unit != "none":
                 raise IncompatibleDimensions(
                     "Cannot apply a position with unit to a SetDimension",
                     "Tag._pos_to_idx"
                 )
-            index = np.round(pos)
-            nlabels = len(dim.labels)
-            if nlabels and index > nlabels:
-                raise OutOfBounds("Position is out of bounds in SetDimension",
-                                  pos)
         else:  # dimtype == DimensionType.Range:
             if dimunit and unit is not None:
                 try:
@@ -159,10 +156,43 @@ class BaseTag(Entity):
                         "Provided units are not scalable!",
                         "Tag._pos_to_idx"
                     )
+        return scaling
+
+    @classmethod
+    def _pos_to_idx(cls, pos, unit, dim):
+        scaling = cls._unit_scaling(unit, dim)
+        if dim.dimension_type == DimensionType.Set:
+            index = np.round(pos)
+            nlabels = len(dim.labels)
+            if nlabels and index > nlabels:
+                raise OutOfBounds("Position is out of bounds in SetDimension",
+                                  pos)
+        else:
             index = dim.index_of(pos * scaling)
 
         return int(index)
 
+    @classmethod
+    def _pos_to_idx_array(cls, positions, unit, dim):
+        """
+        Vectorised version of _pos_to_idx: converts an array of positions
+        along one dimension to an array of indices.
+        """
+        positions = np.asarray(positions, dtype=DataType.Double)
+        scaling = cls._unit_scaling(unit, dim)
+        dimtype = dim.dimension_type
+        if dimtype == DimensionType.Set:
+            index = np.round(positions)
+            nlabels = len(dim.labels)
+            if nlabels and np.any(index > nlabels):
+                pos = positions[np.argmax(index > nlabels)]
+                raise OutOfBounds("Position is out of bounds in SetDimension",
+                                  pos)
+        else:
+            index = dim.index_of(positions * scaling)
+
+        return index.astype(np.int64)
+
 
 class Tag(BaseTag):
 
@@ -220,23 +250,42 @@ class Tag(BaseTag):
         if self._parent._parent.time_auto_update:
             self.force_updated_at()
 
+    def _intervals(self, dimension):
+        """
+        The start and stop of the tagged region along one dimension, as
+        arrays of one element each, or None if the position of the tag does
+        not cover the dimension.
+        """
+        position = self.position
+        if dimension >= len(position):
+            return None
+        extent = self.extent
+        start = position[dimension]
+        stop = start
+        if dimension < len(extent):
+            stop = start + extent[dimension]
+        return np.array([start]), np.array([stop])
+
     def _calc_data_slices(self, data):
         refslice = list()
         position = self.position
         extent = self.extent
+        units = self.units
         for idx, (pos, dim) in enumerate(zip(position, data.dimensions)):
-            if self.units:
-                unit = self.units[idx]
+            if units:
+                unit = units[idx]
             else:
                 unit = None
-            start = self._pos_to_idx(pos, unit, dim)
-            stop = 0
             if idx < len(extent):
-                ext = extent[idx]
-                stop = self._pos_to_idx(pos + ext, unit, dim) + 1
-            if stop == 0:
+                # convert start and end in one go
+                start, stop = self._pos_to_idx_array(
+                    (pos, pos + extent[idx]), unit, dim
+                )
+                stop += 1
+            else:
+                start = self._pos_to_idx(pos, unit, dim)
                 stop = start + 1
-            refslice.append(slice(start, stop))
+            refslice.append(slice(int(start), int(stop)))
         return tuple(refslice)
 
     def retrieve_data(self, refidx):
@@ -8,6 +8,7 @@
 # LICENSE file in the root of the Project.
 import os
 import unittest
+import numpy as np
 import nixio as nix
 from .tmp import TempDir
 
@@ -87,6 +88,91 @@ class TestBlock(unittest.TestCase):
 
         assert(len(self.block.data_arrays) == 0)
 
+    def test_block_create_data_arrays(self):
+        data = np.random.random((5, 10))
+        sampled = {"dimension_type": "sample", "sampling_interval": 0.1,
+                   "unit": "s", "label": "time"}
+        das = self.block.create_data_arrays(
+            ["unit{}".format(idx) for idx in range(5)], "spikes", data=data,
+            units="mV", dimensions=[sampled]
+        )
+        assert(len(das) == 5)
+        assert(len(self.block.data_arrays) == 5)
+        single = self.other.create_data_array("unit0", "spikes", data=data[0])
+        single.unit = "mV"
+        single.append_sampled_dimension(0.1, label="time", unit="s")
+        for idx, da in enumerate(das):
+            assert(self.block.data_arrays["unit{}".format(idx)] == da)
+            np.testing.assert_array_equal(da[:], data[idx])
+            assert(da.unit == "mV")
+            assert(da.created_at == da.updated_at)
+            assert(len(da.dimensions) == 1)
+            dim = da.dimensions[0]
+            assert(dim.dimension_type == nix.DimensionType.Sample)
+            assert(dim.sampling_interval == 0.1)
+            assert(dim.unit == "s" and dim.label == "time")
+        # the attributes are stored like those of single DataArrays
+        for name in ("name", "type", "entity_id", "created_at", "unit"):
+            bulk = das[0]._h5group.group.attrs.get_id(name)
+            ref = single._h5group.group.attrs.get_id(name)
+            assert(bulk.get_type() == ref.get_type())
+        bulkdim = das[0]._h5group.group["dimensions/1"].attrs
+        refdim = single._h5group.group["dimensions/1"].attrs
+        assert(sorted(bulkdim) == sorted(refdim))
+        for name in refdim:
+            assert(bulkdim.get_id(name).get_type() ==
+                   refdim.get_id(name).get_type())
+
+        das = self.block.create_data_arrays(
+            ["range", "set"], ["a", "b"], dtypes=[nix.DataType.Int16, None],
+            shapes=[(3, ), (2, 4)], labels=["x", None],
+            dimensions=[[{"dimension_type": nix.DimensionType.Range,
+                          "ticks": [1, 2, 5]}],
+                        [{"dimension_type": "set", "labels": ["a", "b"]},
+                         {"dimension_type": "sample",
+                          "sampling_interval": 1.0}]]
+        )
+        assert(das[0].dtype == np.int16 and das[0].shape == (3, ))
+        assert(das[1].dtype == np.float64 and das[1].shape == (2, 4))
+        assert(das[0].label == "x" and das[1].label is None)
+        assert(das[0].dimensions[0].ticks == (1, 2, 5))
+        assert(das[1].dimensions[0].labels == ("a", "b"))
+        assert(das[1].dimensions[1].sampling_interval == 1.0)
+
+        das = self.block.create_data_arrays(["nodims"], "a", shapes=(2, 3))
+        assert(das[0].shape == (2, 3) and len(das[0].dimensions) == 0)
+
+        self.assertRaises(nix.exceptions.DuplicateName,
+                          self.block.create_data_arrays, ["unit1"], "a",
+                          shapes=(1, ))
+        self.assertRaises(nix.exceptions.DuplicateName,
+                          self.block.create_data_arrays, ["x", "x"], "a",
+                          shapes=(1, ))
+        self.assertRaises(ValueError, self.block.create_data_arrays,
+                          ["x", "y"], "a", shapes=[(1, )])
+        self.assertRaises(ValueError, self.block.create_data_arrays,
+                          ["x"], "a", shapes=(1, ),
+                          dimensions=[{"dimension_type": "sample"}])
+        assert(len(self.block.data_arrays) == 8)
+
+        # copies of earlier arrays keep the order and are independent
+        names = ["c{}".format(idx) for idx in range(6)]
+        das = self.other.create_data_arrays(
+            names, "copies", data=np.arange(12.).reshape(6, 2),
+            units=["mV", "mV", "s", "mV", "s", "mV"], dimensions=[sampled]
+        )
+        assert([da.name for da in self.other.data_arrays][1:] == names)
+        assert(len(set(da.id for da in das)) == 6)
+        assert([da.unit for da in das] == ["mV", "mV", "s", "mV", "s", "mV"])
+        das[3].unit = "V"
+        das[3].dimensions[0].sampling_interval = 0.5
+        for idx, da in enumerate(das):
+            assert(self.other.data_arrays[da.id].name == names[idx])
+            np.testing.assert_array_equal(da[:], [2 * idx, 2 * idx + 1])
+            if idx != 3:
+                assert(da.unit in ("mV", "s"))
+                assert(da.dimensions[0].sampling_interval == 0.1)
+
     def test_block_multi_tags(self):
         assert(len(self.block.multi_tags) == 0)
 
@@ -128,6 +214,58 @@ class TestBlock(unittest.TestCase):
 
         assert(len(self.block.tags) == 0)
 
+    def test_block_find_tags_in_range(self):
+        da = self.block.create_data_array("trace", "signal",
+                                          data=np.zeros(1000))
+        da.append_sampled_dimension(0.001).unit = "s"
+        other = self.block.create_data_array("other", "signal",
+                                             data=np.zeros(10))
+        other.append_sampled_dimension(0.001).unit = "s"
+
+        tag = self.block.create_tag("stimulus", "event", [200.])
+        tag.extent = [100.]
+        tag.units = ["ms"]
+        tag.references.append(da)
+        positions = self.block.create_data_array(
+            "spike times", "event", data=[0.05, 0.25, 0.5, 0.9]
+        )
+        mtag = self.block.create_multi_tag("spikes", "event", positions)
+        mtag.references.append(da)
+        untagged = self.block.create_tag("unrelated", "event", [0.25])
+        untagged.references.append(other)
+
+        found = self.block.find_tags_in_range(da, 0.2, 0.3)
+        assert([t.id for t, _ in found] == [tag.id, mtag.id])
+        assert(list(found[0][1]) == [0])
+        assert(list(found[1][1]) == [1])
+
+        assert(self.block.find_tags_in_range(da, 0.31, 0.45) == [])
+        found = self.block.find_tags_in_range(da, 0., 1.)
+        assert(list(found[1][1]) == [0, 1, 2, 3])
+
+        # the index follows changes of the tags
+        positions.write_direct(np.array([0.05, 0.35, 0.5, 0.9]))
+        found = self.block.find_tags_in_range(da, 0.31, 0.45)
+        assert([(t.id, list(i)) for t, i in found] == [(mtag.id, [1])])
+
+        # writes the index does not depend on keep it
+        assert(len(self.file._state.derived) == 1)
+        tag.force_updated_at()
+        mtag.force_updated_at()
+        other.write_direct(np.ones(10))
+        self.block.create_data_array("more", "signal", data=[1.])
+        assert(len(self.file._state.derived) == 1)
+
+        tag.extent = [200.]
+        assert(len(self.file._state.derived) == 0)
+        found = self.block.find_tags_in_range(da, 0.31, 0.45)
+        assert([t.id for t, _ in found] == [tag.id, mtag.id])
+        tag.units = ["s"]
+        found = self.block.find_tags_in_range(da, 0.31, 0.45)
+        assert([t.id for t, _ in found] == [mtag.id])
+        del mtag.references[da.id]
+        assert(self.block.find_tags_in_range(da, 0.31, 0.45) == [])
+
     def test_block_sources(self):
         assert(len(self.block.sources) == 0)
 
@@ -219,3 +357,9 @@ class TestBlock(unittest.TestCase):
         self.block.create_multi_tag(name="new mt name", copy_from=mt2)
         assert self.block.multi_tags[0] == mt2
         assert self.block.data_arrays[1] == da2
+        # deleting a copy in another block must not touch the original
+        blk3 = self.file.create_block("copy block", "blk")
+        blk3.create_data_array(copy_from=da2)
+        del blk3.data_arrays[da2.id]
+        assert da2.id not in blk3.data_arrays
+        assert self.block.data_arrays[da2.id].name == "da2"
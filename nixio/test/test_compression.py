@@ -12,10 +12,19 @@ import unittest
 from .tmp import TempDir
 
 
-def compr_enabled(da):
+def compr_filter(da):
     grp = da._h5group.group
     h5data = grp.require_dataset("data", shape=(1,), dtype=int)
-    return h5data.compression == "gzip"
+    return h5data.compression, h5data.compression_opts
+
+
+expected_filters = {
+    nix.Compression.No: (None, None),
+    nix.Compression.DeflateFast: ("gzip", 1),
+    nix.Compression.DeflateNormal: ("gzip", 6),
+    nix.Compression.DeflateBest: ("gzip", 9),
+    nix.Compression.LZF: ("lzf", None),
+}
 
 
 class TestCompression(unittest.TestCase):
@@ -26,11 +35,10 @@ class TestCompression(unittest.TestCase):
                                          "compressiontest.nix")
 
     def tearDown(self):
-        pass
+        self.tmpdir.cleanup()
 
     def test_compress_dataarray(self):
 
-        exception = ValueError("Unknown compression value in test")
         for filecompr in nix.Compression:
             nf = nix.File.open(self.testfilename, nix.FileMode.Overwrite,
                                compression=filecompr)
@@ -42,34 +50,86 @@ class TestCompression(unittest.TestCase):
                                                  "data", data=[0],
                                                  compression=dacompr)
 
-                    if dacompr == nix.Compression.No:
-                        comprenabled = False
-                    elif dacompr == nix.Compression.DeflateNormal:
-                        comprenabled = True
-                    elif dacompr == nix.Compression.Auto:
-                        # inherited from Block setting
-                        if blockcompr == nix.Compression.No:
-                            comprenabled = False
-                        elif blockcompr == nix.Compression.DeflateNormal:
-                            comprenabled = True
-                        elif blockcompr == nix.Compression.Auto:
-                            # inherited from File setting
-                            if filecompr == nix.Compression.No:
-                                comprenabled = False
-                            elif filecompr == nix.Compression.DeflateNormal:
-                                comprenabled = True
-                            elif filecompr == nix.Compression.Auto:
-                                comprenabled = False
-                            else:
-                                raise exception
-                        else:
-                            raise exception
-                    else:
-                        raise exception
+                    # Auto is inherited from the Block and the File setting
+                    expected = dacompr
+                    if expected == nix.Compression.Auto:
+                        expected = blockcompr
+                    if expected == nix.Compression.Auto:
+                        expected = filecompr
+                    if expected == nix.Compression.Auto:
+                        expected = nix.Compression.No
 
                     errmsg = ("Compression: File [{}] Block [{}] Data [{}] "
                               "Expected compression {}".format(
-                                  filecompr, blockcompr, dacompr, comprenabled
+                                  filecompr, blockcompr, dacompr, expected
                               ))
-                    self.assertEqual(compr_enabled(da), comprenabled, errmsg)
+                    self.assertEqual(compr_filter(da),
+                                     expected_filters[expected], errmsg)
             nf.close()
+
+    def test_storage_policy(self):
+        nf = nix.File.open(self.testfilename, nix.FileMode.Overwrite)
+        block = nf.create_block("block", "storage")
+
+        policy = nix.StoragePolicy.per_channel(
+            axis=0, nbytes=8000, compression=nix.Compression.DeflateNormal,
+            level=3, shuffle=True, fletcher32=True
+        )
+        da = block.create_data_array("channels", "data", shape=(5000, 384),
+                                     storage=policy)
+        h5data = da._h5group.group["data"]
+        self.assertEqual(h5data.chunks, (1000, 1))
+        self.assertEqual(h5data.compression, "gzip")
+        self.assertEqual(h5data.compression_opts, 3)
+        self.assertTrue(h5data.shuffle)
+        self.assertTrue(h5data.fletcher32)
+
+        # an explicit compression overrides the one of the policy
+        da = block.create_data_array("uncompressed", "data", shape=(10, 4),
+                                     storage=policy,
+                                     compression=nix.Compression.No)
+        self.assertIsNone(da._h5group.group["data"].compression)
+
+        policy = nix.StoragePolicy.time_major(nbytes=384 * 8 * 100)
+        da = block.create_data_array("append", "data", shape=(0, 384),
+                                     storage=policy)
+        self.assertEqual(da._h5group.group["data"].chunks, (100, 384))
+        da.append([[1.0] * 384] * 250)
+        self.assertEqual(da.shape, (250, 384))
+
+        policy = nix.StoragePolicy.target_size(4096)
+        da = block.create_data_array("target", "data", shape=(1000, 1000),
+                                     dtype=nix.DataType.Int32,
+                                     storage=policy)
+        chunks = da._h5group.group["data"].chunks
+        self.assertLessEqual(chunks[0] * chunks[1] * 4, 4096)
+
+        da = block.create_data_array("fixed", "data", data=range(100),
+                                     storage=nix.StoragePolicy(chunks=(10,)))
+        self.assertEqual(da._h5group.group["data"].chunks, (10,))
+        with self.assertRaises(ValueError):
+            block.create_data_array("bad", "data", shape=(10, 10),
+                                    storage=nix.StoragePolicy(chunks=(10,)))
+        self.assertNotIn("bad", block.data_arrays)
+        with self.assertRaises(ValueError):
+            nix.StoragePolicy(level=10)
+        nf.close()
+
+        # the file policy is the default of new blocks
+        policy = nix.StoragePolicy(chunks=(2, 2),
+                                   compression=nix.Compression.LZF)
+        nf = nix.File.open(self.testfilename, nix.FileMode.Overwrite,
+                           storage=policy)
+        block = nf.create_block("block", "storage")
+        da = block.create_data_array("da", "data", shape=(4, 4))
+        self.assertEqual(da._h5group.group["data"].chunks, (2, 2))
+        self.assertEqual(da._h5group.group["data"].compression, "lzf")
+        nf.close()
+
+        # also for blocks that were created before the file was opened
+        nf = nix.File.open(self.testfilename, nix.FileMode.ReadWrite,
+                           storage=policy)
+        da = nf.blocks["block"].create_data_array("reopened", "data",
+                                                  shape=(4, 4))
+        self.assertEqual(da._h5group.group["data"].chunks, (2, 2))
+        nf.close()
@@ -61,6 +61,66 @@ class TestContainer(unittest.TestCase):
         self.assertEqual(self.group, self.block.groups[0])
         self.assertEqual(self.positions, self.block.data_arrays[1])
 
+    def test_slice_getter(self):
+        names = ["array {}".format(idx) for idx in range(10)]
+        for name in names:
+            self.block.create_data_array(name, "containertest", data=[0])
+        allnames = ["test array", "test pos"] + names
+        self.assertEqual([da.name for da in self.block.data_arrays],
+                         allnames)
+        self.assertEqual([da.name for da in self.block.data_arrays[2:5]],
+                         allnames[2:5])
+        self.assertEqual([da.name for da in self.block.data_arrays[::-3]],
+                         allnames[::-3])
+        self.assertEqual(self.block.data_arrays[-1].name, "array 9")
+        self.assertEqual(self.group.data_arrays[0:1], [self.dataarray])
+
+        # the positions follow creation and deletion of entities
+        del self.block.data_arrays["array 0"]
+        self.assertEqual(self.block.data_arrays[2].name, "array 1")
+        self.block.create_data_array("last", "containertest", data=[0])
+        self.assertEqual(self.block.data_arrays[-1].name, "last")
+        self.assertEqual(len(self.block.data_arrays[:]), 12)
+        self.block.data_arrays[0].append_set_dimension()
+        self.block.data_arrays[0].append_sampled_dimension(1.)
+        self.assertEqual(self.block.data_arrays[0].dimensions[1].index, 2)
+        with self.assertRaises(IndexError):
+            self.block.data_arrays[12]
+
+    def test_id_getter(self):
+        self.assertEqual(self.dataarray,
+                         self.block.data_arrays[self.dataarray.id])
+        self.assertEqual(self.tag, self.block.tags[self.tag.id])
+        self.assertEqual(self.dataarray,
+                         self.group.data_arrays[self.dataarray.id])
+
+        # the id index must follow creation and deletion of entities
+        da = self.block.create_data_array("new array", "containertest",
+                                          data=[1])
+        self.assertIn(da.id, self.block.data_arrays)
+        self.assertEqual(da, self.block.data_arrays[da.id])
+        self.group.data_arrays.append(da)
+        self.assertIn(da.id, self.group.data_arrays)
+
+        daid = da.id
+        del self.block.data_arrays[daid]
+        self.assertNotIn(daid, self.block.data_arrays)
+        self.assertNotIn(daid, self.group.data_arrays)
+        with self.assertRaises(KeyError):
+            self.block.data_arrays[daid]
+        self.assertEqual(self.positions,
+                         self.block.data_arrays[self.positions.id])
+
+        # Sections created with a given id must be found by that id only
+        oid = nix.util.create_id()
+        self.assertNotIn(oid, self.file.sections)
+        sec = self.file.create_section("sec", "containertest", oid=oid)
+        self.assertEqual(sec, self.file.sections[oid])
+        other = sec.create_section("child", "containertest")
+        self.assertEqual(other, sec.sections[other.id])
+        del self.file.sections[oid]
+        self.assertNotIn(oid, self.file.sections)
+
     def test_link_container_name_getter(self):
         self.assertEqual(self.dataarray, self.group.data_arrays["test array"])
         self.assertEqual(self.tag, self.group.tags["test tag"])
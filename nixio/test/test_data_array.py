@@ -281,6 +281,53 @@ class TestDataArray(unittest.TestCase):
         assert(da.dtype == np.dtype('V1'))
         assert(np.array_equal(void_data, da[:]))
 
+    def test_data_array_stream_writer(self):
+        da = self.block.create_data_array("stream", "signal",
+                                          shape=(0, 4),
+                                          dtype=nix.DataType.Int64,
+                                          storage=nix.StoragePolicy(
+                                              chunks=(16, 4)))
+        expected = np.arange(4 * 1000).reshape(1000, 4)
+        with da.stream_writer(buffer_bytes=1024) as writer:
+            for idx in range(0, 990, 10):
+                writer.append(expected[idx:idx+10])
+            for row in expected[990:]:
+                writer.append(row)
+            self.assertEqual(len(writer), 1000)
+            writer.flush()
+            self.assertEqual(da.shape, (1000, 4))
+        self.assertTrue(writer.closed)
+        self.assertEqual(da.shape, (1000, 4))
+        np.testing.assert_array_equal(da[:], expected)
+
+        # a block larger than the buffer is written through
+        with da.stream_writer(buffer_bytes=64) as writer:
+            writer.append(expected[:100])
+        self.assertEqual(da.shape, (1100, 4))
+        np.testing.assert_array_equal(da[1000:], expected[:100])
+
+        with da.stream_writer(axis=1) as writer:
+            writer.append(np.ones((1100, 2)))
+        self.assertEqual(da.shape, (1100, 6))
+        np.testing.assert_array_equal(da[:, 4:], np.ones((1100, 2)))
+
+        self.assertRaises(ValueError, lambda: writer.append([[1] * 6]))
+        writer = da.stream_writer()
+        self.assertRaises(ValueError, lambda: writer.append(np.zeros((3, 4))))
+        self.assertRaises(ValueError,
+                          lambda: writer.append(np.zeros((3, 3, 6))))
+        self.assertRaises(ValueError, lambda: da.stream_writer(axis=2))
+        writer.close()
+
+        positions = self.block.create_data_array("positions", "events",
+                                                 shape=(0, 1))
+        mtag = self.block.create_multi_tag("tags", "events", positions)
+        with mtag.positions.stream_writer() as writer:
+            for pos in range(50):
+                writer.append([pos])
+        self.assertEqual(mtag.positions.shape, (50, 1))
+        np.testing.assert_array_equal(mtag.positions[:, 0], range(50))
+
     def test_data_array_dimensions(self):
         assert(len(self.array.dimensions) == 0)
 
@@ -468,3 +515,132 @@ class TestDataArray(unittest.TestCase):
 
         with self.assertRaises(IndexError):
             da3d.get_slice((0, 0, 0), (3, 9, 40, 1))
+
+    def test_data_view(self):
+        data = np.arange(200 * 6).reshape(200, 6)
+        da = self.block.create_data_array("view", "Data", data=data)
+        view = da.get_slice((10, 1), (150, 4))
+        expected = data[10:160, 1:5]
+        self.assertEqual(view.shape, (150, 4))
+        np.testing.assert_array_equal(view[:], expected)
+
+        mask = expected[:, 0] % 3 == 0
+        for index in [np.s_[::7], np.s_[5:100:3, ::2], np.s_[::-4, 1],
+                      np.s_[-1], np.s_[..., 2], np.s_[[3, 140, 3, 0], 1:3],
+                      np.s_[mask], np.s_[[-1, 0]], np.s_[[]], np.s_[100:10]]:
+            np.testing.assert_array_equal(view[index], expected[index])
+        # index arrays select independently in each dimension
+        np.testing.assert_array_equal(view[[10, 11, 13, 12], [3, 0]],
+                                      expected[np.ix_([10, 11, 13, 12],
+                                                      [3, 0])])
+
+        # chained views select without reading and compose
+        chained = view.view(np.s_[::3]).view(np.s_[10:, [0, 2]])
+        self.assertEqual(chained.shape, (40, 2))
+        np.testing.assert_array_equal(chained[:], expected[::3][10:, [0, 2]])
+        np.testing.assert_array_equal(chained[::-5, 1],
+                                      expected[::3][10:, 2][::-5])
+        column = view.view(np.s_[:, 3])
+        self.assertEqual(column.shape, (150, ))
+        np.testing.assert_array_equal(column[[4, 2]], expected[[4, 2], 3])
+        np.testing.assert_array_equal(da.view(np.s_[::50])[:], data[::50])
+        np.testing.assert_array_equal(np.array(da.view(np.s_[::-1, 0])),
+                                      data[::-1, 0])
+
+        # writing through a view
+        view.view(np.s_[::2, 0])[[2, 0]] = [-1, -2]
+        self.assertEqual(da[10, 1], -2)
+        self.assertEqual(da[14, 1], -1)
+        view[::-50, 3] = 0
+        np.testing.assert_array_equal(da[[59, 109, 159], 4], [0, 0, 0])
+
+        # calibration is applied like for the DataArray
+        da.polynom_coefficients = (0.0, 0.5)
+        np.testing.assert_almost_equal(view[20, ::2], da[30, 1:5:2])
+
+        with self.assertRaises(IndexError):
+            view[150]
+        with self.assertRaises(IndexError):
+            view[[0, 150]]
+        with self.assertRaises(IndexError):
+            view[mask[1:]]
+        with self.assertRaises(IndexError):
+            view[0, 0, 0]
+        with self.assertRaises(IndexError):
+            view[0, None]
+        with self.assertRaises(IndexError):
+            view[[[0]]]
+
+    def test_data_array_memmap(self):
+        data = np.random.random((100, 3))
+        contiguous = nix.StoragePolicy.contiguous()
+        da = self.block.create_data_array("mapped", "data", data=data,
+                                          storage=contiguous)
+        self.assertIsNone(da._h5group.group["data"].chunks)
+        mapped = da.as_memmap()
+        self.assertIsInstance(mapped, np.memmap)
+        self.assertFalse(mapped.flags.writeable)
+        np.testing.assert_array_equal(mapped, data)
+
+        # chunked and calibrated data is read normally
+        chunked = self.block.create_data_array("chunked", "data", data=data)
+        self.assertNotIsInstance(chunked.as_memmap(), np.memmap)
+        np.testing.assert_array_equal(chunked.as_memmap(), data)
+        da.polynom_coefficients = (0.0, 2.0)
+        self.assertNotIsInstance(da.as_memmap(), np.memmap)
+        np.testing.assert_almost_equal(da.as_memmap(), data * 2)
+
+        with self.assertRaises(ValueError):
+            self.block.create_data_array("compressed", "data", data=data,
+                                         storage=contiguous,
+                                         compression=nix.Compression.LZF)
+        with self.assertRaises(ValueError):
+            nix.StoragePolicy(chunks=False, shuffle=True)
+
+        blockid = self.block.id
+        self.file.close()
+        self.file = nix.File.open(self.testfilename, nix.FileMode.ReadWrite,
+                                  mmap=True)
+        self.block = self.file.blocks[blockid]
+        da = self.block.data_arrays["mapped"]
+        da.polynom_coefficients = ()
+        self.assertIsInstance(da[:], np.memmap)
+        # writes are visible in the data read afterwards
+        da[0] = [1, 2, 3]
+        np.testing.assert_array_equal(da[:2], [[1, 2, 3], data[1]])
+        np.testing.assert_array_equal(da[10:20, 1], data[10:20, 1])
+        np.testing.assert_array_equal(da.get_slice((5, 0), (10, 2))[:],
+                                      data[5:15, :2])
+        np.testing.assert_array_equal(
+            self.block.data_arrays["chunked"][:], data
+        )
+
+    def test_data_array_parallel_read(self):
+        data = np.random.random((1000, 12))
+        policy = nix.StoragePolicy(chunks=(64, 5), shuffle=True)
+        da = self.block.create_data_array(
+            "compressed", "data", shape=(1200, 12), storage=policy,
+            compression=nix.Compression.DeflateNormal
+        )
+        da[:1000] = data
+        blockid = self.block.id
+        self.file.close()
+
+        self.file = nix.File.open(self.testfilename, nix.FileMode.ReadWrite,
+                                  threads=4)
+        self.block = self.file.blocks[blockid]
+        da = self.block.data_arrays["compressed"]
+        h5data = da._h5group.group["data"]
+        for index in [np.s_[:], np.s_[:1000], np.s_[100:900, 3:11],
+                      np.s_[500], np.s_[-300:, 7], np.s_[..., 2:], np.s_[1],
+                      np.s_[::2], np.s_[[1, 5]], np.s_[10:20]]:
+            np.testing.assert_array_equal(da[index], h5data[index])
+        # chunks that were never written contain the fill value
+        np.testing.assert_array_equal(da[1000:], np.zeros((200, 12)))
+
+        blocks = list(da.read_blocks(300))
+        self.assertEqual([len(b) for b in blocks], [300, 300, 300, 300])
+        np.testing.assert_array_equal(np.concatenate(blocks)[:1000], data)
+        blocks = list(da.read_blocks(5, axis=1, readahead=0))
+        np.testing.assert_array_equal(np.concatenate(blocks, axis=1)[:1000],
+                                      data)
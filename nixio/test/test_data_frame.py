@@ -9,6 +9,14 @@ try:
 except ImportError:
     from collections import OrderedDict
 import sys
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
 
 
 class TestDataFrame(unittest.TestCase):
@@ -196,3 +204,158 @@ class TestDataFrame(unittest.TestCase):
         assert self.df1.dtype[4] == np.int32
         assert self.df1.dtype[0] != self.df1.dtype[4]
         assert self.df1.dtype[2] == self.df1.dtype[3]
+
+    def test_columns_bulk(self):
+        n = 5000
+        di = OrderedDict([('idx', np.int64), ('val', np.float64)])
+        data = np.zeros(n, dtype=[('idx', np.int64), ('val', np.float64)])
+        data['idx'] = np.arange(n)
+        data['val'] = np.arange(n) / 2.0
+        df = self.block.create_data_frame("bulk", "bulk", col_dict=di,
+                                          data=data)
+        df.write_column(np.arange(n)[::-1], index=0)
+        np.testing.assert_array_equal(df.read_columns(index=[0]),
+                                      np.arange(n)[::-1])
+        df.append_column(np.ones(n, dtype=np.int32), name='flag',
+                         datatype=np.int32)
+        self.assertEqual(df.column_names, ('idx', 'val', 'flag'))
+        self.assertEqual(df.dtype[2], np.int32)
+        np.testing.assert_array_equal(df.read_columns(name=['val']),
+                                      data['val'])
+        cols = df.read_columns(name=['flag', 'idx'], sl=slice(10, 20))
+        self.assertEqual(cols.dtype.names, ('flag', 'idx'))
+        np.testing.assert_array_equal(cols['idx'], np.arange(n)[::-1][10:20])
+        grouped = df.read_columns(name=['idx', 'flag'], sl=slice(0, 3),
+                                  group_by_cols=True)
+        np.testing.assert_array_equal(grouped, [[n-1, n-2, n-3], [1, 1, 1]])
+
+    @unittest.skipIf(pd is None, "pandas not available")
+    def test_pandas(self):
+        self.df1.units = ["", "", "s", "mV", ""]
+        frame = self.df1.to_pandas()
+        self.assertEqual(tuple(frame.columns), self.df1.column_names)
+        self.assertEqual(list(frame["id"]), list("abcdefghij"))
+        np.testing.assert_array_equal(frame["sig2"],
+                                      self.df1.read_columns(name=["sig2"]))
+        self.assertEqual(frame["sig2"].dtype, np.int32)
+        self.assertEqual(frame.attrs["units"], {"time": "s", "sig1": "mV"})
+        self.assertEqual(list(self.df1.to_pandas(slice(2, 4)).index), [2, 3])
+
+        chunks = list(self.df1.iter_pandas(4))
+        self.assertEqual([len(c) for c in chunks], [4, 4, 2])
+        self.assertTrue(pd.concat(chunks).equals(frame))
+
+        df = self.block.create_data_frame_from_pandas("from pandas", "pd",
+                                                      frame)
+        self.assertEqual(df.column_names, self.df1.column_names)
+        self.assertTrue(df.to_pandas().equals(frame))
+        self.assertEqual(list(df.units), ["", "", "s", "mV", ""])
+        df = self.block.create_data_frame_from_pandas("from chunks", "pd",
+                                                      iter(chunks))
+        self.assertEqual(len(df), 10)
+        self.assertTrue(df.to_pandas().equals(frame))
+
+    @unittest.skipIf(pd is None, "pandas not available")
+    def test_pandas_column_types(self):
+        frame = pd.DataFrame(OrderedDict([
+            ("count", pd.array([1, 2, 3], dtype="Int64")),
+            ("valid", pd.array([True, False, True], dtype="boolean")),
+            ("value", pd.array([1.5, None, 2.5], dtype="Float64")),
+            ("number", pd.Series([1, 2, 3], dtype=object)),
+            ("mixed", pd.Series([1, 2.5, 3], dtype=object)),
+            ("name", pd.Series(["a", "b", "c"], dtype=object)),
+        ]))
+        df = self.block.create_data_frame_from_pandas("types", "pd", frame)
+        dtypes = dict(zip(df.column_names, df.dtype))
+        self.assertEqual(dtypes["count"], np.int64)
+        self.assertEqual(dtypes["valid"], np.bool_)
+        self.assertEqual(dtypes["value"], np.float64)
+        self.assertEqual(dtypes["number"], np.int64)
+        self.assertEqual(dtypes["mixed"], np.float64)
+        self.assertTrue(dtypes["name"].hasobject)
+        back = df.to_pandas()
+        self.assertEqual(list(back["count"]), [1, 2, 3])
+        self.assertEqual(list(back["valid"]), [True, False, True])
+        self.assertTrue(np.isnan(back["value"][1]))
+        self.assertEqual(list(back["name"]), ["a", "b", "c"])
+
+        frame = pd.DataFrame({"x": pd.Series([1, "a"], dtype=object)})
+        with self.assertRaises(TypeError):
+            self.block.create_data_frame_from_pandas("mixed", "pd", frame)
+        frame = pd.DataFrame({"x": pd.array([1, None], dtype="Int64")})
+        with self.assertRaises(TypeError):
+            self.block.create_data_frame_from_pandas("missing", "pd", frame)
+
+    @unittest.skipIf(pa is None, "pyarrow not available")
+    def test_arrow(self):
+        self.df1.units = ["", "", "s", "mV", ""]
+        table = self.df1.to_arrow()
+        self.assertEqual(tuple(table.column_names), self.df1.column_names)
+        self.assertEqual(table.column("id").to_pylist(), list("abcdefghij"))
+        self.assertEqual(table.schema.field("time").metadata,
+                         {b"unit": b"s"})
+        self.assertIsNone(table.schema.field("name").metadata)
+        np.testing.assert_array_equal(table.column("sig1").to_numpy(),
+                                      self.df1.read_columns(name=["sig1"]))
+
+        batches = list(self.df1.iter_arrow(3))
+        self.assertEqual([b.num_rows for b in batches], [3, 3, 3, 1])
+        df = self.block.create_data_frame_from_arrow("from arrow", "pa",
+                                                     batches)
+        self.assertTrue(df.to_arrow().equals(table))
+        df = self.block.create_data_frame_from_arrow("from table", "pa",
+                                                     table)
+        self.assertEqual(list(df.units), ["", "", "s", "mV", ""])
+        self.assertEqual(df.to_arrow().column("sig2").type, pa.int32())
+
+    def test_query(self):
+        rows = self.df1.query("sig2 >= 200 and name == 2")
+        np.testing.assert_array_equal(rows, [4, 5, 8, 9])
+        rows = self.df1.query("not (100 < sig2 <= 300) or id in ['a', 'c']")
+        np.testing.assert_array_equal(rows, [0, 2, 6, 7, 8])
+        rows = self.df1.where([("id", "==", "g"), ("time", ">", 20)])
+        np.testing.assert_array_equal(rows, [6])
+        rows = self.df1.where([("sig1", "not in", [5.1, 5.0])], chunksize=3)
+        np.testing.assert_array_equal(rows, [1, 3, 4, 5, 8])
+        self.assertEqual(len(self.df1.query("sig2 > 1000")), 0)
+        for expr in ["sig2 > ", "sig2 > sig1", "nope == 1", "len(id) > 1"]:
+            with self.assertRaises(ValueError):
+                self.df1.query(expr)
+        with self.assertRaises(ValueError):
+            self.df1.where([("sig2", "~", 1)])
+        # no conditions match every row without reading any column
+        np.testing.assert_array_equal(self.df1.where([]),
+                                      np.arange(len(self.df1)))
+        np.testing.assert_array_equal(self.df1.where([], chunksize=3),
+                                      np.arange(len(self.df1)))
+        self.assertEqual(len(self.df1._select(("or", []))), 0)
+        self.assertEqual(len(self.df1._select(("not", ("and", [])))), 0)
+
+        n = 10000
+        di = OrderedDict([('trial', np.int64), ('rt', np.float64)])
+        data = np.zeros(n, dtype=[('trial', np.int64), ('rt', np.float64)])
+        data['trial'] = np.arange(n)
+        data['rt'] = np.linspace(0, 1, n)
+        data['rt'][17] = np.nan
+        df = self.block.create_data_frame("trials", "trials", col_dict=di,
+                                          data=data)
+        expected = np.flatnonzero((data['trial'] % 1000 < 10) &
+                                  (data['rt'] > 0.5))
+        np.testing.assert_array_equal(
+            df.query("trial >= 7000 and trial < 7010"), np.arange(7000, 7010)
+        )
+        df.compute_statistics(rows=1000)
+        self.assertEqual(df._statistics()[0], 1000)
+        np.testing.assert_array_equal(
+            df.query("trial >= 7000 and trial < 7010"), np.arange(7000, 7010)
+        )
+        np.testing.assert_array_equal(df.query("rt < 0.0001"), [0])
+        np.testing.assert_array_equal(
+            df.where([("trial", "in", list(range(0, n, 1000))),
+                      ("rt", ">", 0.5)]),
+            expected[expected % 1000 == 0]
+        )
+        # writes drop the statistics
+        df.write_column(np.arange(n)[::-1], name='trial')
+        self.assertIsNone(df._statistics())
+        np.testing.assert_array_equal(df.query("trial == 0"), [n - 1])
@@ -85,6 +85,15 @@ class TestDimension(unittest.TestCase):
         assert(self.sample_dim.position_at(0) == 3.)
         assert(self.sample_dim.position_at(200) == 200*2.+3.)
 
+        positions = np.array([3.14, 23., 40.9])
+        indices = self.sample_dim.index_of(positions)
+        assert(indices.dtype == np.int64)
+        assert(np.array_equal(indices, [0, 10, 19]))
+        assert(np.allclose(self.sample_dim.position_at(indices),
+                           [3., 23., 41.]))
+        with self.assertRaises(IndexError):
+            self.sample_dim.index_of([5., -10.])
+
         assert(len(self.sample_dim.axis(10)) == 10)
         assert(self.sample_dim.axis(10)[0] == 3.)
         assert(self.sample_dim.axis(10)[-1] == 9*2.+3.)
@@ -93,6 +102,39 @@ class TestDimension(unittest.TestCase):
         assert(self.sample_dim.axis(10, 2)[0] == 2 * 2. + 3.)
         assert(self.sample_dim.axis(10, 2)[-1] == (9 + 2) * 2. + 3.)
 
+        values = self.sample_dim.axis(10, 2, as_array=True)
+        assert(isinstance(values, np.ndarray))
+        assert(np.array_equal(values, self.sample_dim.axis(10, 2)))
+
+    def test_lazy_axis(self):
+        self.sample_dim.sampling_interval = 0.1
+        self.sample_dim.offset = 1.
+        count = 10 ** 9
+        axis = self.sample_dim.lazy_axis(count)
+        assert(len(axis) == count)
+        assert(axis[0] == 1.)
+        assert(np.isclose(axis[-1], 1. + (count - 1) * 0.1))
+        assert(axis.searchsorted(1.) == 0)
+        assert(axis.searchsorted(1., side="right") == 1)
+        assert(axis.searchsorted(0.) == 0)
+        assert(axis.searchsorted(1e12) == count)
+        assert(np.array_equal(axis.searchsorted([1.05, 2.]), [1, 10]))
+
+        part = axis[10:20:2]
+        assert(isinstance(part, nix.Axis))
+        assert(len(part) == 5)
+        values = np.asarray(part)
+        assert(np.allclose(values, 1. + np.arange(10, 20, 2) * 0.1))
+        assert(np.array_equal(np.searchsorted(values, values),
+                              part.searchsorted(values)))
+        assert(part == tuple(values))
+        assert(np.allclose(axis[[0, 5]], [1., 1.5]))
+        with self.assertRaises(IndexError):
+            axis[count]
+
+        assert(np.array_equal(np.asarray(self.sample_dim.lazy_axis(10, 2)),
+                              self.sample_dim.axis(10, 2, as_array=True)))
+
     def test_range_dimension(self):
         assert(self.range_dim.index == 3)
         assert(self.range_dim.dimension_type == nix.DimensionType.Range)
@@ -125,9 +167,20 @@ class TestDimension(unittest.TestCase):
         with self.assertRaises(IndexError):
             self.range_dim.tick_at(100)
 
+        positions = [-100., 0., 3.14, 10., 100.]
+        indices = self.range_dim.index_of(positions)
+        assert(indices.dtype == np.int64)
+        assert(np.array_equal(indices, [self.range_dim.index_of(p)
+                                        for p in positions]))
+        assert(np.allclose(self.range_dim.tick_at(indices),
+                           [other[i] for i in indices]))
+        assert(np.allclose(self.range_dim.position_at([1, 2]), other[1:3]))
+
         assert(self.range_dim.axis(10) == other)
         assert(self.range_dim.axis(2) == other[:2])
         assert(self.range_dim.axis(2, 2) == other[2:4])
+        assert(np.array_equal(self.range_dim.axis(2, 2, as_array=True),
+                              other[2:4]))
         with self.assertRaises(IndexError):
             self.range_dim.axis(10, 2)
             self.range_dim.axis(100)
@@ -153,6 +206,14 @@ class TestDimension(unittest.TestCase):
         setdim.labels = newlabels
         assert tuple(newlabels) == setdim.labels
 
+    def test_set_dim_labels_written(self):
+        index = self.set_dim.index
+        assert self.set_dim.labels == ()
+        self.array.dimensions[index - 1].labels = ["A", "B"]
+        assert self.set_dim.labels == ("A", "B")
+        self.set_dim.labels = ["C"]
+        assert self.array.dimensions[index - 1].labels == ("C", )
+
     def test_range_dim_ticks_resize(self):
         rangedim = self.array.append_range_dimension([1, 2, 100])
         ticks = [1, 1, 30]
@@ -163,6 +224,59 @@ class TestDimension(unittest.TestCase):
         rangedim.ticks = newticks
         assert tuple(newticks) == rangedim.ticks
 
+    def test_range_dim_large_ticks(self):
+        ticks = np.cumsum(np.random.random(5000))
+        rdim = self.array.append_range_dimension(ticks)
+        positions = np.array([-1.0, ticks[0], ticks[1234] + 1e-9,
+                              ticks[-1] + 1, ticks[2500]])
+        expected = np.clip(np.searchsorted(ticks, positions, "right") - 1,
+                           0, len(ticks) - 1)
+
+        limit = nix.dimensions.MAX_CACHED_TICKS
+        nix.dimensions.MAX_CACHED_TICKS = 100
+        try:
+            dim = self.array.dimensions[rdim.index - 1]
+            assert np.all(dim.index_of(positions) == expected)
+            assert dim.index_of(ticks[42]) == 42
+            assert dim.tick_at(-1) == ticks[-1]
+            assert np.all(dim.tick_at([7, 3, 7]) == ticks[[7, 3, 7]])
+            assert dim.axis(5, 4000) == tuple(ticks[4000:4005])
+            with self.assertRaises(IndexError):
+                dim.tick_at(5000)
+            assert dim._cached_ticks() is None
+        finally:
+            nix.dimensions.MAX_CACHED_TICKS = limit
+
+        dim = self.array.dimensions[rdim.index - 1]
+        assert np.all(dim.index_of(positions) == expected)
+        assert not dim._ticks_array.flags.writeable
+        dim.ticks = [1, 2, 3]
+        assert dim.ticks == (1, 2, 3)
+
+    def test_range_dim_ticks_written(self):
+        index = self.range_dim.index
+        assert self.range_dim.index_of(5.) == 5
+        other = self.array.dimensions[index - 1]
+        other.ticks = [10., 20., 30.]
+        assert self.range_dim.ticks == (10., 20., 30.)
+        assert self.range_dim.index_of(25.) == 1
+        assert self.range_dim.tick_at(2) == 30.
+
+        da = self.block.create_data_array("ticks da", "dimticks",
+                                          data=np.arange(5.))
+        da.append_alias_range_dimension()
+        alias = da.dimensions[0]
+        assert alias.tick_at(4) == 4.
+        da.write_direct(np.arange(5.) * 10)
+        assert alias.ticks == (0., 10., 20., 30., 40.)
+        assert alias.index_of(25.) == 2
+        da.unit = "ms"
+        assert alias.unit == "ms"
+        tag = self.block.create_tag("tag", "tag", [10.])
+        tag.extent = [20.]
+        tag.references.append(da)
+        assert np.array_equal(tag.tagged_data(0)[:], [10., 20., 30.])
+
     def test_append_dim_init(self):
         slabels = ["label A", "label B"]
         setdim = self.array.append_set_dimension(slabels)
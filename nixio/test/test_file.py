@@ -13,6 +13,7 @@ import numpy as np
 
 import nixio as nix
 import nixio.file as filepy
+from nixio.hdf5 import h5cache
 from nixio.exceptions import InvalidFile
 from .tmp import TempDir
 
@@ -42,6 +43,92 @@ class TestFile(unittest.TestCase):
         self.file.force_created_at(1403530068)
         assert(self.file.created_at == 1403530068)
 
+    def test_batch_updates(self):
+        self.file.time_auto_update = True
+        block = self.file.create_block("test block", "recordingsession")
+        da = block.create_data_array("da", "signal", data=np.zeros(4))
+        tag = block.create_tag("tag", "event", [0.0])
+        feature = tag.create_feature(da, nix.LinkType.Tagged)
+        deleted = block.create_data_array("deleted", "signal", shape=(1, ))
+        for entity in (da, tag, feature, deleted):
+            entity._h5group.set_attr("updated_at", b"19700101T000000")
+
+        with self.file.batch_updates():
+            da.unit = "mV"
+            da.label = "voltage"
+            with self.file.batch_updates():
+                tag.definition = "stimulus onset"
+            feature.link_type = nix.LinkType.Untagged
+            deleted.definition = "gone"
+            del block.data_arrays["deleted"]
+            pending = self.file._state.updates
+            assert(h5cache.objkey(da._h5group.group) in pending)
+            assert(h5cache.objkey(tag._h5group.group) in pending)
+            # nothing is written until the block ends
+            assert(da.updated_at == 0)
+            assert(tag.updated_at == 0)
+            assert(feature.updated_at == 0)
+        assert(da.updated_at > 0)
+        assert(tag.updated_at == da.updated_at)
+        assert(self.file._state.updates is None)
+        assert(feature.updated_at == da.updated_at)
+        assert("deleted" not in block.data_arrays)
+        assert(da.unit == "mV")
+
+        # time stamps set explicitly are not deferred
+        with self.file.batch_updates():
+            da.force_updated_at(10)
+            assert(da.updated_at == 10)
+            da.label = "current"
+            self.file.close()
+        self.file = nix.File.open(self.testfilename, nix.FileMode.ReadOnly)
+        da = self.file.blocks[0].data_arrays["da"]
+        assert(da.updated_at > 10)
+        assert(da.label == "current")
+
+    def test_access_options(self):
+        self.file.close()
+        access = nix.AccessOptions(chunk_cache_size=32 * 1024 * 1024,
+                                   chunk_cache_slots=10007,
+                                   chunk_cache_w0=1.,
+                                   metadata_cache_size=4 * 1024 * 1024,
+                                   file_space="page", page_size=64 * 1024,
+                                   page_buffer_size=1024 * 1024)
+        self.file = nix.File.open(self.testfilename, nix.FileMode.Overwrite,
+                                  access=access)
+        h5file = self.file._h5file
+        _, slots, nbytes, w0 = h5file.id.get_access_plist().get_cache()
+        assert((slots, nbytes, w0) == (10007, 32 * 1024 * 1024, 1.))
+        fcpl = h5file.id.get_create_plist()
+        assert(fcpl.get_file_space_strategy()[0] ==
+               h5py.h5f.FSPACE_STRATEGY_PAGE)
+        assert(fcpl.get_file_space_page_size() == 64 * 1024)
+        block = self.file.create_block("blk", "test")
+        block.create_data_array("da", "test", data=np.arange(100))
+        self.file.close()
+
+        for preset in ("streaming-write", "random-read", "archive"):
+            self.file = nix.File.open(self.testfilename,
+                                      nix.FileMode.ReadOnly, access=preset)
+            da = self.file.blocks["blk"].data_arrays["da"]
+            assert(np.array_equal(da[:], np.arange(100)))
+            self.file.close()
+
+        self.file = nix.File.open(self.testfilename, nix.FileMode.ReadWrite,
+                                  access=nix.AccessOptions(driver="core"))
+        assert(self.file._h5file.driver == "core")
+
+        fapl = nix.AccessOptions(file_locking=False).make_fapl()
+        if hasattr(fapl, "get_file_locking"):
+            assert(not fapl.get_file_locking()[0])
+
+        with self.assertRaises(ValueError):
+            nix.AccessOptions(driver="mpio")
+        with self.assertRaises(ValueError):
+            nix.AccessOptions(page_size=4096)
+        with self.assertRaises(ValueError):
+            nix.AccessOptions.preset("fast")
+
     def test_file_blocks(self):
         assert(len(self.file.blocks) == 0)
 
@@ -100,6 +187,50 @@ class TestFile(unittest.TestCase):
                                                            x.name,
                                            limit=1)) == 0)
 
+    def test_file_query_sections(self):
+        for idx in range(6):
+            sec = self.file.create_section("subject" + str(idx), "subject")
+            sec["species"] = "mouse" if idx % 2 else "rat"
+            sec["age"] = idx * 10
+            sess = sec.create_section("session" + str(idx), "session")
+            sess["trials"] = [idx, idx + 10]
+        query = {"species": "mouse", "age": (">", 20)}
+
+        def names(secs):
+            return [sec.name for sec in secs]
+
+        self.assertEqual(names(self.file.query_sections("subject", query)),
+                         ["subject3", "subject5"])
+        self.assertEqual(len(self.file.query_sections(type="session")), 6)
+        found = self.file.query_sections(props={"trials": ("in", [2, 14])})
+        self.assertEqual(names(found), ["session2", "session4"])
+        self.assertEqual(self.file.query_sections(props={"age": "10"}), [])
+        with self.assertRaises(ValueError):
+            self.file.query_sections(props={"age": ("~", 10)})
+
+        # changes made after the index was built
+        self.file.sections["subject3"]["species"] = "rat"
+        sec = self.file.create_section("subject6", "subject")
+        sec["species"] = "mouse"
+        sec["age"] = 60
+        self.assertEqual(names(self.file.query_sections("subject", query)),
+                         ["subject5", "subject6"])
+
+        self.file.create_metadata_index()
+        self.file.close()
+        self.file = nix.File.open(self.testfilename, nix.FileMode.ReadWrite)
+        self.assertEqual(names(self.file.query_sections("subject", query)),
+                         ["subject5", "subject6"])
+        blk = self.file.create_block("block", "session")
+        blk.metadata = self.file.sections["subject5"]
+        blk.metadata["age"] = 0
+        del self.file.sections["subject6"]
+        self.file.close()
+
+        self.file = nix.File.open(self.testfilename, nix.FileMode.ReadOnly)
+        self.assertEqual(self.file.query_sections("subject", query), [])
+        self.assertEqual(len(self.file.query_sections("subject")), 6)
+
     def test_order_tracking(self):
         blknames = []
         for idx in range(10):
@@ -135,6 +266,72 @@ class TestFile(unittest.TestCase):
         with nix.File.open(fname, nix.FileMode.ReadOnly) as nf:
             self.assertEqual(nf.blocks[0].name, "blocky")
 
+    def test_file_cache(self):
+        fname = os.path.join(self.tmpdir.path, "cache.nix")
+        nf = nix.File.open(fname, nix.FileMode.Overwrite, cache=True)
+        blk = nf.create_block("blk", "cache-test")
+        da = blk.create_data_array("da", "signal", data=np.arange(10.))
+        da.label = "voltage"
+        da.unit = "mV"
+        da.polynom_coefficients = (0, 2)
+        rdim = da.append_range_dimension([1., 2., 3.])
+        alias = blk.create_data_array("alias", "ticks", data=[0., 1., 2.])
+        alias.append_alias_range_dimension()
+
+        # reads go through the cache; writes must replace cached values
+        self.assertEqual(da.label, "voltage")
+        self.assertEqual(da.unit, "mV")
+        self.assertEqual(da.polynom_coefficients, (0, 2))
+        self.assertEqual(rdim.ticks, (1., 2., 3.))
+        da.label = "current"
+        da.unit = "nA"
+        da.polynom_coefficients = (1, 3)
+        rdim.ticks = [4., 5., 6.]
+        self.assertEqual(da.label, "current")
+        self.assertEqual(da.unit, "nA")
+        self.assertEqual(da.polynom_coefficients, (1, 3))
+        self.assertEqual(da.dimensions[0].ticks, (4., 5., 6.))
+        self.assertEqual(alias.dimensions[0].ticks, (0., 1., 2.))
+        alias.write_direct(np.array([5., 6., 7.]))
+        self.assertEqual(alias.dimensions[0].ticks, (5., 6., 7.))
+        da.polynom_coefficients = None
+        self.assertEqual(da.polynom_coefficients, ())
+        nf.close()
+
+        with nix.File.open(fname, nix.FileMode.ReadOnly) as nf:
+            da = nf.blocks[0].data_arrays["da"]
+            for _ in range(2):
+                self.assertEqual(da.label, "current")
+                self.assertEqual(da.unit, "nA")
+                self.assertEqual(da.dimensions[0].ticks, (4., 5., 6.))
+                self.assertEqual(list(da[:3]), [0., 1., 2.])
+
+        with nix.File.open(fname, nix.FileMode.ReadOnly, cache=False) as nf:
+            self.assertEqual(nf.blocks[0].data_arrays["da"].unit, "nA")
+
+    def test_file_state(self):
+        fname = os.path.join(self.tmpdir.path, "state.nix")
+        nf = nix.File.open(fname, nix.FileMode.Overwrite)
+        state = nf._state
+        self.assertIs(h5cache.lookup(nf._h5file), state)
+        self.assertIsNot(h5cache.lookup(self.file._h5file), state)
+
+        blk = nf.create_block("blk", "state-test")
+        da = blk.create_data_array("da", "signal", data=[1.])
+        tag = blk.create_tag("tag", "event", [0.])
+        tag.references.append(da)
+        # objects are keyed by their object number, which is the same
+        # through every link to them and differs between objects
+        linked = tag.references[0]._h5group.group
+        self.assertEqual(h5cache.objkey(linked),
+                         h5cache.objkey(da._h5group.group))
+        self.assertNotEqual(h5cache.objkey(tag._h5group.group),
+                            h5cache.objkey(da._h5group.group))
+
+        nf.close()
+        self.assertNotIn(state, h5cache._files.values())
+        self.assertEqual(len(state.derived), 0)
+
     def test_copy_on_file(self):
         tar_filename = os.path.join(self.tmpdir.path, "copytarget.nix")
         tar_file = nix.File.open(tar_filename, nix.FileMode.Overwrite)
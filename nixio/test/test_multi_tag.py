@@ -356,6 +356,133 @@ class TestMultiTags(unittest.TestCase):
         for pidx, p in enumerate(onedmtag.positions):
             onedmtag.tagged_data(pidx, 0)
 
+    def test_multi_tag_coalesce_slices(self):
+        def groups(starts, stops):
+            result = nix.MultiTag._coalesce_slices(
+                np.array(starts, dtype=np.int64),
+                np.array(stops, dtype=np.int64))
+            return [(sorted(int(m) for m in members), list(start),
+                     list(stop)) for members, start, stop in result]
+
+        # overlapping and adjacent 1D ranges
+        assert(groups([[0], [5], [10], [30]], [[5], [12], [20], [40]]) ==
+               [([0, 1, 2], [0], [20]), ([3], [30], [40])])
+        # 2D regions that only touch at a corner are read separately
+        assert(groups([[0, 0], [10, 10]], [[10, 10], [20, 20]]) ==
+               [([0], [0, 0], [10, 10]), ([1], [10, 10], [20, 20])])
+        # adjacent along the sort axis and overlapping in the other one
+        assert(groups([[0, 0], [10, 0]], [[10, 10], [20, 10]]) ==
+               [([0, 1], [0, 0], [20, 10])])
+        # overlapping, but the bounding box is too large
+        assert(groups([[0, 0], [5, 90]], [[10, 100], [100, 100]]) ==
+               [([0], [0, 0], [10, 100]), ([1], [5, 90], [100, 100])])
+
+    def test_multi_tag_tagged_data_batch(self):
+        data = np.random.random((3, 10, 5))
+        da = self.block.create_data_array("batchdata", "test", data=data)
+        setdim = da.append_set_dimension()
+        setdim.labels = ["Label A", "Label B", "Label D"]
+        samdim = da.append_sampled_dimension(1.0)
+        samdim.unit = "ms"
+        randim = da.append_range_dimension([1.2, 2.3, 3.4, 4.5, 6.7])
+        randim.unit = "ms"
+
+        pos = self.block.create_data_array("batchpos", "test",
+                                           data=[[1, 1, 1],
+                                                 [0, 4, 2.5],
+                                                 [2, 8, 0]])
+        ext = self.block.create_data_array("batchext", "test",
+                                           data=[[1, 5, 2],
+                                                 [0, 4, 1],
+                                                 [0, 1, 3]])
+        mtag = self.block.create_multi_tag("batchtag", "segment", pos)
+        mtag.extents = ext
+        mtag.units = ["none", "ms", "ms"]
+        mtag.references.append(da)
+
+        batch = mtag.tagged_data_batch(0)
+        assert(len(batch) == 3)
+        for pidx, tagged in enumerate(batch):
+            expected = mtag.tagged_data(pidx, 0)
+            assert(tagged.shape == expected.shape)
+            assert(np.array_equal(tagged, expected[:]))
+
+        batch = mtag.tagged_data_batch(da.name, posidx=[2, 0])
+        assert(np.array_equal(batch[0], mtag.tagged_data(2, 0)[:]))
+        assert(np.array_equal(batch[1], mtag.tagged_data(0, 0)[:]))
+
+        padded, shapes = mtag.tagged_data_batch(0, padded=True)
+        assert(padded.shape == (3,) + tuple(shapes.max(axis=0)))
+        for pidx, shape in enumerate(shapes):
+            region = tuple(slice(0, s) for s in shape)
+            expected = mtag.tagged_data(pidx, 0)[:]
+            assert(np.array_equal(padded[pidx][region], expected))
+            assert(np.isnan(padded[pidx]).sum() ==
+                   padded[pidx].size - np.prod(shape))
+
+        self.assertRaises(IndexError,
+                          lambda: mtag.tagged_data_batch(0, posidx=[3]))
+
+        # 1D positions tag one sample each in 1D data
+        oneddata = self.block.create_data_array("1dbatch", "data",
+                                                data=np.arange(100))
+        oneddata.append_sampled_dimension(0.1)
+        onedpos = self.block.create_data_array("1dbatchpos", "positions",
+                                               data=[0.1, 0.9, 3.4, 3.5])
+        onedext = self.block.create_data_array("1dbatchext", "extents",
+                                               data=[0.2, 0.3, 0.1, 0.5])
+        onedmtag = self.block.create_multi_tag("1dbatchmt", "mtag",
+                                               positions=onedpos)
+        onedmtag.extents = onedext
+        onedmtag.references.append(oneddata)
+        batch = onedmtag.tagged_data_batch(0)
+        assert(np.array_equal(batch[0], [1, 2, 3]))
+        assert(np.array_equal(batch[1], [9, 10, 11, 12]))
+        assert(np.array_equal(batch[2], [34, 35]))
+        assert(np.array_equal(batch[3], [35, 36, 37, 38, 39, 40]))
+        # overlapping regions are independent arrays
+        batch[2][1] = -1
+        assert(batch[3][0] == 35)
+        batch[0][2] = -1
+        assert(batch[1][0] == 9)
+        assert(oneddata[35] == 35)
+        padded, shapes = onedmtag.tagged_data_batch(0, padded=True)
+        assert(padded.shape == (4, 6))
+        assert(np.array_equal(shapes[:, 0], [3, 4, 2, 6]))
+        assert(np.array_equal(padded[2], [34, 35, 0, 0, 0, 0]))
+
+    def test_multi_tag_positions_in_range(self):
+        starts = np.array([[5., 1.], [0.5, 2.], [3., 0.], [9., 1.]])
+        posda = self.block.create_data_array("range positions", "test",
+                                             data=starts)
+        extda = self.block.create_data_array(
+            "range extents", "test",
+            data=np.array([[1., 1.], [2., 1.], [0., 1.], [0.5, 1.]])
+        )
+        mtag = self.block.create_multi_tag("ranges", "test", posda)
+        mtag.extents = extda
+
+        assert(list(mtag.positions_in_range(2., 3.)) == [1, 2])
+        assert(list(mtag.positions_in_range(6., 8.9)) == [0])
+        assert(list(mtag.positions_in_range(20., 30.)) == [])
+        assert(list(mtag.positions_in_range(2.5, 2.5, dimension=1)) == [1])
+        with self.assertRaises(ValueError):
+            mtag.positions_in_range(3., 2.)
+        with self.assertRaises(nix.exceptions.IncompatibleDimensions):
+            mtag.positions_in_range(0., 1., dimension=2)
+
+        mtag.extents = None
+        assert(list(mtag.positions_in_range(2., 3.)) == [2])
+
+        # only writes to the positions and extents drop the index
+        cached = len(self.file._state.derived)
+        mtag.force_updated_at()
+        extda.write_direct(np.zeros((4, 2)))
+        assert(len(self.file._state.derived) == cached)
+        posda.write_direct(starts + 1.)
+        assert(len(self.file._state.derived) == cached - 1)
+        assert(list(mtag.positions_in_range(1., 2.)) == [1])
+
     def test_multi_tag_feature_data(self):
         index_data = self.block.create_data_array("indexed feature data",
                                                   "test",
@@ -8,6 +8,7 @@
 # LICENSE file in the root of the Project.
 import os
 import unittest
+import numpy as np
 import nixio as nix
 from .tmp import TempDir
 
@@ -166,6 +167,21 @@ class TestProperties(unittest.TestCase):
         assert(self.prop_s.values == tuple())
         assert(self.prop_s.data_type == nix.DataType.String)
 
+    def test_property_values_array(self):
+        self.prop.values = [10, 20, 30]
+        arr = self.prop.values_array
+        assert(isinstance(arr, np.ndarray))
+        assert(arr.dtype == nix.DataType.Int64)
+        assert(np.array_equal(arr, [10, 20, 30]))
+
+        self.prop_s.values = ["foo", "bar"]
+        assert(list(self.prop_s.values_array) == ["foo", "bar"])
+        assert(self.prop_s.values == ("foo", "bar"))
+
+        self.prop.delete_values()
+        assert(len(self.prop.values_array) == 0)
+        assert(not self.prop._legacy_layout)
+
     def test_extend_values(self):
         da = (1,2,3)
         self.prop.extend_values(da)
@@ -183,3 +199,5 @@ class TestProperties(unittest.TestCase):
         self.assertRaises(TypeError, lambda: self.prop.extend_values(da))
         da = (1, 1.2)
         self.assertRaises(TypeError, lambda: self.prop.extend_values(da))
+        assert(self.prop.values == (0, 1, 2, 3, 10))
+        assert(self.prop_s.values == ("foo", "bar", "bla"))
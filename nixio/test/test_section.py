@@ -278,6 +278,27 @@ class TestSections(unittest.TestCase):
         self.assertEqual(len(self.section.referring_sources), 0)
         self.assertEqual(self.other.referring_sources[0].id, src.id)
 
+        # changing and removing links and deleting referring objects
+        da_two.metadata = self.section
+        self.assertEqual(self.other.referring_data_arrays, [da_one])
+        self.assertEqual(self.section.referring_data_arrays, [da_two])
+        del da_one.metadata
+        self.assertEqual(len(self.other.referring_data_arrays), 0)
+        del block.data_arrays[da_two.name]
+        self.assertEqual(len(self.section.referring_data_arrays), 0)
+        self.assertEqual(len(self.section.referring_objects), 3)
+
+    def test_inverse_search_order(self):
+        block = self.file.create_block("order block", "block")
+        names = ["da{:02}".format(idx) for idx in reversed(range(12))]
+        for name in names:
+            da = block.create_data_array(name, "data_array", data=[0])
+            da.metadata = self.section
+        # referring entities come in the order of creation, as in the block
+        refnames = [da.name for da in self.section.referring_data_arrays]
+        self.assertEqual(refnames, names)
+        self.assertEqual(refnames, [da.name for da in block.data_arrays])
+
     def test_section_link(self):
         self.section.create_property("PropOnSection", "value")
 
@@ -314,3 +335,62 @@ class TestSections(unittest.TestCase):
         assert sec2 == tarsec.sections[1]
         assert sec1.sections[0] == tarsec.sections[1]
         tarfile.close()
+
+    def test_section_dict(self):
+        self.section["existing"] = 1
+        tree = {
+            "definition": "imported",
+            "properties": {
+                "existing": [2, 3],
+                "species": "mouse",
+                "weight": {"values": [21.5], "unit": "g",
+                           "definition": "body weight"},
+                "flags": [True, False],
+                "empty": {"values": [], "dtype": "str"},
+            },
+            "sections": {
+                "session": {"type": "session",
+                            "properties": {"trials": [1, 2, 3]},
+                            "sections": {"run": {"type": "run"}}},
+            },
+        }
+        self.section.update_from_dict(tree)
+        self.assertEqual(self.section.definition, "imported")
+        self.assertEqual(self.section["existing"], [2, 3])
+        self.assertEqual(self.section["species"], "mouse")
+        self.assertEqual(self.section.props["weight"].unit, "g")
+        self.assertEqual(self.section["flags"], [True, False])
+        self.assertEqual(self.section.props["empty"].values, ())
+        session = self.section.sections["session"]
+        self.assertEqual(session.type, "session")
+        self.assertEqual(session.parent, self.section)
+        self.assertEqual(session["trials"], [1, 2, 3])
+        self.assertEqual(session.sections["run"].type, "run")
+
+        exported = self.section.to_dict()
+        self.assertEqual(exported["id"], self.section.id)
+        self.assertEqual(exported["definition"], "imported")
+        weight = exported["properties"]["weight"]
+        self.assertEqual(weight["values"], [21.5])
+        self.assertEqual(weight["unit"], "g")
+        self.assertEqual(weight["id"], self.section.props["weight"].id)
+        self.assertEqual(exported["properties"]["empty"]["dtype"], "str")
+        self.assertEqual(list(exported["sections"]), ["session"])
+
+        # round trip into a new file, keeping the ids
+        tarfilename = os.path.join(self.tmpdir.path, "dicttarget.nix")
+        tarfile = nix.File.open(tarfilename, nix.FileMode.Overwrite)
+        copies = tarfile.import_metadata({"copy": exported}, keep_ids=True)
+        self.assertEqual(copies[0].id, self.section.id)
+        self.assertEqual(copies[0].to_dict()["properties"],
+                         exported["properties"])
+        self.assertEqual(copies[0].sections["session"].id, session.id)
+        tarfile.close()
+
+        with self.assertRaises(TypeError):
+            self.section.update_from_dict({"properties": {"mixed": [1, "a"]}})
+        with self.assertRaises(TypeError):
+            self.section.update_from_dict({"properties": {"empty2": []}})
+        with self.assertRaises(ValueError):
+            self.section.update_from_dict({"sections": {"a/b": {}}})
+        self.assertNotIn("mixed", self.section)
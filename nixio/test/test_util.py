@@ -7,7 +7,9 @@
 # modification, are permitted under the terms of the BSD License. See
 # LICENSE file in the root of the Project.
 import unittest
+import numpy as np
 from nixio.util import names, units
+from nixio.exceptions import InvalidUnit
 
 
 class TestUtil(unittest.TestCase):
@@ -86,6 +88,21 @@ class TestUtil(unittest.TestCase):
         assert(units.scaling(base_unit, scalable_1) == 1e-03)
         assert(units.scaling(base_unit, scalable_2) == 1e06)
 
+    def test_unit_convert(self):
+        converted = units.convert([1., 2.5], 'ms', 's')
+        assert(np.allclose(converted, [1e-3, 2.5e-3]))
+        assert(units.convert(3, 'mV', 'mV') == 3)
+        with self.assertRaises(InvalidUnit):
+            units.convert([1.], 'ms', 'V')
+
+    def test_unit_cache(self):
+        units.scaling.cache_clear()
+        for _ in range(3):
+            assert(units.scaling('mV', 'V') == 1e-03)
+        assert(units.split('mV^2') == ('m', 'V', '2'))
+        # lists of units are not cached but still supported
+        assert(units.scalable(['mV', 's'], ['V', 'ms']))
+
     def test_unit_split(self):
         unit_1 = 'kV'
         unit_2 = 'mV^2'
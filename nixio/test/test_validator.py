@@ -348,3 +348,38 @@ class TestValidate (unittest.TestCase):
         self.validator.check_sources(src1, 0)
         err = self.validator.errors['blocks'][0]['sources']
         assert "Name of Source is missing" in err
+
+    def test_iter_findings(self):
+        da1 = self.block2.data_arrays[1]
+        da1.unit = "foo"
+        da1.append_sampled_dimension(sampling_interval=-0.5)
+        self.block1.groups[1]._h5group.set_attr("name", None)
+        self.file.sections["sec1"]._h5group.set_attr("type", None)
+
+        timings = dict()
+        findings = list(Validate(self.file).iter_findings(timings=timings))
+        locations = [f.location for f in findings]
+        assert ("blocks", 0, "groups", 1) in locations
+        assert ("blocks", 1, "data_arrays", 1) in locations
+        assert ("blocks", 1, "data_arrays", 1, "dimensions", 0) in locations
+        assert ("sections", 0) in locations
+        assert "data_arrays" in timings and "range_dimensions" not in timings
+
+        locking = os.environ.get("HDF5_USE_FILE_LOCKING")
+        parallel = Validate(self.file).iter_findings(processes=2)
+        first = next(parallel)
+        # only the workers open the file without locking
+        assert os.environ.get("HDF5_USE_FILE_LOCKING") == locking
+        assert [first] + list(parallel) == findings
+
+        errors = self.file.validate()
+        blkerr = errors["blocks"][1]["data_arrays"][1]
+        assert "Invalid units" in blkerr["errors"]
+        assert blkerr["dimensions"][0]["errors"]
+
+        # entities that did not change since the given time are skipped
+        since = self.file.blocks[0].updated_at + 10
+        assert not list(Validate(self.file).iter_findings(since=since))
+        da1.force_updated_at(since)
+        findings = list(Validate(self.file).iter_findings(since=since))
+        assert [f.id for f in findings] == [da1.id, None]
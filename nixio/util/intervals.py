@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# Copyright © 2020, German Neuroinformatics Node (G-Node)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the Project.
+"""
+Interval index for finding the tagged regions that overlap a range.
+"""
+import numpy as np
+
+
+class IntervalIndex(object):
+    """
+    Finds the intervals ``[starts[i], stops[i]]`` that overlap a range. The
+    intervals are sorted by their start once. A query finds the intervals
+    that start before the end of the range with a binary search and, using
+    the running maximum of the stops, skips the leading intervals that all
+    end before the range begins, so that only a small part of the intervals
+    is compared with the range.
+
+    :param starts: The start of each interval.
+    :param stops: The stop of each interval, not smaller than its start.
+    """
+
+    def __init__(self, starts, stops):
+        starts = np.asarray(starts, dtype=float).reshape(-1)
+        stops = np.asarray(stops, dtype=float).reshape(-1)
+        if starts.shape != stops.shape:
+            raise ValueError("Number of starts and stops differ")
+        self._order = np.argsort(starts, kind="stable")
+        self._starts = starts[self._order]
+        self._stops = stops[self._order]
+        if len(self._stops):
+            self._maxstops = np.maximum.accumulate(self._stops)
+        else:
+            self._maxstops = self._stops
+
+    def __len__(self):
+        return len(self._starts)
+
+    def overlapping(self, start, stop):
+        """
+        Returns the indices of the intervals that overlap the range
+        ``[start, stop]``, i.e., intervals that contain a position of the
+        range including its borders.
+
+        :param start: The start of the range.
+        :param stop: The stop of the range.
+
+        :returns: The indices of the overlapping intervals in increasing
+                  order.
+        :rtype: numpy.ndarray of int64
+        """
+        if stop < start:
+            raise ValueError("The stop of a range cannot be smaller than its "
+                             "start")
+        first = np.searchsorted(self._maxstops, start, side="left")
+        last = np.searchsorted(self._starts, stop, side="right")
+        if last <= first:
+            return np.empty(0, dtype=np.int64)
+        hits = self._stops[first:last] >= start
+        return np.sort(self._order[first:last][hits]).astype(np.int64)
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+# Copyright © 2020, German Neuroinformatics Node (G-Node)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the Project.
+"""
+Row predicates for DataFrame queries.
+
+A predicate is a tree of tuples: ``("cmp", column, op, value)`` compares a
+column with a value, ``("and", [predicates])``, ``("or", [predicates])``
+and ``("not", predicate)`` combine predicates.
+"""
+import ast
+import operator
+
+import numpy as np
+from six import string_types
+
+
+_comparisons = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+_ast_ops = {
+    ast.Eq: "==",
+    ast.NotEq: "!=",
+    ast.Lt: "<",
+    ast.LtE: "<=",
+    ast.Gt: ">",
+    ast.GtE: ">=",
+    ast.In: "in",
+    ast.NotIn: "not in",
+}
+
+# the comparison that results from swapping the operands
+_flipped = {"==": "==", "!=": "!=", "<": ">", "<=": ">=", ">": "<",
+            ">=": "<="}
+
+
+def conditions(conds):
+    """
+    Returns the predicate that is true when all the given conditions are
+    true. Each condition is a tuple ``(column, op, value)``, where ``op`` is
+    one of ``==, !=, <, <=, >, >=, in, not in``.
+    """
+    preds = list()
+    for cond in conds:
+        if len(cond) != 3:
+            raise ValueError("Conditions must be tuples of "
+                             "(column, operator, value): {}".format(cond))
+        column, op, value = cond
+        if op not in _comparisons and op not in ("in", "not in"):
+            raise ValueError("Unsupported operator {}".format(op))
+        preds.append(("cmp", column, op, value))
+    return ("and", preds)
+
+
+def parse(expr):
+    """
+    Parses a query expression like ``"trial_type == 'go' and rt < 0.5"``
+    into a predicate. Expressions compare columns with constants and can be
+    combined with ``and``, ``or``, ``not`` and parentheses. Comparisons can
+    be chained (``0.1 < rt < 0.5``) and ``in``/``not in`` test membership
+    in a list of constants.
+    """
+    try:
+        tree = ast.parse(expr.strip(), mode="eval")
+    except SyntaxError as exc:
+        raise ValueError("Invalid query {!r}: {}".format(expr, exc))
+    return _convert(tree.body, expr)
+
+
+def _convert(node, expr):
+    if isinstance(node, ast.BoolOp):
+        kind = "and" if isinstance(node.op, ast.And) else "or"
+        return (kind, [_convert(v, expr) for v in node.values])
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return ("not", _convert(node.operand, expr))
+    if isinstance(node, ast.Compare):
+        preds = list()
+        operands = [node.left] + list(node.comparators)
+        for left, astop, right in zip(operands, node.ops, operands[1:]):
+            op = _ast_ops.get(type(astop))
+            if op is None:
+                break
+            if isinstance(left, ast.Name) and not isinstance(right,
+                                                             ast.Name):
+                preds.append(("cmp", left.id, op, _constant(right, expr)))
+            elif (isinstance(right, ast.Name) and op in _flipped and
+                  not isinstance(left, ast.Name)):
+                preds.append(("cmp", right.id, _flipped[op],
+                              _constant(left, expr)))
+            else:
+                break
+        else:
+            return preds[0] if len(preds) == 1 else ("and", preds)
+    raise ValueError("Unsupported query {!r}: queries must compare "
+                     "columns with constants".format(expr))
+
+
+def _constant(node, expr):
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        raise ValueError("Unsupported query {!r}: queries must compare "
+                         "columns with constants".format(expr))
+
+
+def fields(pred):
+    """
+    Returns the names of the columns used in the predicate.
+    """
+    kind = pred[0]
+    if kind == "cmp":
+        return [pred[1]]
+    if kind == "not":
+        return fields(pred[1])
+    names = list()
+    for p in pred[1]:
+        names.extend(n for n in fields(p) if n not in names)
+    return names
+
+
+def _match_strings(column, value):
+    # variable length strings may be read as bytes
+    if (column.dtype.hasobject and len(column) and
+            isinstance(column[0], bytes)):
+        if isinstance(value, string_types) and not isinstance(value, bytes):
+            return value.encode()
+        if isinstance(value, (list, tuple, set)):
+            return [_match_strings(column, v) for v in value]
+    return value
+
+
+def evaluate(pred, columns, size=None):
+    """
+    Evaluates the predicate for the rows of the given columns, a dict of
+    column name to array, and returns a boolean array. ``size`` is the
+    number of rows; it must be given for predicates that use no columns,
+    e.g., an empty list of conditions, which matches every row.
+    """
+    if size is None:
+        if not columns:
+            raise ValueError("The number of rows is required for "
+                             "predicates without columns")
+        size = len(next(iter(columns.values())))
+    kind = pred[0]
+    if kind == "cmp":
+        _, name, op, value = pred
+        column = columns[name]
+        value = _match_strings(column, value)
+        if op in ("in", "not in"):
+            result = np.isin(column, list(value))
+            return ~result if op == "not in" else result
+        return np.asarray(_comparisons[op](column, value), dtype=bool)
+    if kind == "not":
+        return ~evaluate(pred[1], columns, size)
+    if not pred[1]:
+        # all of no conditions hold, none of them holds for "or"
+        return np.full(size, kind == "and", dtype=bool)
+    results = [evaluate(p, columns, size) for p in pred[1]]
+    combine = np.logical_and if kind == "and" else np.logical_or
+    return combine.reduce(results)
+
+
+def can_skip(pred, mins, maxs):
+    """
+    Returns True if no row in a block of rows with the given minimum and
+    maximum column values (dicts of column name to value; columns without
+    statistics are missing) can match the predicate.
+    """
+    kind = pred[0]
+    if kind == "and":
+        return any(can_skip(p, mins, maxs) for p in pred[1])
+    if kind == "or":
+        return all(can_skip(p, mins, maxs) for p in pred[1])
+    if kind != "cmp":
+        return False
+    _, name, op, value = pred
+    if name not in mins:
+        return False
+    low, high = mins[name], maxs[name]
+    try:
+        if op == "==":
+            return value < low or value > high
+        if op == "<":
+            return low >= value
+        if op == "<=":
+            return low > value
+        if op == ">":
+            return high <= value
+        if op == ">=":
+            return high < value
+        if op == "in":
+            return all(v < low or v > high for v in value)
+    except TypeError:
+        # values that cannot be compared with the statistics
+        return False
+    return False
@@ -9,10 +9,15 @@
 
 from six import string_types
 import re
+from collections import OrderedDict
+from functools import wraps
 try:
     from collections.abc import Sequence
 except ImportError:
     from collections import Sequence
+
+import numpy as np
+
 from ..exceptions import InvalidUnit
 
 
@@ -44,7 +49,50 @@ PREFIX_FACTORS = {"y": 1.0e-24,
                   "Z": 1.0e21,
                   "Y": 1.0e24}
 
-
+_ATOMIC = "{prefix}?{unit}{power}?".format(prefix=PREFIXES, unit=UNITS,
+                                           power=POWER)
+_atomic_re = re.compile("^" + _ATOMIC + "$")
+_compound_re = re.compile(
+    "({atomic}(\\*|/))+{atomic}".format(atomic=_ATOMIC)
+)
+_prefix_re = "(?P<prefix>{})".format(PREFIXES)
+_unit_re = "(?P<unit>{})".format(UNITS)
+_power_re = "(?P<power>{})".format(POWER)
+_pup_re = re.compile(_prefix_re + _unit_re + _power_re)
+_pu_re = re.compile(_prefix_re + _unit_re)
+_up_re = re.compile(_unit_re + _power_re)
+_opt_pup_re = re.compile(PREFIXES + "?" + UNITS + POWER + "?")
+
+# Number of results kept by each of the memoized unit functions
+CACHE_SIZE = 1024
+
+
+def _memoize(func):
+    """
+    Keeps the results of the most recent CACHE_SIZE calls of a function of
+    unit strings. Calls with unhashable arguments (lists of units) are not
+    cached.
+    """
+    cache = OrderedDict()
+
+    @wraps(func)
+    def memoized(*args):
+        try:
+            result = cache.pop(args)
+        except KeyError:
+            result = func(*args)
+            if len(cache) >= CACHE_SIZE:
+                cache.popitem(last=False)
+        except TypeError:
+            return func(*args)
+        cache[args] = result
+        return result
+
+    memoized.cache_clear = cache.clear
+    return memoized
+
+
+@_memoize
 def sanitizer(unit):
     """
     Sanitizes a unit string. That is, it is de-blanked, and mu and µ symbols
@@ -75,6 +123,7 @@ def is_si(unit):
     return unit and (is_atomic(unit) or is_compound(unit))
 
 
+@_memoize
 def is_atomic(unit):
     """
     Checked whether a unit string represents an atomic si unit, i.e. not a
@@ -85,14 +134,10 @@ def is_atomic(unit):
     :returns: True if unit is atomic, False otherwise.
     :rtype: bool
     """
-    atomic_unit = re.compile(
-        "^{prefix}?{unit}{power}?$".format(prefix=PREFIXES,
-                                           unit=UNITS,
-                                           power=POWER)
-    )
-    return atomic_unit.match(unit)
+    return _atomic_re.match(unit)
 
 
+@_memoize
 def is_compound(unit):
     """
     Checks whether a unit string represents a combination of SI units.
@@ -103,15 +148,10 @@ def is_compound(unit):
               False otherwise.
     :rtype: bool
     """
-    atomic_unit = "{prefix}?{unit}{power}?".format(
-        prefix=PREFIXES, unit=UNITS, power=POWER
-    )
-    compound_unit = re.compile(
-        "({atomic}(\\*|/))+{atomic}".format(atomic=atomic_unit)
-    )
-    return unit and compound_unit.search(unit)
+    return unit and _compound_re.search(unit)
 
 
+@_memoize
 def scalable(unit_a, unit_b):
     """
     Checks whether units are scalable versions of the same SI unit.
@@ -145,6 +185,7 @@ def scalable(unit_a, unit_b):
     return True
 
 
+@_memoize
 def scaling(origin, destination):
     """
     Returns the scaling factor to convert from one unit to another.
@@ -182,6 +223,22 @@ def scaling(origin, destination):
     return scale
 
 
+def convert(values, origin, destination):
+    """
+    Converts values from one unit to another. The scaling factor is
+    determined once and applied to all values.
+
+    :param values: A value or an array of values in the origin unit.
+    :param origin: The original unit string.
+    :param destination: The destination unit string.
+
+    :returns: The values in the destination unit.
+    :rtype: double or numpy.ndarray of double
+    """
+    return np.asarray(values, dtype=float) * scaling(origin, destination)
+
+
+@_memoize
 def split(combined_unit):
     """
     Splits a unit string into magnitude prefix, the base unit, and the power.
@@ -191,30 +248,21 @@ def split(combined_unit):
     :returns: A tuple of prefix, base unit, and power.
     :rtype: tuple
     """
-    prefix_re = "(?P<prefix>{})".format(PREFIXES)
-    unit_re = "(?P<unit>{})".format(UNITS)
-    power_re = "(?P<power>{})".format(POWER)
-    pup = re.compile(prefix_re + unit_re + power_re)
-    pu = re.compile(prefix_re + unit_re)
-    up = re.compile(unit_re + power_re)
-    # u = re.compile(unit_re)
-    # p = re.compile(prefix_re)
-
-    match = pup.match(combined_unit)
+    match = _pup_re.match(combined_unit)
     if match:
         prefix = match.group("prefix")
         unit = match.group("unit")
         power = match.group("power")[1:]
         return prefix, unit, power
 
-    match = up.match(combined_unit)
+    match = _up_re.match(combined_unit)
     if match:
         prefix = ""
         unit = match.group("unit")
         power = match.group("power")[1:]
         return prefix, unit, power
 
-    match = pu.match(combined_unit)
+    match = _pu_re.match(combined_unit)
     if match:
         prefix = match.group("prefix")
         unit = match.group("unit")
@@ -238,6 +286,7 @@ def invert_power(unit):
     return prefix + unit + "^" + power
 
 
+@_memoize
 def split_compound(compound_unit):
     """
     Splits a compound unit (like mV/Hz) into the atomic units.
@@ -247,8 +296,7 @@ def split_compound(compound_unit):
     :returns: A tuple containing the atomic units.
     :rtype: tuple
     """
-    opt_pup = re.compile(PREFIXES + "?" + UNITS + POWER + "?")
-    match = opt_pup.match(compound_unit)
+    match = _opt_pup_re.match(compound_unit)
     sep = ""
     atomic_units = []
     while match and (match.end() < len(match.string)):
@@ -260,7 +308,7 @@ def split_compound(compound_unit):
         else:
             atomic_units.append(unit)
         sep = suffix[0]
-        match = opt_pup.match(suffix[1:])
+        match = _opt_pup_re.match(suffix[1:])
     unit = match.group(0)
     if sep == "/":
         atomic_units.append(invert_power(unit))
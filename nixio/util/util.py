@@ -122,6 +122,21 @@ def str_to_time(s):
     return int(dt.total_seconds())
 
 
+def decode_value(value):
+    """
+    Returns a value read from HDF5 as a Python object: bytes are decoded
+    and numpy scalars are converted to the corresponding Python type.
+
+    :param value: a value of an attribute or dataset
+    :return: the decoded value
+    """
+    if isinstance(value, bytes):
+        return value.decode()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
 def check_attr_type(value, type_):
     """
     Checks if a value is of a given type and raises an exception if the check
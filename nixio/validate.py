@@ -7,6 +7,10 @@
 # modification, are permitted under the terms of the BSD License. See
 # LICENSE file in the root of the Project.
 from __future__ import (absolute_import, division, print_function)
+import os
+import multiprocessing
+from collections import namedtuple
+from timeit import default_timer
 import numpy as np
 from .util import units
 from .dimension_type import DimensionType
@@ -16,6 +20,16 @@ except ImportError:
     from collections import OrderedDict
 
 
+Finding = namedtuple("Finding", ("location", "id", "errors"))
+Finding.__doc__ = """
+The errors found for a single object of a file. ``location`` is the path of
+keys and indices of the object in the error dictionary of
+:meth:`~nixio.validate.Validate.form_dict`, e.g.,
+``("blocks", 0, "data_arrays", 2, "dimensions", 0)``, and ``id`` is the id
+of the object (None for the file and dimensions).
+"""
+
+
 class Validate:
 
     def __init__(self, file):
@@ -78,6 +92,176 @@ class Validate:
                     tag = self.errors['blocks'][bi]['tags'][ti]
                     tag['features'].append(fea_dict)
 
+    def iter_findings(self, since=None, processes=None, timings=None):
+        """
+        Checks all objects of the file and yields a Finding for each object
+        with errors as soon as it has been checked. Unlike the check methods,
+        this does not need the error dictionary of form_dict.
+
+        :param since: POSIX time of a previous validation. Entities whose
+                      updated_at is older are not checked again. Dimensions
+                      are checked together with their DataArray.
+                      (default: None, which checks all entities)
+        :type since: int
+        :param processes: Number of processes that check the blocks in
+                          parallel, each on a read-only handle of the file.
+                          (default: None, which checks them in this process)
+        :type processes: int
+        :param timings: A dictionary to which the total time in seconds
+                        spent in each kind of check is added, keyed by the
+                        name of the check.
+        :type timings: dict
+
+        :returns: The findings of the objects with errors
+        :rtype: generator of Finding
+        """
+        errors = self._timed(timings, "file", self._file_errors, self.file)
+        if errors:
+            yield Finding(("file_errors", ), None, errors)
+
+        nblocks = len(self.file.blocks)
+        if processes and processes > 1 and nblocks > 1:
+            findings = self._parallel_findings(nblocks, since, processes,
+                                               timings)
+        else:
+            findings = (finding
+                        for bi, blk in enumerate(self.file.blocks)
+                        for finding in self._block_findings(blk, bi, since,
+                                                            timings))
+        for finding in findings:
+            yield finding
+
+        for si, sec in enumerate(self.file.find_sections()):
+            finding = self._check(("sections", si), sec, "sections",
+                                  self.check_for_basics, since, timings)
+            if finding:
+                yield finding
+            for pi, prop in enumerate(sec.props):
+                finding = self._check(("sections", si, "props", pi), prop,
+                                      "properties", self._property_errors,
+                                      since, timings)
+                if finding:
+                    yield finding
+
+    def record(self, finding):
+        """
+        Stores the errors of a finding in the error dictionary of form_dict.
+        """
+        node = self.errors
+        for key in finding.location[:-1]:
+            node = node[key]
+        last = finding.location[-1]
+        if isinstance(last, int):
+            node[last]['errors'] = finding.errors
+        else:
+            node[last] = finding.errors
+        self.error_count += len(finding.errors)
+
+    def _block_findings(self, blk, bi, since, timings):
+        loc = ("blocks", bi)
+        checks = [(loc, blk, "blocks", self.check_for_basics)]
+        for gi, grp in enumerate(blk.groups):
+            checks.append((loc + ("groups", gi), grp, "groups",
+                           self.check_for_basics))
+        for check in checks:
+            finding = self._check(*(check + (since, timings)))
+            if finding:
+                yield finding
+
+        dimchecks = {
+            DimensionType.Range: ("range_dimensions", self._range_dim_errors),
+            DimensionType.Set: ("set_dimensions", self._set_dim_errors),
+            DimensionType.Sample: ("sampled_dimensions",
+                                   self._sampled_dim_errors),
+        }
+        for di, da in enumerate(blk.data_arrays):
+            if not self._changed(da, since):
+                continue
+            daloc = loc + ("data_arrays", di)
+            finding = self._check(daloc, da, "data_arrays",
+                                  self._data_array_errors, None, timings)
+            if finding:
+                yield finding
+            for dimi, dim in enumerate(da.dimensions):
+                name, check = dimchecks[dim.dimension_type]
+                errors = self._timed(timings, name, check, dim)
+                if errors:
+                    yield Finding(daloc + ("dimensions", dimi), None, errors)
+
+        for kind, entities, check in (
+                ("multi_tags", blk.multi_tags, self._multi_tag_errors),
+                ("tags", blk.tags, self._tag_errors)):
+            for ti, tag in enumerate(entities):
+                tagloc = loc + (kind, ti)
+                finding = self._check(tagloc, tag, kind, check, since,
+                                      timings)
+                if finding:
+                    yield finding
+                for fi, fea in enumerate(tag.features):
+                    finding = self._check(tagloc + ("features", fi), fea,
+                                          "features", self._feature_errors,
+                                          since, timings)
+                    if finding:
+                        yield finding
+
+        for src in blk.find_sources():
+            finding = self._check(loc + ("sources", ), src, "sources",
+                                  self.check_for_basics, since, timings)
+            if finding:
+                yield finding
+
+    def _parallel_findings(self, nblocks, since, processes, timings):
+        self.file.flush()
+        filename = self.file._h5file.filename
+        # the blocks are split into a few tasks per process, so that each
+        # worker opens the file once per task, not once per block
+        ntasks = min(nblocks, processes * 4)
+        tasks = [(filename, [int(bi) for bi in indices], since,
+                  timings is not None)
+                 for indices in np.array_split(np.arange(nblocks), ntasks)]
+        try:
+            context = multiprocessing.get_context("spawn")
+        except AttributeError:
+            context = multiprocessing
+        pool = context.Pool(min(processes, ntasks), _init_worker)
+        try:
+            for findings, times in pool.imap(_check_blocks, tasks):
+                if timings is not None:
+                    for name, seconds in times.items():
+                        timings[name] = timings.get(name, 0.0) + seconds
+                for finding in findings:
+                    yield finding
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _check(self, location, entity, name, check, since, timings):
+        if not self._changed(entity, since):
+            return None
+        errors = self._timed(timings, name, check, entity)
+        if errors:
+            return Finding(location, entity.id, errors)
+        return None
+
+    @staticmethod
+    def _changed(entity, since):
+        if since is None:
+            return True
+        try:
+            return entity.updated_at >= since
+        except (AttributeError, TypeError, ValueError):
+            # no valid time stamp: check the entity
+            return True
+
+    @staticmethod
+    def _timed(timings, name, check, *args):
+        if timings is None:
+            return check(*args)
+        start = default_timer()
+        result = check(*args)
+        timings[name] = timings.get(name, 0.0) + default_timer() - start
+        return result
+
     def check_file(self):
         """
         Check if the file meets the NIX requirements at the file level.
@@ -85,16 +269,20 @@ class Validate:
         :returns: The error dictionary with errors appended on the file level
         :rtype: Dictionary
         """
+        file_err_list = self._file_errors(self.file)
+        self.errors['file_errors'] = file_err_list
+        self.error_count += len(file_err_list)
+        return self.errors
+
+    @staticmethod
+    def _file_errors(file):
         file_err_list = []
-        if not self.file.created_at:
+        if not file.created_at:
             file_err_list.append("date is not set!")
         # will not check format as Error will be raised anyways
         # will not check version as Error will be raised
         # in nixpy no location attributes. This is checked in C++ version
-
-        self.errors['file_errors'] = file_err_list
-        self.error_count += len(file_err_list)
-        return self.errors
+        return file_err_list
 
     def check_blocks(self, block, blk_idx):
         """
@@ -133,6 +321,13 @@ class Validate:
         :returns: The error dictionary with errors appended on DataArray level
         :rtype: Dictionary
         """
+        da_error_list = self._data_array_errors(da)
+        da = self.errors['blocks'][blk_idx]['data_arrays'][da_idx]
+        da['errors'] = da_error_list
+        self.error_count += len(da_error_list)
+        return self.errors
+
+    def _data_array_errors(self, da):
         da_error_list = []
         if self.check_for_basics(da):
             da_error_list.extend(self.check_for_basics(da))
@@ -186,11 +381,7 @@ class Validate:
             if not ex_origin:
                 da_error_list.append("Polynomial coefficients exist"
                                      " but expansion origins are missing")
-
-        da = self.errors['blocks'][blk_idx]['data_arrays'][da_idx]
-        da['errors'] = da_error_list
-        self.error_count += len(da_error_list)
-        return self.errors
+        return da_error_list
 
     def check_tag(self, tag, tag_idx, blk_idx):
         """
@@ -199,6 +390,13 @@ class Validate:
         :returns: The error dictionary with errors appended on Tag level
         :rtype: Dictionary
         """
+        tag_err_list = self._tag_errors(tag)
+        tag = self.errors['blocks'][blk_idx]['tags'][tag_idx]
+        tag['errors'] = tag_err_list
+        self.error_count += len(tag_err_list)
+        return self.errors
+
+    def _tag_errors(self, tag):
         tag_err_list = []
 
         if not tag.position:
@@ -239,13 +437,16 @@ class Validate:
         for unit in tag.units:
             if not units.is_si(unit):
                 tag_err_list.append('Invalid unit')
+        return tag_err_list
 
-        tag = self.errors['blocks'][blk_idx]['tags'][tag_idx]
-        tag['errors'] = tag_err_list
-        self.error_count += len(tag_err_list)
+    def check_multi_tag(self, mt, mt_idx, blk_idx):
+        mt_err_list = self._multi_tag_errors(mt)
+        mtag = self.errors['blocks'][blk_idx]['multi_tags'][mt_idx]
+        mtag['errors'] = mt_err_list
+        self.error_count += len(mt_err_list)
         return self.errors
 
-    def check_multi_tag(self, mt, mt_idx, blk_idx):
+    def _multi_tag_errors(self, mt):
         mt_err_list = []
 
         if not mt.positions:
@@ -296,11 +497,7 @@ class Validate:
                             "References and multi_tag units mismatched"
                         )
                         break
-
-        mtag = self.errors['blocks'][blk_idx]['multi_tags'][mt_idx]
-        mtag['errors'] = mt_err_list
-        self.error_count += len(mt_err_list)
-        return self.errors
+        return mt_err_list
 
     def check_section(self, section, sec_idx):
         """
@@ -316,6 +513,14 @@ class Validate:
         return self.errors
 
     def check_property(self, prop, prop_idx, sec_idx):
+        prop_err_list = self._property_errors(prop)
+        prop = self.errors['sections'][sec_idx]['props'][prop_idx]
+        prop['errors'] = prop_err_list
+        self.error_count += len(prop_err_list)
+        return self.errors
+
+    @staticmethod
+    def _property_errors(prop):
         prop_err_list = []
 
         if not prop.name:
@@ -324,10 +529,7 @@ class Validate:
             prop_err_list.append("Unit is not set")
         if prop.unit and not units.is_si(prop.unit):
             prop_err_list.append("Unit is not valid!")
-        prop = self.errors['sections'][sec_idx]['props'][prop_idx]
-        prop['errors'] = prop_err_list
-        self.error_count += len(prop_err_list)
-        return self.errors
+        return prop_err_list
 
     def check_features(self, feat, parent, blk_idx, tag_idx, fea_idx):
         """
@@ -336,17 +538,21 @@ class Validate:
         :returns: The error dictionary with errors appended on feature level
         :rtype: Dictionary
         """
+        fea_err_list = self._feature_errors(feat)
+        tag = self.errors['blocks'][blk_idx][parent][tag_idx]
+        tag['features'][fea_idx]['errors'] = fea_err_list
+        self.error_count += len(fea_err_list)
+        return self.errors
+
+    @staticmethod
+    def _feature_errors(feat):
         fea_err_list = []
         # will raise RuntimeError for both, actually no need to check
         if not feat.link_type:
             fea_err_list.append("Linked type is not set!")
         if not feat.data:
             fea_err_list.append("Data is not set")
-
-        tag = self.errors['blocks'][blk_idx][parent][tag_idx]
-        tag['features'][fea_idx]['errors'] = fea_err_list
-        self.error_count += len(fea_err_list)
-        return self.errors
+        return fea_err_list
 
     def check_sources(self, src, blk_idx):
         """
@@ -379,15 +585,22 @@ class Validate:
         :returns: The error dictionary with errors appended on range dimensions
         :rtype: Dictionary
         """
+        rdim_err_list = self._range_dim_errors(r_dim)
+        da = self.errors['blocks'][blk_idx]['data_arrays'][da_idx]
+        da['dimensions'][dim_idx]['errors'] = rdim_err_list
+        self.error_count += len(rdim_err_list)
+        return self.errors
+
+    def _range_dim_errors(self, r_dim):
         rdim_err_list = []
 
         if self.check_dim(r_dim):
             rdim_err_list.append(self.check_dim(r_dim))
 
-        if not r_dim.ticks:
+        ticks = r_dim.ticks
+        if not ticks:
             rdim_err_list.append("Ticks need to be set for range dimensions")
-        elif not all(r_dim.ticks[i] <= r_dim.ticks[i+1]
-                     for i in range(len(r_dim.ticks)-1)):
+        elif np.any(np.diff(ticks) < 0):
             rdim_err_list.append("Ticks are not sorted!")
         if r_dim.dimension_type != DimensionType.Range:
             rdim_err_list.append("Dimension type is not correct!")
@@ -396,11 +609,7 @@ class Validate:
         if r_dim.unit:
             if not units.is_atomic(r_dim.unit):
                 rdim_err_list.append("Unit must be atomic, not composite!")
-
-        da = self.errors['blocks'][blk_idx]['data_arrays'][da_idx]
-        da['dimensions'][dim_idx]['errors'] = rdim_err_list
-        self.error_count += len(rdim_err_list)
-        return self.errors
+        return rdim_err_list
 
     def check_set_dim(self, set_dim, dim_idx, da_idx, blk_idx):
         """
@@ -409,16 +618,19 @@ class Validate:
         :returns: The error dictionary with errors appended on set dimensions
         :rtype: Dictionary
         """
+        set_err_list = self._set_dim_errors(set_dim)
+        da = self.errors['blocks'][blk_idx]['data_arrays'][da_idx]
+        da['dimensions'][dim_idx]['errors'].extend(set_err_list)
+        self.error_count += len(set_err_list)
+        return self.errors
+
+    def _set_dim_errors(self, set_dim):
+        set_err_list = []
         if self.check_dim(set_dim):
-            da = self.errors['blocks'][blk_idx]['data_arrays'][da_idx]
-            da['dimensions'][dim_idx]['errors'].append(self.check_dim(set_dim))
-            self.error_count += 1
+            set_err_list.append(self.check_dim(set_dim))
         if set_dim.dimension_type != DimensionType.Set:
-            da = self.errors['blocks'][blk_idx]['data_arrays'][da_idx]
-            dim = da['dimensions'][dim_idx]
-            dim['errors'].append("Dimension type is not correct!")
-            self.error_count += 1
-        return self.errors
+            set_err_list.append("Dimension type is not correct!")
+        return set_err_list
 
     def check_sampled_dim(self, sam_dim, dim_idx, da_idx, blk_idx):
         """
@@ -427,6 +639,13 @@ class Validate:
         :returns: The error dict with errors appended on sampled dimensions
         :rtype: Dictionary
         """
+        sdim_err_list = self._sampled_dim_errors(sam_dim)
+        da = self.errors['blocks'][blk_idx]['data_arrays'][da_idx]
+        da['dimensions'][dim_idx]['errors'] = sdim_err_list
+        self.error_count += len(sdim_err_list)
+        return self.errors
+
+    def _sampled_dim_errors(self, sam_dim):
         sdim_err_list = []
 
         if self.check_dim(sam_dim):
@@ -446,11 +665,7 @@ class Validate:
         if sam_dim.unit:
             if not units.is_atomic(sam_dim.unit):
                 sdim_err_list.append("Unit must be atomic, not composite!")
-
-        da = self.errors['blocks'][blk_idx]['data_arrays'][da_idx]
-        da['dimensions'][dim_idx]['errors'] = sdim_err_list
-        self.error_count += len(sdim_err_list)
-        return self.errors
+        return sdim_err_list
 
     def check_for_basics(self, entity):
         """
@@ -477,3 +692,35 @@ class Validate:
                     dim.dimension_type == DimensionType.Sample:
                 unit_list.append(dim.unit)
         return unit_list
+
+
+def _init_worker():
+    """
+    Prepares a worker process of Validate.iter_findings. The parent process
+    may hold a write lock on the file, so the workers open it without
+    locking. Versions of HDF5 that cannot disable locking per file read
+    the environment variable each time a file is opened.
+    """
+    os.environ["HDF5_USE_FILE_LOCKING"] = "FALSE"
+
+
+def _check_blocks(task):
+    """
+    Checks some blocks of a file in a worker process of
+    Validate.iter_findings and returns the findings and timings.
+    """
+    from .file import File, FileMode
+    from .access import AccessOptions
+    filename, indices, since, timed = task
+    timings = dict() if timed else None
+    findings = list()
+    nixfile = File.open(filename, FileMode.ReadOnly,
+                        access=AccessOptions(file_locking=False))
+    try:
+        validator = Validate(nixfile)
+        for bi in indices:
+            findings.extend(validator._block_findings(nixfile.blocks[bi], bi,
+                                                      since, timings))
+    finally:
+        nixfile.close()
+    return findings, timings
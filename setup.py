@@ -76,6 +76,7 @@ setup(
     test_suite='pytest',
     setup_requires=['pytest-runner'],
     install_requires=['numpy', 'h5py', 'enum34;python_version<"3.4"'],
+    extras_require={'pandas': ['pandas'], 'arrow': ['pyarrow']},
     package_data={'nixio': [license_text, description_text]},
     include_package_data=True,
     zip_safe=False,